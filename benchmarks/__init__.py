@@ -0,0 +1,7 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+Benchmarks of the libkeyboard hot paths, see run.py.
+"""
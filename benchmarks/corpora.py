@@ -0,0 +1,38 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+Texts the benchmarks type: what our jobs actually send, in a few shapes that stress different paths.
+"""
+
+ASCII_PROSE = (
+    "The quick brown fox jumps over the lazy dog. Pack my box with five dozen liquor jugs! "
+    "How vexingly quick daft zebras jump; sphinx of black quartz, judge my vow. "
+    "Please sign in with your account name and password, then press Enter to continue. "
+) * 4
+
+SOURCE_CODE = (
+    "def keyboard_write(text, delay=0.0, display=None):\n"
+    "    with acquire(display) as kb:\n"
+    "        return kb.play(kb.compile(text), delay)  # {'a': [1, 2], \"b\": (3 | 4) ^ ~5}\n"
+    "if (x->y && *p != '\\0') { printf(\"%d%%\\n\", a[i] << 2); } // $HOME @user #tag `cmd`\n"
+) * 4
+
+CJK = (
+    "中文输入测试：请在此处输入您的用户名和密码，然后按回车键继续。"
+    "日本語の入力テスト、ひらがなとカタカナと漢字。한국어 입력 테스트입니다。"
+    "简体与繁體混合，標點符號「」『』【】……——"
+) * 4
+
+EMOJI = (
+    "Shipped 🚀 tests ✅ coffee ☕ bug 🐛 fixed 🎉 thanks 🙏 "
+    "flags 🇨🇳🇯🇵 family 👨‍👩‍👧 skin 👍🏽 hearts ❤️💙💚 faces 😀😂🥲🤔 "
+) * 4
+
+CORPORA = {
+    "ascii_prose": ASCII_PROSE,
+    "source_code": SOURCE_CODE,
+    "cjk": CJK,
+    "emoji": EMOJI,
+}
@@ -0,0 +1,284 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+Benchmark suite for the libkeyboard hot paths.
+
+    python -m benchmarks.run [--display :99 | --xvfb] [--output results.json] [--check]
+
+Types the corpora of corpora.py into a receiver window of its own and reports, per corpus,
+characters per second, X round trips per character and keyboard mapping changes per string,
+plus micro benchmarks of key resolution and the import time. The front end alone is measured
+too, on the virtual KeyBoard with the null and recording backends, so that part runs without
+any display. Results are written as JSON; --check compares them with thresholds.json and
+exits with status 1 on a regression.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpora import CORPORA          # noqa: E402
+
+THRESHOLDS = os.path.join(os.path.dirname(__file__), 'thresholds.json')
+
+
+class RequestCounter(object):
+    """Counts the requests a KeyBoard sends, by wrapping its connection's send_request"""
+
+    def __init__(self, keyboard):
+        import Xlib.protocol.request
+        self.change_request = Xlib.protocol.request.ChangeKeyboardMapping
+        self.connection = keyboard.connection.display
+        self.round_trips = 0
+        self.requests = 0
+        self.mapping_changes = 0
+
+    def __enter__(self):
+        send_request = self._send_request = self.connection.send_request
+
+        def counting(request, wait_for_response):
+            self.requests += 1
+            if wait_for_response:
+                self.round_trips += 1
+            if isinstance(request, self.change_request):
+                self.mapping_changes += 1
+            return send_request(request, wait_for_response)
+
+        self.connection.send_request = counting
+        return self
+
+    def __exit__(self, *exc):
+        self.connection.send_request = self._send_request
+
+
+@contextlib.contextmanager
+def xvfb():
+    """Start a private Xvfb server. :return: Its display name"""
+    if shutil.which('Xvfb') is None:
+        raise SystemExit("Xvfb not found")
+    display = ':%d' % (90 + os.getpid() % 100)
+    server = subprocess.Popen(['Xvfb', display, '-screen', '0', '1024x768x24', '-nolisten', 'tcp'],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        socket = '/tmp/.X11-unix/X' + display[1:]
+        for _ in range(100):
+            if os.path.exists(socket):
+                break
+            time.sleep(0.05)
+        yield display
+    finally:
+        server.terminate()
+        server.wait()
+
+
+@contextlib.contextmanager
+def receiver(display):
+    """A mapped window holding the input focus, on its own connection, so typed events have a target"""
+    import Xlib.display
+    import Xlib.X
+    connection = Xlib.display.Display(display)
+    screen = connection.screen()
+    window = screen.root.create_window(0, 0, 400, 300, 0, screen.root_depth,
+                                       event_mask=Xlib.X.KeyPressMask | Xlib.X.KeyReleaseMask)
+    window.set_wm_class('libkeyboard-bench', 'LibkeyboardBench')
+    window.map()
+    connection.sync()
+    window.set_input_focus(Xlib.X.RevertToParent, Xlib.X.CurrentTime)
+    connection.sync()
+    try:
+        yield window
+    finally:
+        window.destroy()
+        connection.close()
+
+
+def timed(fn, repeat=1):
+    """Best wall time of repeat calls of fn, in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def import_time():
+    """Seconds taken by `import libkeyboard` in a fresh interpreter"""
+    script = "import time; start = time.perf_counter(); import libkeyboard; print(time.perf_counter() - start)"
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=ROOT, universal_newlines=True)
+    return float(output)
+
+
+def bench_keyboard(display, repeat):
+    """Benchmarks on a live display. :return: List of result records"""
+    from libkeyboard import SessionPool, KeyBoard
+    results = []
+
+    with KeyBoard(display) as kb:
+        for corpus, text in CORPORA.items():
+            kb.prepare(text)
+            keysyms = [kb.char_to_keysym(char) for char in text]
+            results.append({
+                "name": "key_to_keysym", "corpus": corpus, "chars": len(text),
+                "seconds": timed(lambda: [kb.key_to_keysym(char) for char in text], repeat),
+            })
+            results.append({
+                "name": "get_keycode", "corpus": corpus, "chars": len(text),
+                "seconds": timed(lambda: [kb.get_keycode(keysym) for keysym in keysyms], repeat),
+            })
+            with RequestCounter(kb) as counter:
+                def press_release():
+                    with kb.batch():
+                        for char in text:
+                            kb.press(char, register=True)
+                            kb.release(char)
+                seconds = timed(press_release, repeat)
+            results.append({
+                "name": "press_release", "corpus": corpus, "chars": len(text), "seconds": seconds,
+                "round_trips_per_char": counter.round_trips / float(len(text) * repeat),
+            })
+            kb.clear_mapping()
+
+    for corpus, text in CORPORA.items():
+        pool = SessionPool()        # Cold: new connection, nothing registered, nothing compiled
+        with pool.acquire(display) as session, RequestCounter(session.keyboard) as counter:
+            seconds = timed(lambda: session.play(session.compile(text)))
+        results.append(write_record("keyboard_write", corpus, text, seconds, counter, 1))
+
+        with pool.acquire(display) as session, RequestCounter(session.keyboard) as counter:
+            seconds = timed(lambda: session.play(session.compile(text)), repeat)
+        results.append(write_record("keyboard_write_repeat", corpus, text, seconds, counter, repeat))
+        pool.close()
+
+    pool = SessionPool()
+    chords = [('ctrl', 'a'), ('ctrl', 'shift', 'z'), ('alt', 'f4')] * 10
+    try:
+        with pool.acquire(display) as session, RequestCounter(session.keyboard) as counter:
+            seconds = timed(lambda: [session.play(session.compile(chord)) for chord in chords])
+    except Exception as ex:
+        results.append({"name": "keyboard_group", "corpus": "chords", "error": repr(ex)})
+    else:
+        results.append({
+            "name": "keyboard_group", "corpus": "chords", "chords": len(chords), "seconds": seconds,
+            "chords_per_sec": len(chords) / seconds,
+            "round_trips_per_chord": counter.round_trips / float(len(chords)),
+        })
+    pool.close()
+    return results
+
+
+def bench_frontend(repeat):
+    """Benchmarks of the front end without a display. :return: List of result records"""
+    from libkeyboard import VirtualKeyBoard, NullBackend, RecordingBackend
+    results = []
+
+    for corpus, text in CORPORA.items():
+        with VirtualKeyBoard(backend=NullBackend()) as kb:
+            def press_release():
+                with kb.batch():
+                    for char in text:
+                        kb.press(char, register=True)
+                        kb.release(char)
+            seconds = timed(press_release, repeat)
+            results.append({
+                "name": "frontend_press_release", "corpus": corpus, "chars": len(text), "seconds": seconds,
+                "chars_per_sec": len(text) / seconds,
+            })
+
+        recording = RecordingBackend()
+        with VirtualKeyBoard(backend=recording) as kb:
+            compile_seconds = timed(lambda: kb.compile(text))       # Cached after the first run
+            plan = kb.compile(text)
+            recording.clear()
+            seconds = timed(lambda: kb.play(plan), repeat)
+            results.append({
+                "name": "frontend_play", "corpus": corpus, "chars": len(text), "seconds": seconds,
+                "compile_seconds": compile_seconds, "chars_per_sec": len(text) / seconds,
+                "events_per_char": plan.event_count / float(len(text)),
+                "sends_per_string": recording.sends / float(repeat),
+                "typed_ok": recording.text() == text * repeat,
+            })
+    return results
+
+
+def write_record(name, corpus, text, seconds, counter, repeat):
+    return {
+        "name": name, "corpus": corpus, "chars": len(text), "seconds": seconds,
+        "chars_per_sec": len(text) / seconds,
+        "round_trips_per_char": counter.round_trips / float(len(text) * repeat),
+        "mapping_changes_per_string": counter.mapping_changes / float(repeat),
+    }
+
+
+def check(results, thresholds):
+    """:return: Descriptions of the results exceeding their threshold"""
+    failures = []
+    for result in results:
+        if "error" in result:
+            failures.append("%s[%s] failed: %s" % (result["name"], result.get("corpus", "-"), result["error"]))
+        if result.get("typed_ok") is False:
+            failures.append("%s[%s] typed other text than the corpus" % (result["name"], result.get("corpus", "-")))
+        for metric, limit in thresholds.get(result["name"], {}).items():
+            value = result.get(metric)
+            if value is not None and value > limit:
+                failures.append("%s[%s] %s = %.4g > %g" % (
+                    result["name"], result.get("corpus", "-"), metric, value, limit))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    parser.add_argument('--display', default=os.environ.get('DISPLAY'), help="Display to type on")
+    parser.add_argument('--xvfb', action='store_true', help="Start a private Xvfb server to type on")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs of each timed benchmark, the best is kept")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--check', action='store_true', help="Exit with status 1 when a threshold is exceeded")
+    args = parser.parse_args(argv)
+
+    results = [{"name": "import", "seconds": import_time()}]
+    results += bench_frontend(args.repeat)
+    with (xvfb() if args.xvfb else contextlib.nullcontext(args.display)) as display:
+        if display:
+            with receiver(display):
+                results += bench_keyboard(display, args.repeat)
+        else:
+            print("No display, only the import time and the front end are measured", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": sys.platform,
+            "display": display,
+            "time": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(report, fp, indent=2)
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+
+    if args.check:
+        with open(THRESHOLDS) as fp:
+            failures = check(results, json.load(fp))
+        for failure in failures:
+            print("REGRESSION " + failure, file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
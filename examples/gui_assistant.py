@@ -1,6 +1,3 @@
-import time
-import ctypes
-import threading
 import tkinter as tk
 from tkinter import filedialog, scrolledtext
 from PIL import Image, ImageTk
@@ -11,21 +8,16 @@ import os
 # Add parent directory to path to import libkeyboard
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 try:
-    from libkeyboard.keyboard.keyboard_mapping_win import keyboardMapping
+    from libkeyboard import Sender, Pacer
 except ImportError:
-    # Fallback if running from root or installed
-    try:
-        from libkeyboard.keyboard.keyboard_mapping_win import keyboardMapping
-    except ImportError:
-        print("Error: Could not import libkeyboard. Make sure you are running from the examples directory or have the package installed.")
-        sys.exit(1)
-
-user32 = ctypes.WinDLL('user32', use_last_error=True)
+    print("Error: Could not import libkeyboard. Make sure you are running from the examples directory or have the package installed.")
+    sys.exit(1)
 
 
 class KeyboardGUI:
     def __init__(self, root):
         self.root = root
+        self.sender = Sender()
         self.root.title("LibKeyboard Input Assistant")
         self.root.geometry("300x700")
         self.root.attributes('-topmost', False)
@@ -98,32 +90,18 @@ class KeyboardGUI:
             self.log("Text box is empty!")
             return
         self.log(f"Start typing after {delay}s...")
-        threading.Thread(target=self.type_text, args=(text, delay, interval), daemon=True).start()
-
-    def press_key(self, vk_code):
-        user32.keybd_event(vk_code, 0, 0, 0)
-        user32.keybd_event(vk_code, 0, 0x0002, 0)
-
-    def type_text(self, text, delay, interval):
-        time.sleep(delay)
-        for char in text:
-            if ord(char) < 128:
-                vk = keyboardMapping.get(char)
-                if vk is not None:
-                    self.press_key(vk)
-                    self.log(f"Input: {char}")
-                    time.sleep(interval)
-                else:
-                    self.log(f"Mapping not found: {char}")
-            else:
-                self.log(f"Skip non-English char: {char}")
-
-        # ====== Append Enter if 'Auto Enter' is enabled ======
+        # Every request goes through the one sender thread, so requests never interleave
+        pacer = Pacer(deadlines=[delay + i * interval for i in range(len(text))])
+        self.watch(self.sender.write(text, pacer=pacer), "Typing finished.")
         if self.add_enter_var.get():
-            vk_enter = keyboardMapping.get("enter") or 0x0D  # Default VK_RETURN
-            self.press_key(vk_enter)
-            self.log("Typing finished, auto send Enter.")
-        # ==========================================
+            self.watch(self.sender.group("enter"), "Auto send Enter.")
+
+    def watch(self, future, msg):
+        """Log the outcome of a typing job on the Tk thread"""
+        def done(future):
+            error = future.exception()
+            self.root.after(0, self.log, f"Typing failed: {error}" if error else msg)
+        future.add_done_callback(done)
 
     def upload_image(self):
         filetypes = (
@@ -159,7 +137,10 @@ class KeyboardGUI:
 def main():
     root = tk.Tk()
     app = KeyboardGUI(root)
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        app.sender.close(wait=False)
 
 
 if __name__ == "__main__":
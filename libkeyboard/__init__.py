@@ -1,51 +1,106 @@
-# coding=utf8
-
-"""
-@Author: baicaimp3
-@Date: 2024/11/08
-"""
-
-import sys
-import time
-
-if sys.platform == 'win32':
-    from .keyboard.windows import KeyBoard
-else:
-    from .keyboard.linux import KeyBoard
-
-
-def keyboard_write(text, delay=0.0):
-    """
-    Simulate typing text.
-    :param text: String to type
-    :param delay: Delay between keystrokes in seconds
-    """
-    with KeyBoard() as kb:
-        for char in text:
-            kb.press(char)
-            kb.release(char)
-            if delay > 0:
-                time.sleep(delay)
-
-
-def keyboard_group(*keys):
-    """
-    Simulate key combination (e.g. ctrl+c).
-    :param keys: Sequence of keys to press together.
-                 The last key is pressed and released while others are held down.
-    """
-    if not keys:
-        return
-
-    with KeyBoard() as kb:
-        # Press modifiers/prefix keys
-        for key in keys[:-1]:
-            kb.press(key)
-        
-        # Press and release the final key
-        kb.press(keys[-1])
-        kb.release(keys[-1])
-        
-        # Release modifiers/prefix keys in reverse order
-        for key in reversed(keys[:-1]):
-            kb.release(key)
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2024/11/08
+"""
+
+import importlib
+import sys
+
+if sys.platform == 'win32':
+    from .keyboard.windows import KeyBoard
+else:
+    from .keyboard.linux import KeyBoard
+
+from .keyboard.backend import Backend, NullBackend, RecordingBackend
+from .keyboard.virtual import KeyBoard as VirtualKeyBoard
+from .pool import SessionPool, acquire, release
+from . import metrics
+from .pacing import Pacer, AdaptivePacer, VirtualClock
+from .stream import type_stream
+from .keyboard._plan import parse as parse_script
+
+# Imported on first use, so that "import libkeyboard" (and the command line) does not pay for asyncio
+_LAZY = {
+    'Dispatcher': 'dispatch',
+    'Sender': 'sender',
+    'AsyncKeyBoard': 'aio',
+    'async_keyboard_write': 'aio',
+    'async_keyboard_group': 'aio',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module('.' + _LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def keyboard_write(text, delay=0.0, display=None, pacer=None, adaptive=False, paste=False):
+    """
+    Simulate typing text.
+    :param text: String to type
+    :param delay: Delay between keystrokes in seconds
+    :param display: Display to type on, None for the default display
+    :param pacer: Pacer scheduling each character, instead of delay (e.g. Pacer(rate=500))
+    :param adaptive: Find the fastest rate the focused application keeps up with, see AdaptivePacer
+    :param paste: True to paste text through the clipboard instead of typing it (X11 only),
+                  "auto" to paste only unpaced text that KeyBoard.should_paste() finds worth it
+    :return: The pacer when typing was paced, see Pacer.stats()
+    """
+    with acquire(display) as kb:
+        if paste == 'auto':
+            paste = not delay and pacer is None and not adaptive and kb.should_paste(text)
+        if paste:
+            kb.paste(text)
+            return None
+        if adaptive and pacer is None:
+            pacer = AdaptivePacer.for_keyboard(kb)
+        return kb.play(kb.compile(text), delay, pacer)
+
+
+def keyboard_script(script, delay=0.0, display=None, pacer=None):
+    """
+    Simulate a script mixing text and keys, in one batched session.
+    The script is parsed and resolved once; running it again only sends the cached events.
+    :param script: e.g. "{ctrl+a}{del}Hello{enter}{tab*3}", see parse_script() for the syntax
+    :param delay: Delay between two characters, chords or held or released keys, in seconds
+    :param display: Display to type on, None for the default display
+    :param pacer: Pacer scheduling each step, instead of delay
+    :return: The pacer when typing was paced, see Pacer.stats()
+    """
+    with acquire(display) as kb:
+        return kb.play(kb.compile(parse_script(script)), delay, pacer)
+
+
+def keyboard_write_stream(source, delay=0.0, display=None, pacer=None, encoding='utf-8', chunk_size=4096):
+    """
+    Simulate typing text as it is produced, in bounded memory.
+    :param source: Iterable of strings or bytes, text or binary file, pipe, mmap
+    :param delay: Delay between keystrokes in seconds
+    :param display: Display to type on, None for the default display
+    :param pacer: Pacer scheduling each character, instead of delay
+    :param encoding: Encoding of bytes read from source
+    :param chunk_size: Characters resolved and sent at a time
+    :return: The pacer when typing was paced, see Pacer.stats()
+    """
+    with acquire(display) as kb:
+        return type_stream(kb, source, delay, pacer, encoding, chunk_size=chunk_size)
+
+
+def keyboard_group(*keys, display=None):
+    """
+    Simulate key combination (e.g. ctrl+c).
+    :param keys: Sequence of keys to press together.
+                 The last key is pressed and released while others are held down.
+    :param display: Display to type on, None for the default display
+    """
+    if not keys:
+        return
+
+    with acquire(display) as kb:
+        # Modifiers/prefix keys are held while the last key is pressed and released
+        kb.play(kb.compile(tuple(keys)))
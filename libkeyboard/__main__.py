@@ -0,0 +1,231 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+Command line: type text or chords from arguments, a file or stdin, with one KeyBoard per run.
+
+    python -m libkeyboard "hello world"
+    python -m libkeyboard --keys ctrl+s alt+f4
+    python -m libkeyboard --script "{ctrl+a}{del}Hello{enter}"
+    python -m libkeyboard -f notes.txt --rate 300 --stats
+    some-script | python -m libkeyboard --serve
+
+With --serve every line of stdin is a job answered by one JSON line on stdout: a line holding
+a JSON object takes its options from it ({"text": "...", "keys": "ctrl+c", "script": "{tab*2}",
+"delay": 0.05, "rate": 300, "adaptive": true, "paste": "auto"}), any other line is typed as it
+is (run as a script with --script).
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+import time
+
+from .keyboard import _plan
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='python -m libkeyboard', description="Simulate keyboard input.")
+    parser.add_argument('text', nargs='*', help="text to type (joined with spaces), or chords with --keys")
+    parser.add_argument('-f', '--file', help="file to type, - for stdin (the default without text)")
+    parser.add_argument('-k', '--keys', action='store_true', help="press chords such as ctrl+c, one per argument or line")
+    parser.add_argument('-s', '--script', action='store_true',
+                        help="the text is a script mixing text and keys, e.g. '{ctrl+a}Hello{enter}'")
+    parser.add_argument('-d', '--display', help="display to type on, e.g. :1 (X11)")
+    parser.add_argument('--encoding', default='utf-8', help="encoding of the file or stdin (default: utf-8)")
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument('--delay', type=float, default=0.0, help="seconds between two characters")
+    pacing.add_argument('--rate', type=float, help="characters per second")
+    pacing.add_argument('--adaptive', action='store_true', help="find the fastest rate the application keeps up with")
+    parser.add_argument('--paste', choices=('never', 'auto', 'always'), default='never',
+                        help="paste the text through the clipboard instead of typing it (X11, default: never)")
+    parser.add_argument('--serve', action='store_true', help="run every line of stdin as a job, see the module docstring")
+    parser.add_argument('--stats', action='store_true', help="print counters and latencies as JSON on stderr on exit")
+    return parser
+
+
+class _Runner(object):
+    """One KeyBoard typing every job of the run, reopened if a failed job closed it"""
+
+    def __init__(self, display, factory=None):
+        self.display = display
+        self.factory = factory
+        self.keyboard = None
+        self.started = time.perf_counter()
+        self.jobs = 0
+        self.errors = 0
+        self.chars = 0
+        self.retired = []       # KeyBoards closed by a failed job, kept for stats()
+
+    def open(self):
+        if self.keyboard is None or self.keyboard.closed:
+            if self.keyboard is not None:
+                self.retired.append(self.keyboard)
+            if self.factory is None:
+                from . import KeyBoard
+                self.factory = KeyBoard
+            self.keyboard = self.factory(self.display)
+        return self.keyboard
+
+    def _pacer(self, kb, delay, rate, adaptive):
+        from . import Pacer, AdaptivePacer
+        if adaptive:
+            return AdaptivePacer.for_keyboard(kb)
+        if rate:
+            return Pacer(rate=rate)
+        if delay:
+            return Pacer(delay)
+        return None
+
+    def type(self, source, delay=0.0, rate=None, adaptive=False, paste='never', encoding='utf-8'):
+        """Type text, or a file or stream of it"""
+        kb = self.open()
+        pacer = self._pacer(kb, delay, rate, adaptive)
+        if paste != 'never':
+            text = source if isinstance(source, str) else source.read()
+            if not isinstance(text, str):
+                text = text.decode(encoding)
+            self.chars += len(text)
+            if paste == 'always' or (pacer is None and kb.should_paste(text)):
+                kb.paste(text)
+            else:
+                kb.play(kb.compile(text), pacer=pacer)
+        elif isinstance(source, str):
+            self.chars += len(source)
+            kb.play(kb.compile(source), pacer=pacer)
+        else:
+            from .stream import read_chunks, type_stream
+            counted = self._count(read_chunks(source, encoding))
+            type_stream(kb, counted, pacer=pacer)
+
+    def _count(self, chunks):
+        for chunk in chunks:
+            self.chars += len(chunk)
+            yield chunk
+
+    def script(self, script, delay=0.0, rate=None, adaptive=False):
+        kb = self.open()
+        self.chars += len(script)
+        kb.play(kb.compile(_plan.parse(script)), pacer=self._pacer(kb, delay, rate, adaptive))
+
+    def group(self, keys):
+        kb = self.open()
+        kb.play(kb.compile(tuple(keys)))
+
+    def stats(self):
+        """Run totals, with the counters and latencies of every KeyBoard opened"""
+        from . import metrics
+        data = metrics.Metrics()
+        for keyboard in self.retired + [self.keyboard]:
+            if keyboard is not None and keyboard.metrics is not None:
+                data.merge(keyboard.metrics)
+        result = {
+            "jobs": self.jobs,
+            "errors": self.errors,
+            "chars": self.chars,
+            "elapsed": time.perf_counter() - self.started,
+        }
+        result.update(data.snapshot())
+        return result
+
+    def close(self):
+        if self.keyboard is not None:
+            self.keyboard.close()
+
+
+def _job(runner, line, args):
+    """Run one --serve line"""
+    if line.startswith('{'):
+        try:
+            job = json.loads(line)
+        except ValueError:
+            job = None
+        if isinstance(job, dict):
+            keys = job.get('keys')
+            if keys:
+                runner.group(_plan.chord(keys) if isinstance(keys, str) else keys)
+            if job.get('script'):
+                runner.script(job['script'], job.get('delay', args.delay), job.get('rate', args.rate),
+                              job.get('adaptive', args.adaptive))
+            if job.get('text'):
+                runner.type(job['text'], job.get('delay', args.delay), job.get('rate', args.rate),
+                            job.get('adaptive', args.adaptive), job.get('paste', args.paste))
+            return
+    if args.script:
+        runner.script(line, args.delay, args.rate, args.adaptive)
+    else:
+        runner.type(line, args.delay, args.rate, args.adaptive, args.paste)
+
+
+def _serve(runner, args, stdin, stdout):
+    for number, line in enumerate(stdin, 1):
+        line = line.rstrip('\r\n')
+        if not line:
+            continue
+        runner.jobs += 1
+        try:
+            _job(runner, line, args)
+            reply = {"job": number, "ok": True}
+        except Exception as ex:
+            runner.errors += 1
+            reply = {"job": number, "ok": False, "error": "%s: %s" % (type(ex).__name__, ex)}
+        stdout.write(json.dumps(reply) + '\n')
+        stdout.flush()
+
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    runner = _Runner(args.display)
+    status = 0
+    try:
+        if args.serve:
+            _serve(runner, args, sys.stdin, sys.stdout)
+        elif args.keys:
+            specs = args.text
+            if not specs:
+                with _open(args.file) as stream:
+                    specs = [line.decode(args.encoding).strip() for line in stream]
+            for spec in filter(None, specs):
+                runner.jobs += 1
+                runner.group(_plan.chord(spec))
+        elif args.script:
+            runner.jobs += 1
+            if args.text and not args.file:
+                script = ' '.join(args.text)
+            else:
+                with _open(args.file) as stream:
+                    script = stream.read().decode(args.encoding)
+            runner.script(script, args.delay, args.rate, args.adaptive)
+        elif args.text and not args.file:
+            runner.jobs += 1
+            runner.type(' '.join(args.text), args.delay, args.rate, args.adaptive, args.paste)
+        else:
+            runner.jobs += 1
+            with _open(args.file) as stream:
+                runner.type(stream, args.delay, args.rate, args.adaptive, args.paste, args.encoding)
+    except KeyboardInterrupt:
+        status = 130
+    except Exception as ex:
+        runner.errors += 1
+        sys.stderr.write("libkeyboard: %s: %s\n" % (type(ex).__name__, ex))
+        status = 1
+    finally:
+        try:
+            runner.close()
+        finally:
+            if args.stats:
+                sys.stderr.write(json.dumps(runner.stats()) + '\n')
+    return status
+
+
+def _open(path):
+    """Binary stream of path, stdin (left open) for None or -"""
+    if path in (None, '-'):
+        return contextlib.nullcontext(sys.stdin.buffer)
+    return open(path, 'rb')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
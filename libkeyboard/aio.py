@@ -0,0 +1,278 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+asyncio front end.
+Typing jobs are paced with event loop timers instead of time.sleep(), and on X the replies
+and errors they wait for are read when the connection's socket becomes readable, so many
+concurrent jobs run on the loop's thread without blocking it.
+"""
+
+import asyncio
+import sys
+import weakref
+
+from .keyboard import _plan
+from .pacing import Pacer, AdaptivePacer
+
+if sys.platform == 'win32':
+    from .keyboard.windows import KeyBoard
+else:
+    import Xlib.protocol.request
+    from .keyboard.linux import KeyBoard
+    from .util.xorg import X11Error
+
+
+class _Job(object):
+    """One typing job running on an AsyncKeyBoard"""
+
+    def __init__(self, keyboard, batch):
+        self.batch = batch                          # Backend batch the job's events are queued on
+        self.state = keyboard._session_state()      # Pressed-key state of this job
+        self.synced = 0                             # batch.count at the last round trip
+
+
+class AsyncKeyBoard(object):
+    """
+    KeyBoard driven from an asyncio event loop.
+    Jobs started on the same AsyncKeyBoard share its connection and run concurrently,
+    interleaved between characters; each keeps its own pressed-key state, like pooled sessions.
+    Characters missing from the layout are still registered with blocking requests, once,
+    when a text is compiled.
+    :param display: Display name such as ":1", None for $DISPLAY
+    :param loop: Event loop, the running loop by default
+    :param keyboard: Existing KeyBoard to drive instead of opening a new one
+    """
+
+    def __init__(self, display=None, loop=None, keyboard=None):
+        self.keyboard = keyboard if keyboard is not None else KeyBoard(display)
+        self._loop = weakref.ref(loop or asyncio.get_running_loop())
+        self.closed = False
+        self._jobs = set()          # Running _Job
+        self._waiters = []          # (request, future) of the sync() calls waiting for their reply
+        self._fd = self.keyboard.backend.fileno()     # X connection to watch, None when no server replies
+        if self._fd is not None:
+            self.loop.add_reader(self._fd, self._on_readable)
+
+    @property
+    def loop(self):
+        return self._loop()
+
+    def __getattr__(self, name):
+        return getattr(self.keyboard, name)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self._fd is not None and self.loop is not None:
+            self.loop.remove_reader(self._fd)
+        for request, waiter in self._waiters:
+            waiter.cancel()
+        self._waiters = []
+        self.keyboard.close()
+
+    def _on_readable(self):
+        try:
+            self.keyboard._poll_mapping_notify()        # Reads replies, errors and events off the socket
+        except Exception as ex:                         # Connection lost
+            self.loop.remove_reader(self._fd)
+            waiters, self._waiters = self._waiters, []
+            for request, waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(ex)
+            return
+        waiters, self._waiters = self._waiters, []
+        for request, waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _wake_answered(self):
+        """
+        Wake the sync() calls whose reply a blocking call of the KeyBoard (e.g. polling the mapping
+        changes) has already read off the socket: the socket will not become readable for them.
+        """
+        waiting = []
+        for request, waiter in self._waiters:
+            if request._data is None and request._error is None:
+                waiting.append((request, waiter))
+            elif not waiter.done():
+                waiter.set_result(None)
+        self._waiters = waiting
+
+    def _handler(self, error, request):
+        # Errors of requests no job recorded (e.g. registrations) are ignored, as inside KeyBoard.batch()
+        for job in self._jobs:
+            index = job.batch.serials.get(error.sequence_number)
+            if index is not None:
+                job.batch.errors.append((index, error))
+                return
+
+    async def sync(self):
+        """
+        Wait until the server has processed every request sent so far, without blocking the loop.
+        :return: The GetInputFocus reply of the round trip, None when there is no server to wait for
+        """
+        if self._fd is None:
+            return None
+        request = Xlib.protocol.request.GetInputFocus(display=self.keyboard.backend.connection.display, defer=True)
+        self.keyboard.flush()
+        while request._data is None and request._error is None:
+            waiter = self.loop.create_future()
+            self._waiters.append((request, waiter))
+            await waiter
+        request.reply()         # Already answered, only raises the request's error if any
+        return request
+
+    def _new_batch(self):
+        if self._fd is None:
+            return self.keyboard._new_batch()
+        return self.keyboard.backend.batch(blocking=False)
+
+    def _run_step(self, job, events=None, units=None):
+        """Queue the events of one character or chord of a job"""
+        keyboard = self.keyboard
+        if self._fd is not None:
+            keyboard.backend.connection.set_error_handler(self._handler)     # Blocking requests restore the default one
+        keyboard._batch = job.batch
+        try:
+            if units is None:
+                keyboard._send_plan_events(events)
+            else:
+                with keyboard._swap_state(job.state):
+                    keyboard._type_units(units)
+        finally:
+            keyboard._batch = None
+            self._wake_answered()
+
+    async def _sync_job(self, job):
+        job.batch.flush()
+        await self.sync()
+        if self._fd is not None:
+            job.synced = job.batch.count
+            job.batch.serials.clear()
+            if job.batch.errors:
+                raise X11Error(job.batch.errors)
+
+    def compile(self, source, cache=True):
+        """KeyBoard.compile(), blocking: characters missing from the layout are registered now"""
+        try:
+            return self.keyboard.compile(source, cache)
+        finally:
+            self._wake_answered()
+
+    async def play(self, plan, delay=0.0, pacer=None):
+        """
+        Send a compiled plan, pacing characters with loop timers.
+        A plan made stale by a keyboard mapping change is compiled again from the next character on.
+        :param plan: KeyPlan from compile()
+        :param delay: Interval between two characters or chords, in seconds
+        :param pacer: Pacer scheduling each character or chord, instead of delay.
+                      Its deadlines are awaited with loop timers, without spinning
+        :return: The pacer when the plan was paced, see Pacer.stats()
+        """
+        if pacer is None and delay > 0:
+            pacer = Pacer(delay)
+        keyboard = self.keyboard
+        job = _Job(keyboard, self._new_batch())
+        self._jobs.add(job)
+        try:
+            if self._fd is not None:
+                job.batch.focus = (await self.sync()).focus
+            steps = _plan.steps(plan.units)
+            position = start = 0
+            while position < len(steps):
+                if plan.generation is not None and plan.generation != keyboard.keymap_generation:
+                    plan = self.compile(_plan.Script(tuple(unit for step in steps[position:] for unit in step)))
+                    steps = _plan.steps(plan.units)
+                    position = start = 0
+                    continue
+                end = plan.marks[position]
+                if pacer is not None:
+                    remaining = pacer.next() - pacer.clock.now()
+                    if remaining > 0:
+                        await asyncio.sleep(remaining)
+                    pacer.mark()
+                    if pacer.due():         # Delivery round trip, see AdaptivePacer
+                        probe = pacer.clock.now()
+                        job.batch.flush()
+                        await self.sync()
+                        pacer.observe(pacer.clock.now() - probe)
+                if plan.generation is None:     # Too many distinct characters to keep registered, type it live
+                    self._run_step(job, units=steps[position])
+                else:
+                    self._run_step(job, events=plan.events[start:end])
+                start = end
+                position += 1
+                if self._fd is not None and job.batch.count - job.synced >= job.batch.window:
+                    await self._sync_job(job)
+                if pacer is not None:
+                    job.batch.flush()
+            await self._sync_job(job)
+        finally:
+            self._jobs.discard(job)
+        return pacer
+
+    async def write(self, text, delay=0.0, pacer=None, adaptive=False):
+        """
+        Type text.
+        :param text: String to type
+        :param delay: Delay between keystrokes in seconds
+        :param pacer: Pacer scheduling each character, instead of delay
+        :param adaptive: Find the fastest rate the focused application keeps up with, see AdaptivePacer
+        :return: The pacer when typing was paced, see Pacer.stats()
+        """
+        if adaptive and pacer is None:
+            pacer = AdaptivePacer(target=self.keyboard.target_class())
+        return await self.play(self.compile(text), delay, pacer)
+
+    async def group(self, *keys):
+        """
+        Press a key combination (e.g. ctrl+c).
+        :param keys: Keys to press together, the last one is pressed and released while the others are held
+        """
+        if keys:
+            await self.play(self.compile(tuple(keys)))
+
+
+_shared = weakref.WeakKeyDictionary()       # {loop: {display: AsyncKeyBoard}}
+
+
+def shared(display=None):
+    """AsyncKeyBoard of display on the running loop, opened on first use and kept for later calls"""
+    loop = asyncio.get_running_loop()
+    keyboards = _shared.setdefault(loop, {})
+    keyboard = keyboards.get(display)
+    if keyboard is None or keyboard.closed:
+        keyboard = keyboards[display] = AsyncKeyBoard(display, loop)
+    return keyboard
+
+
+async def async_keyboard_write(text, delay=0.0, display=None, pacer=None, adaptive=False):
+    """
+    Simulate typing text without blocking the event loop.
+    :param text: String to type
+    :param delay: Delay between keystrokes in seconds
+    :param display: Display to type on, None for the default display
+    :param pacer: Pacer scheduling each character, instead of delay
+    :param adaptive: Find the fastest rate the focused application keeps up with, see AdaptivePacer
+    :return: The pacer when typing was paced, see Pacer.stats()
+    """
+    return await shared(display).write(text, delay, pacer, adaptive)
+
+
+async def async_keyboard_group(*keys, display=None):
+    """
+    Simulate a key combination (e.g. ctrl+c) without blocking the event loop.
+    :param keys: Sequence of keys to press together.
+                 The last key is pressed and released while others are held down.
+    :param display: Display to type on, None for the default display
+    """
+    await shared(display).group(*keys)
@@ -0,0 +1,171 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+Typing on many displays in parallel.
+A Dispatcher runs one worker per display, a thread or a process, each with its own
+KeyBoard (and so its own connection and keymap tables). Jobs are queued per display and
+answered with futures; submitting blocks while a display already has max_pending jobs,
+so a fast producer cannot pile up unbounded work in front of a slow server.
+"""
+
+import concurrent.futures
+import functools
+import queue
+import sys
+import threading
+
+from .pool import SessionPool
+
+if sys.platform == 'win32':
+    from .keyboard.windows import KeyBoard
+else:
+    from .keyboard.linux import KeyBoard
+
+
+class _Worker(object):
+    """Executor of one display and its bound on pending jobs"""
+
+    def __init__(self, executor, max_pending):
+        self.executor = executor
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.pending = set()        # Futures of the jobs queued or running
+
+
+class Dispatcher(object):
+    """
+    One typing worker per display.
+    :param displays: Display names, e.g. [":1", ":2"]
+    :param processes: Run the workers in processes instead of threads, so typing does not share the GIL
+    :param max_pending: Number of jobs queued or running per display before submit() blocks
+    :param factory: Callable taking a display name and returning a new KeyBoard.
+                    With processes it must be picklable (e.g. a class or a module level function)
+    :param mp_context: multiprocessing context of the worker processes, spawn by default so that
+                       no X connection of this process is inherited
+    """
+
+    def __init__(self, displays, processes=False, max_pending=64, factory=None, mp_context=None):
+        self.displays = list(displays)
+        if not self.displays:
+            raise ValueError("No display to dispatch to")
+        self.processes = processes
+        self.max_pending = max_pending
+        self.factory = factory or KeyBoard
+        self.mp_context = mp_context
+        self.closed = False
+        self._lock = threading.Lock()
+        self._pool = None if processes else SessionPool(factory=self.factory)
+        self._workers = {display: self._new_worker() for display in self.displays}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _new_worker(self):
+        if self.processes:
+            import multiprocessing      # Only process workers need it, and it is slow to import
+            executor = concurrent.futures.ProcessPoolExecutor(
+                1, mp_context=self.mp_context or multiprocessing.get_context('spawn'),
+                initializer=_init_process, initargs=(self.factory,))
+        else:
+            executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix='libkeyboard')
+        return _Worker(executor, self.max_pending)
+
+    def pending(self, display):
+        """Number of jobs queued or running on display"""
+        return len(self._workers[display].pending)
+
+    def submit(self, source, display=None, delay=0.0, pacer=None, timeout=None):
+        """
+        Queue a typing job on the worker of display, blocking while it has max_pending jobs.
+        :param source: Text, chord or list of both, see KeyBoard.compile()
+        :param display: One of displays, None for the one with the fewest pending jobs
+        :param delay: Interval between two characters or chords, in seconds
+        :param pacer: Pacer scheduling each character or chord, instead of delay
+        :param timeout: Seconds to wait for room, None to wait as long as needed
+        :return: concurrent.futures.Future of what KeyBoard.play() returns
+        :raise queue.Full: When display still has max_pending jobs after timeout
+        """
+        if self.closed:
+            raise RuntimeError("Dispatcher is closed")
+        if display is None:
+            display = min(self.displays, key=self.pending)
+        worker = self._workers[display]
+        if not worker.slots.acquire(timeout=timeout):
+            raise queue.Full("%d jobs already pending on %s" % (self.max_pending, display))
+        try:
+            if self.processes:
+                future = worker.executor.submit(_process_job, display, source, delay, pacer)
+            else:
+                future = worker.executor.submit(self._thread_job, display, source, delay, pacer)
+        except BaseException:
+            worker.slots.release()
+            raise
+        with self._lock:
+            worker.pending.add(future)
+        future.add_done_callback(functools.partial(self._done, worker))
+        return future
+
+    def _done(self, worker, future):
+        with self._lock:
+            worker.pending.discard(future)
+        worker.slots.release()
+
+    def _thread_job(self, display, source, delay, pacer):
+        with self._pool.acquire(display) as kb:
+            return kb.play(kb.compile(source), delay, pacer)
+
+    def write(self, text, display=None, delay=0.0, pacer=None, timeout=None):
+        """Queue typing text, see submit()"""
+        return self.submit(text, display, delay, pacer, timeout)
+
+    def group(self, *keys, display=None, timeout=None):
+        """Queue a key combination (e.g. ctrl+c), see submit()"""
+        return self.submit(tuple(keys), display, timeout=timeout)
+
+    def join(self, display=None, timeout=None):
+        """
+        Wait for the pending jobs of display, or of every display.
+        :return: (done, not_done) sets of futures, like concurrent.futures.wait()
+        """
+        with self._lock:
+            workers = [self._workers[display]] if display is not None else list(self._workers.values())
+            futures = set().union(*(worker.pending for worker in workers))
+        return concurrent.futures.wait(futures, timeout)
+
+    def close(self, wait=True):
+        """
+        Stop the workers and close their keyboards.
+        :param wait: Finish the pending jobs first, else cancel the ones not started yet
+        """
+        if self.closed:
+            return
+        self.closed = True
+        for worker in self._workers.values():
+            if not wait:
+                with self._lock:
+                    futures = list(worker.pending)
+                for future in futures:      # Running jobs cannot be cancelled, they finish first
+                    future.cancel()
+            if self._pool is not None:      # A KeyBoard is closed on the thread using it, after its last job
+                worker.executor.submit(self._pool.close_thread)
+            worker.executor.shutdown(wait=wait)
+
+
+_process_pool = None        # SessionPool of a worker process, see _init_process()
+
+
+def _init_process(factory):
+    import multiprocessing.util
+    global _process_pool
+    _process_pool = SessionPool(factory=factory)
+    # Worker processes leave through os._exit(), where atexit handlers do not run
+    multiprocessing.util.Finalize(None, _process_pool.close, exitpriority=10)
+
+
+def _process_job(display, source, delay, pacer):
+    with _process_pool.acquire(display) as kb:
+        return kb.play(kb.compile(source), delay, pacer)
@@ -7,6 +7,7 @@
 
 import six
 import enum
+import threading
 import unicodedata
 
 
@@ -14,31 +15,56 @@ class KeyCode(object):
     """
     A :class:`KeyCode` represents the description of a key code used by the
     operating system.
+
+    Key codes are interned immutable values: describing the same key twice returns the
+    same object, so equal keys usually compare by identity, and the hash is computed once.
+    Each one is numbered by a small int, key_id, see from_id().
     """
     #: The names of attributes used as platform extensions.
-    _PLATFORM_EXTENSIONS = []
+    _PLATFORM_EXTENSIONS = ()
 
-    def __init__(self, vk=None, char=None, is_dead=False, **kwargs):
-        self.vk = vk
-        self.char = six.text_type(char) if char is not None else None
-        self.is_dead = is_dead
+    __slots__ = ('vk', 'char', 'is_dead', 'combining', 'key_id', '_ident', '_hash')
 
-        if self.is_dead:
+    def __new__(cls, vk=None, char=None, is_dead=False, **kwargs):
+        char = six.text_type(char) if char is not None else None
+        extensions = tuple(kwargs.pop(key, None) for key in cls._PLATFORM_EXTENSIONS)
+        if kwargs:
+            raise ValueError(kwargs)
+        return _intern(cls, vk, char, is_dead, extensions)
+
+    def _setup(self, vk, char, is_dead, extensions):
+        """Fill a new instance, only called by _intern()"""
+        combining = None
+        if is_dead:
             try:
-                self.combining = unicodedata.lookup(
-                    'COMBINING ' + unicodedata.name(self.char))
+                combining = unicodedata.lookup('COMBINING ' + unicodedata.name(char))
             except KeyError:
-                self.is_dead = False
-                self.combining = None
-            if self.is_dead and not self.combining:
+                is_dead = False
+            if is_dead and not combining:
                 raise KeyError(char)
-        else:
-            self.combining = None
+        set_field = object.__setattr__
+        set_field(self, 'vk', vk)
+        set_field(self, 'char', char)
+        set_field(self, 'is_dead', is_dead)
+        set_field(self, 'combining', combining)
+        for key, value in zip(self._PLATFORM_EXTENSIONS, extensions):
+            set_field(self, key, value)
+        set_field(self, '_hash', hash(self._identity()))
+
+    def _identity(self):
+        """Value the hash is computed from, the same for keys that compare equal"""
+        if self.char is not None:
+            return self.char
+        return (self.vk,) + tuple(getattr(self, f) for f in self._PLATFORM_EXTENSIONS)
 
-        for key in self._PLATFORM_EXTENSIONS:
-            setattr(self, key, kwargs.pop(key, None))
-        if kwargs:
-            raise ValueError(kwargs)
+    def __setattr__(self, name, value):
+        raise AttributeError("KeyCode is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("KeyCode is immutable")
+
+    def __reduce__(self):
+        return _intern, self._ident
 
     def __repr__(self):
         if self.is_dead:
@@ -52,6 +78,8 @@ class KeyCode(object):
         return repr(self)
 
     def __eq__(self, other):
+        if self is other:
+            return True
         if not isinstance(other, self.__class__):
             return False
         if self.char is not None and other.char is not None:
@@ -61,8 +89,11 @@ class KeyCode(object):
                 getattr(self, f) == getattr(other, f)
                 for f in self._PLATFORM_EXTENSIONS)
 
+    def __ne__(self, other):
+        return not self == other
+
     def __hash__(self):
-        return hash(repr(self))
+        return self._hash
 
     @classmethod
     def from_vk(cls, vk, **kwargs):
@@ -76,100 +107,129 @@ class KeyCode(object):
         """
         return cls(vk=vk, **kwargs)
 
+    @staticmethod
+    def from_id(key_id):
+        """The key code numbered key_id"""
+        return _by_id[key_id]
+
+
+_interned = {}      # {(class, vk, char, is_dead, extensions): KeyCode}
+_by_id = []         # KeyCodes by key_id
+_intern_lock = threading.Lock()
+
+
+def _intern(cls, vk, char, is_dead, extensions):
+    """The KeyCode of cls described by the arguments, made on first use"""
+    ident = (cls, vk, char, is_dead, extensions)
+    key = _interned.get(ident)
+    if key is not None:
+        return key
+    with _intern_lock:
+        key = _interned.get(ident)
+        if key is None:
+            key = object.__new__(cls)
+            key._setup(vk, char, is_dead, extensions)
+            object.__setattr__(key, '_ident', ident)
+            object.__setattr__(key, 'key_id', len(_by_id))
+            _by_id.append(key)
+            _interned[ident] = key
+    return key
+
 
 class Key(enum.Enum):
+    """Named keys. A value is its member's name, the platform code of a key is looked up in the key index (see _names)"""
 
-    alt = 0
-    alt_l = 0
-    alt_r = 0
-    alt_gr = 0
+    alt = 'alt'
+    alt_l = 'alt_l'
+    alt_r = 'alt_r'
+    alt_gr = 'alt_gr'
 
-    backspace = 0
+    backspace = 'backspace'
 
-    caps_lock = 0
+    caps_lock = 'caps_lock'
 
-    cmd = 0
-    cmd_l = 0
-    cmd_r = 0
+    cmd = 'cmd'
+    cmd_l = 'cmd_l'
+    cmd_r = 'cmd_r'
 
-    ctrl = 0
-    ctrl_l = 0
-    ctrl_r = 0
+    ctrl = 'ctrl'
+    ctrl_l = 'ctrl_l'
+    ctrl_r = 'ctrl_r'
 
-    delete = 0
+    delete = 'delete'
 
 
 
-    end = 0
+    end = 'end'
 
-    enter = 0
+    enter = 'enter'
 
-    esc = 0
+    esc = 'esc'
 
-    f1 = 0
-    f2 = 0
-    f3 = 0
-    f4 = 0
-    f5 = 0
-    f6 = 0
-    f7 = 0
-    f8 = 0
-    f9 = 0
-    f10 = 0
-    f11 = 0
-    f12 = 0
-    f13 = 0
-    f14 = 0
-    f15 = 0
-    f16 = 0
-    f17 = 0
-    f18 = 0
-    f19 = 0
-    f20 = 0
+    f1 = 'f1'
+    f2 = 'f2'
+    f3 = 'f3'
+    f4 = 'f4'
+    f5 = 'f5'
+    f6 = 'f6'
+    f7 = 'f7'
+    f8 = 'f8'
+    f9 = 'f9'
+    f10 = 'f10'
+    f11 = 'f11'
+    f12 = 'f12'
+    f13 = 'f13'
+    f14 = 'f14'
+    f15 = 'f15'
+    f16 = 'f16'
+    f17 = 'f17'
+    f18 = 'f18'
+    f19 = 'f19'
+    f20 = 'f20'
 
-    up = 0
-    down = 0
-    left = 0
-    right = 0
-    home = 0
+    up = 'up'
+    down = 'down'
+    left = 'left'
+    right = 'right'
+    home = 'home'
 
 
-    page_down = 0
+    page_down = 'page_down'
 
-    page_up = 0
+    page_up = 'page_up'
 
 
-    shift = 0
+    shift = 'shift'
 
-    shift_l = 0
+    shift_l = 'shift_l'
 
-    shift_r = 0
+    shift_r = 'shift_r'
 
-    space = 0
+    space = 'space'
 
-    tab = 0
+    tab = 'tab'
 
 
-    media_play_pause = 0
+    media_play_pause = 'media_play_pause'
 
-    media_volume_mute = 0
+    media_volume_mute = 'media_volume_mute'
 
-    media_volume_down = 0
+    media_volume_down = 'media_volume_down'
 
-    media_volume_up = 0
+    media_volume_up = 'media_volume_up'
 
-    media_previous = 0
+    media_previous = 'media_previous'
 
-    media_next = 0
+    media_next = 'media_next'
 
-    insert = 0
+    insert = 'insert'
 
-    menu = 0
+    menu = 'menu'
 
-    num_lock = 0
+    num_lock = 'num_lock'
 
-    pause = 0
+    pause = 'pause'
 
-    print_screen = 0
+    print_screen = 'print_screen'
 
-    scroll_lock = 0
+    scroll_lock = 'scroll_lock'
@@ -0,0 +1,409 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+Front end shared by every KeyBoard.
+It tracks pressed keys and modifiers, batches events, compiles and plays plans, and hands
+the resolved events to a backend (see backend.py). Subclasses only say how a key resolves
+on their platform: key_to_keysym() names it, _resolve() turns it into events.
+"""
+
+import contextlib
+import itertools
+import time
+from ..keyboard import NORMAL_MODIFIERS
+from ..pacing import Pacer
+from .. import metrics as _metrics
+from . import _plan
+from . import _names
+
+_generations = itertools.count()     # Mapping generations, unique across KeyBoards
+
+
+class KeyBoardBase(object):
+    plan_cache_size = 256   # Number of compiled plans kept per KeyBoard
+    key_index = None        # {key name or character: KeyName} Built once per class, see _names
+
+    def __init__(self, backend):
+        """
+        A KeyBoard is not thread-safe: use one per thread, or share a Sender.
+        :param backend: Backend the resolved events are delivered to
+        """
+        cls = type(self)
+        if cls.__dict__.get('key_index') is None:
+            cls.key_index = _names.build(cls._key_code, cls._key_names(), cls.char_to_keysym)
+        self.backend           = backend
+        self.event_mapping     = {}      # {keysym: number of times pressed} Keys held, in the order they were first pressed
+        self.release_events    = {}      # {keysym: events releasing it} Recorded when the key was first pressed
+        self.modifiers         = set()
+        self.modifier_state    = 0       # Platform state mask of the modifiers held, updated when one is pressed or released
+        self.closed            = False
+        self.keymap_generation = next(_generations)    # Renewed every time the keyboard mapping changes, see _new_generation
+        self._batch            = None    # Backend batch while inside batch()
+        self._recording        = None    # List collecting resolved events while compiling a plan
+        self._plans            = _plan.PlanCache(self.plan_cache_size)
+        self.metrics           = _metrics.new()    # Counters and latency histograms, None when disabled
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        try:
+            if self.closed is False:
+                self.close()
+        except Exception:
+            pass
+
+    @contextlib.contextmanager
+    def batch(self, window=None):
+        """
+        Queue events instead of delivering them one key at a time.
+        They are submitted, and waited for, once when the block ends; see the backend for
+        how errors are reported. Nested batches join the outermost one.
+        :param window: Number of events between two submissions, None to submit only at the end
+        """
+        if self._batch is not None:
+            yield self._batch
+            return
+        self._poll_mapping_notify()
+        with self._new_batch(window) as self._batch:
+            try:
+                yield self._batch
+            finally:
+                self._batch = None
+                if self.metrics is not None:
+                    self.metrics.count('batches')
+
+    def _new_batch(self, window=None):
+        return self.backend.batch(window)
+
+    def _emit(self, events):
+        """Deliver resolved events: record them while compiling, queue them inside a batch, else send them now"""
+        if self._recording is not None:
+            self._recording.extend(events)
+            return
+        metrics = self.metrics
+        if self._batch is not None:
+            self._batch.send(events)
+        elif metrics is None:
+            self.backend.send(events)
+        else:
+            start = time.perf_counter()
+            self.backend.send(events)
+            metrics.observe('send', time.perf_counter() - start)
+            metrics.count('sends')
+        if metrics is not None:
+            metrics.count('events', len(events))
+
+    def flush(self):
+        """Submit the events queued by batch() so far, without waiting"""
+        if self._batch is not None:
+            self._batch.flush()
+        else:
+            self.backend.flush()
+
+    def sync(self):
+        """Wait until the backend has processed every event submitted"""
+        if self.metrics is not None:
+            self.metrics.count('syncs')
+        with _metrics.timer(self.metrics, 'sync'):
+            self.backend.sync()
+
+    def stats(self):
+        """Counters and latency histograms of this KeyBoard (see metrics.py), None when metrics are disabled"""
+        if self.metrics is None:
+            return None
+        return self.metrics.snapshot()
+
+    def _session_state(self):
+        """Empty pressed-key state, used by pooled sessions sharing this KeyBoard"""
+        return {"event_mapping": {}, "release_events": {}, "modifiers": set(), "modifier_state": 0}
+
+    @contextlib.contextmanager
+    def _swap_state(self, state):
+        """Use the pressed-key state in state (see _session_state) for the duration of the block, then store it back"""
+        saved = {name: getattr(self, name) for name in state}
+        self.__dict__.update(state)
+        try:
+            yield self
+        finally:
+            for name in state:
+                state[name] = getattr(self, name)
+            self.__dict__.update(saved)
+
+    def compile(self, source, cache=True):
+        """
+        Resolve text or chords once into a KeyPlan that play() sends without any lookups.
+        Characters missing from the layout are registered now. Recent plans are cached
+        per keyboard mapping generation.
+        :param source: Text to type, a tuple of keys to press together (e.g. ("ctrl", "c")),
+                       a list mixing both, or a Script (see parse_script)
+        :param cache: Look the plan up in the cache and keep it there; False for text typed only once
+        :return: KeyPlan
+        """
+        units = _plan.units(source)
+        self._poll_mapping_notify()
+        plan = self._plans.get((units, self.keymap_generation)) if cache else None
+        if self.metrics is not None:
+            self.metrics.count('plan_misses' if plan is None else 'plan_hits')
+        if plan is not None:
+            return plan
+        with _metrics.timer(self.metrics, 'compile'):
+            return self._compile(source, units, cache)
+
+    def _compile(self, source, units, cache=True):
+        self.prepare(''.join(payload for kind, payload in units if kind == _plan.TEXT))
+        generation = self.keymap_generation
+        events, marks = [], []
+        with self._swap_state(self._session_state()):
+            self._recording = events
+            try:
+                self._type_units(units, marks=marks)
+            finally:
+                self._recording = None
+
+        if self.keymap_generation != generation:        # Slots were recycled while resolving
+            return _plan.KeyPlan(source, units, tuple(events), tuple(marks), None)
+        plan = _plan.KeyPlan(source, units, tuple(events), tuple(marks), generation)
+        if cache:
+            self._plans.put((units, generation), plan)
+        return plan
+
+    def play(self, plan, delay=0.0, pacer=None):
+        """
+        Send a compiled plan. A plan resolved against an older keyboard mapping is compiled again first.
+        :param plan: KeyPlan from compile()
+        :param delay: Interval between two characters or chords, in seconds
+        :param pacer: Pacer scheduling each character or chord, instead of delay
+        :return: The pacer when the plan was paced, see Pacer.stats()
+        """
+        if pacer is None and delay > 0:
+            pacer = Pacer(delay)
+        self._poll_mapping_notify()
+        if plan.generation is not None and plan.generation != self.keymap_generation:
+            plan = self.compile(plan.source)
+        with _metrics.timer(self.metrics, 'play'), self.batch():
+            if plan.generation is None:     # Too many distinct characters to keep registered, type it live
+                self._type_units(plan.units, pacer)
+            elif pacer is not None:
+                start = 0
+                for end in plan.marks:
+                    self._wait(pacer)
+                    self._send_plan_events(plan.events[start:end])
+                    self.flush()
+                    start = end
+            else:
+                self._send_plan_events(plan.events)
+        return pacer
+
+    def _send_plan_events(self, events):
+        """Send events of a compiled plan as they are"""
+        self._emit(events)
+
+    def _type_units(self, units, pacer=None, marks=None):
+        """
+        Press and release the characters and chords of normalized units (see _plan.units)
+        :param pacer: Pacer scheduling each character, chord or held or released key
+        :param marks: List receiving the number of recorded events after each step
+        """
+        for kind, payload in units:
+            if kind == _plan.TEXT:
+                steps = (((char, True), (char, False)) for char in payload)
+            elif kind == _plan.CHORD:
+                steps = [_plan.chord_steps(payload)]
+            else:
+                steps = [((payload, kind == _plan.DOWN),)]
+            for step in steps:
+                if pacer is not None:
+                    self._wait(pacer)
+                for key, is_press in step:
+                    if is_press:
+                        self.press(key, register=kind == _plan.TEXT)
+                    else:
+                        self.release(key)
+                if marks is not None:
+                    marks.append(len(self._recording))
+                if pacer is not None:
+                    self.flush()
+
+    def _wait(self, pacer):
+        """Wait for the next mark of pacer, observed as the pace_wait operation"""
+        if self.metrics is None:
+            pacer.wait()
+            return
+        start = time.perf_counter()
+        pacer.wait()
+        self.metrics.observe('pace_wait', time.perf_counter() - start)
+
+    def _new_generation(self):
+        """Make the plans compiled so far stale: a generation is never reused, even by another KeyBoard"""
+        self.keymap_generation = next(_generations)
+
+    def _poll_mapping_notify(self):
+        """Take in the keyboard mapping changes made by other clients, bumping keymap_generation"""
+
+    def key_to_keysym(self, key):
+        """
+        Name key on the platform
+        :return: KeyName (Key member when key names one, keysym identifying key while it is held)
+        """
+        entry = self.key_index.get(key)
+        if entry is not None:
+            return entry
+        if len(key) == 1:       # Characters beyond Latin-1
+            return _names.KeyName(None, self.char_to_keysym(key))
+        entry = self.key_index.get(key.lower())     # Names in unusual case, e.g. "pgDn"
+        if entry is None:
+            self.pro_raise(KeyError(f"No such key '{key}'"))
+        return entry
+
+    @classmethod
+    def _key_code(cls, member):
+        """Keysym of a Key member on the platform, None when there is no such key"""
+        raise NotImplementedError
+
+    @classmethod
+    def _key_names(cls):
+        """{name: keysym} Key names of the platform table besides the Key members"""
+        return {}
+
+    @staticmethod
+    def char_to_keysym(char):
+        """Keysym of a character"""
+        raise NotImplementedError
+
+    def _resolve(self, key, _key, keysym, register):
+        """
+        Events pressing and releasing key, resolved against the current layout and modifiers
+        :param _key: Key member of key or None, see key_to_keysym()
+        :param register: Whether to register the key when the layout cannot type it
+        :return: (press events, release events)
+        :raise KeyError: When key cannot be typed (press() then closes the KeyBoard, see pro_raise)
+        """
+        raise NotImplementedError
+
+    def _pin(self, keysym):
+        """Called when keysym gets held"""
+
+    def _unpin(self, keysym):
+        """Called when keysym is released"""
+
+    def _update_modifiers(self, key, is_press):
+        """Record when key is ctrl, shift, alt, and update modifier_state"""
+        if NORMAL_MODIFIERS.get(key, None):
+            if is_press:
+                self.modifiers.add(key)
+            else:
+                self.modifiers.discard(key)
+            self.modifier_state = self._shift_statue(self.modifiers)
+
+    def _shift_statue(self, modifiers):
+        """State mask of the modifiers (Key members) on the platform"""
+        return 0
+
+    def press(self, key, register=False):
+        """
+        Press a key
+        :param key: Keyboard key
+        :param register: Whether to register the key when it does not exist. For security reasons, true only when writing()
+        """
+        if self._batch is None and self._recording is None:     # Batches and plans poll once for all their keys
+            self._poll_mapping_notify()
+        _key, keysym = self.key_to_keysym(key)
+        if _key is not None:
+            self._update_modifiers(_key, True)
+        try:
+            down, up = self._resolve(key, _key, keysym, register)
+        except KeyError as ex:
+            self.pro_raise(ex)
+        self._emit(down)
+        # Record event, the release events are kept so the key is released the way it was pressed
+        count = self.event_mapping.get(keysym, 0)
+        if not count:
+            self.release_events[keysym] = up
+        self.event_mapping[keysym] = count + 1
+        self._pin(keysym)
+
+    def release(self, key):
+        """Release a key"""
+        if self._batch is None and self._recording is None:
+            self._poll_mapping_notify()
+        _key, keysym = self.key_to_keysym(key)
+        if _key is not None:
+            self._update_modifiers(_key, False)
+        count = self.event_mapping.get(keysym, 0)
+        if count:
+            self._emit(self.release_events[keysym])
+            self._unpin(keysym)
+            if count == 1:
+                del self.event_mapping[keysym]
+                del self.release_events[keysym]
+            else:
+                self.event_mapping[keysym] = count - 1
+            return
+        try:
+            down, up = self._resolve(key, _key, keysym, False)
+        except KeyError:        # Neither held nor typable, nothing to release
+            return
+        self._emit(up)
+
+    def reset_keyboard(self):
+        """Reset keyboard, release all keys: last pressed first, every release event in one submission"""
+        events = []
+        for keysym in reversed(list(self.event_mapping)):
+            for _ in range(self.event_mapping[keysym]):
+                events.extend(self.release_events[keysym])
+                self._unpin(keysym)
+        self.event_mapping = {}
+        self.release_events = {}
+        self.modifiers.clear()
+        self.modifier_state = 0
+        if events:
+            self._emit(events)
+
+    def prepare(self, text):
+        """
+        Register ahead of time the characters of text the layout cannot type
+        :return: Number of keys registered
+        """
+        return 0
+
+    def clear_mapping(self):
+        """Clear all registered keys"""
+
+    def should_paste(self, text):
+        """Whether pasting text would beat typing it, see paste()"""
+        return False
+
+    def paste(self, text, selections=('CLIPBOARD',), chord=None, restore=True, timeout=2.0):
+        """Put text on the clipboard and press the paste chord, where the platform supports it"""
+        raise NotImplementedError("Pasting is not supported by %s" % type(self).__name__)
+
+    def target_class(self):
+        """Class of the window receiving the events, None if unknown"""
+        return None
+
+    def pro_raise(self, ex):
+        """Raise exception"""
+        self.close()
+        raise ex
+
+    def close(self):
+        try:
+            self.reset_keyboard()       # Release all keys
+        except Exception:
+            pass
+
+        try:
+            self.clear_mapping()        # Clear all registered keys
+        except Exception:
+            pass
+
+        self.closed = True
+        self.backend.close()
+        if self.metrics is not None:
+            self.metrics.retire()
@@ -0,0 +1,102 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+Key name index shared by every KeyBoard.
+Every accepted key name (Key members, their aliases, the key name table of the platform, each
+in lower, upper and capitalized case) and every Latin-1 character maps to a KeyName, so
+key_to_keysym() costs one dict lookup. The index is built once per KeyBoard class.
+"""
+
+import collections
+
+from ._base import Key
+
+# Other spellings of Key members: {alias: member name}
+ALIASES = {
+    'win':          'cmd',
+    'super':        'cmd',
+    'winleft':      'cmd_l',
+    'winright':     'cmd_r',
+    'ps':           'print_screen',
+    'printscreen':  'print_screen',
+    'print screen': 'print_screen',
+    'prtsc':        'print_screen',
+    'prtscr':       'print_screen',
+    'prntscrn':     'print_screen',
+    'pgdn':         'page_down',
+    'pagedown':     'page_down',
+    'pgup':         'page_up',
+    'pageup':       'page_up',
+    'del':          'delete',
+    'ins':          'insert',
+    'return':       'enter',
+    'escape':       'esc',
+    'control':      'ctrl',
+    'altgr':        'alt_gr',
+    'altleft':      'alt_l',
+    'altright':     'alt_r',
+    'ctrlleft':     'ctrl_l',
+    'ctrlright':    'ctrl_r',
+    'shiftleft':    'shift_l',
+    'shiftright':   'shift_r',
+    'capslock':     'caps_lock',
+    'numlock':      'num_lock',
+    'scrolllock':   'scroll_lock',
+    'apps':         'menu',
+    '\n':           'enter',
+    '\r':           'enter',
+    '\t':           'tab',
+    '\b':           'backspace',
+}
+
+# Characters resolved when the index is built, the others on each use
+LATIN1 = [chr(ordinal) for ordinal in range(0x20, 0x7f)] + [chr(ordinal) for ordinal in range(0xa0, 0x100)]
+
+
+class KeyName(collections.namedtuple('KeyName', 'key keysym')):
+    """
+    Resolved key name.
+    key:    Key member, None for characters and the other names of the platform table
+    keysym: Platform code identifying the key while it is held
+    """
+    __slots__ = ()
+
+
+def spellings(name):
+    """Spellings of a name accepted by the index: a character as it is, a name in any common case"""
+    if len(name) == 1:
+        return (name,)
+    return name, name.lower(), name.upper(), name.capitalize()
+
+
+def build(key_code, names, char_to_keysym):
+    """
+    Index of the key names of a platform.
+    :param key_code: Callable returning the keysym of a Key member, None when the platform has no such key
+    :param names: {name: keysym} Key name table of the platform
+    :param char_to_keysym: Callable returning the keysym of a character
+    :return: {name or character: KeyName}
+    """
+    index = {}
+
+    def add(name, entry):
+        for spelling in spellings(name):
+            index.setdefault(spelling, entry)
+
+    members = {}
+    for member in Key:
+        keysym = key_code(member)
+        if keysym is not None:
+            members[member.name] = KeyName(member, keysym)
+            add(member.name, members[member.name])
+    for alias, name in ALIASES.items():
+        if name in members:
+            add(alias, members[name])
+    for name, keysym in names.items():      # Names of the platform that are not Key members
+        if keysym is not None:
+            add(name, KeyName(None, keysym))
+    for char in LATIN1:
+        index.setdefault(char, KeyName(None, char_to_keysym(char)))
+    return index
@@ -0,0 +1,194 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+Compiled keystroke plans, see KeyBoard.compile() and KeyBoard.play().
+"""
+
+import collections
+import functools
+
+TEXT = 'text'       # Unit kind: every character is pressed and released in turn
+CHORD = 'chord'     # Unit kind: keys pressed together, the last one pressed and released while the others are held
+DOWN = 'down'       # Unit kind: one key pressed and left held
+UP = 'up'           # Unit kind: one key released
+
+
+class Script(collections.namedtuple('Script', 'units')):
+    """Parsed script or any normalized units, compiled as they are, see parse()"""
+    __slots__ = ()
+
+
+def units(source):
+    """
+    Normalize what can be compiled into a hashable tuple of (kind, payload) units.
+    :param source: A string to type, a tuple of keys to press together (a chord),
+                   a list mixing strings and chords, or a Script
+    """
+    if isinstance(source, Script):
+        return source.units
+    if isinstance(source, str):
+        return ((TEXT, source),)
+    if isinstance(source, tuple):
+        return ((CHORD, source),)
+    result = []
+    for part in source:
+        if isinstance(part, str):
+            result.append((TEXT, part))
+        elif isinstance(part, tuple):
+            result.append((CHORD, part))
+        else:
+            raise TypeError("Expected a string or a tuple of keys, got %r" % (part,))
+    return tuple(result)
+
+
+def chord_steps(keys):
+    """(key, is_press) steps of a chord: keys held in order, the last one tapped, then released in reverse"""
+    steps = [(key, True) for key in keys[:-1]]
+    steps += [(keys[-1], True), (keys[-1], False)]
+    steps += [(key, False) for key in reversed(keys[:-1])]
+    return steps
+
+
+def steps(units):
+    """Split units into the units of each typed character, chord or held or released key, matching KeyPlan.marks"""
+    result = []
+    for kind, payload in units:
+        if kind == TEXT:
+            result.extend(((TEXT, char),) for char in payload)
+        else:
+            result.append(((kind, payload),))
+    return result
+
+
+def chord(spec):
+    """'ctrl+shift+esc' -> ('ctrl', 'shift', 'esc'). A trailing '+' is the plus key itself, e.g. 'ctrl++'"""
+    head = spec.rstrip('+')
+    keys = [key.strip() for key in head.split('+') if key.strip()] if head else []
+    if spec.endswith('+'):
+        keys.append('+')
+    return tuple(keys)
+
+
+@functools.lru_cache(maxsize=256)
+def parse(script):
+    """
+    Parse a script mixing text and keys into a Script, e.g. "{ctrl+a}{del}Hello{enter}{tab*3}".
+    Text outside braces is typed as it is ({{ and }} type a brace). Inside braces:
+        {enter}, {ctrl+a}       Chord: keys pressed together, the last one tapped
+        {tab*3}, {ctrl+z*2}     Chord repeated
+        {shift down}            Keys held until {shift up}, or until the end of the script
+    Scripts are parsed once, the most recent ones are cached.
+    :raise ValueError: On an unbalanced brace, an empty {} or a repeat count that is not a number
+    """
+    result = []
+    text = []
+    held = []
+
+    def add(kind, payload):
+        if text:
+            result.append((TEXT, ''.join(text)))
+            del text[:]
+        result.append((kind, payload))
+
+    position = 0
+    while position < len(script):
+        char = script[position]
+        if script.startswith('{{', position) or script.startswith('}}', position):
+            text.append(char)
+            position += 2
+            continue
+        if char == '}':
+            raise ValueError("Unbalanced } at %d in %r" % (position, script))
+        if char != '{':
+            text.append(char)
+            position += 1
+            continue
+        if script.startswith('{}', position) and not script.startswith('{}}', position):
+            raise ValueError("Empty {} at %d in %r" % (position, script))
+        end = script.find('}', position + 2)        # {}} is the closing brace key
+        if end < 0:
+            raise ValueError("Unbalanced { at %d in %r" % (position, script))
+        body = script[position + 1:end].strip()
+        position = end + 1
+
+        words = body.rsplit(None, 1)
+        if len(words) == 2 and words[1].lower() in ('down', 'up'):
+            keys = chord(words[0])
+            if words[1].lower() == 'down':
+                for key in keys:
+                    add(DOWN, key)
+                    held.append(key)
+            else:
+                for key in reversed(keys):
+                    add(UP, key)
+                    if key in held:
+                        held.remove(key)
+            continue
+        count = 1
+        head, star, tail = body.rpartition('*')
+        if star and (head.strip() or tail.strip()):       # {*} alone is the * key
+            if not head.strip():
+                raise ValueError("Missing key before *%s in %r" % (tail, script))
+            if not tail.strip().isdigit():
+                raise ValueError("Bad repeat count %r in %r" % (tail, script))
+            body, count = head.strip(), int(tail)
+        keys = chord(body)
+        if not keys:
+            raise ValueError("Empty {} in %r" % (script,))
+        for _ in range(count):
+            add(CHORD, keys)
+
+    for key in reversed(held):      # Never leave keys held after the script
+        add(UP, key)
+    if text:
+        result.append((TEXT, ''.join(text)))
+    return Script(tuple(result))
+
+
+class KeyPlan(collections.namedtuple('KeyPlan', 'source units events marks generation')):
+    """
+    Immutable, fully resolved keystroke sequence.
+    source:     What was compiled
+    units:      Normalized source, see units()
+    events:     Backend specific event tuples, sent as they are by play()
+    marks:      Offset in events where each typed character or chord ends, for pacing
+    generation: Keyboard mapping generation the events were resolved against,
+                None when the mapping changed while compiling (the plan is then typed live)
+    """
+    __slots__ = ()
+
+    @property
+    def event_count(self):
+        """Number of key events sent when the plan is played"""
+        return len(self.events)
+
+
+class PlanCache(object):
+    """
+    Bounded least-recently-used cache of compiled plans.
+    :param maxsize: Number of plans kept
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.plans = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self.plans)
+
+    def get(self, key):
+        plan = self.plans.get(key)
+        if plan is not None:
+            self.plans.move_to_end(key)
+        return plan
+
+    def put(self, key, plan):
+        self.plans[key] = plan
+        self.plans.move_to_end(key)
+        while len(self.plans) > self.maxsize:
+            self.plans.popitem(last=False)
+
+    def clear(self):
+        self.plans.clear()
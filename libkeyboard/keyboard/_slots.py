@@ -0,0 +1,114 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+Allocator of scratch key slots used to register keysyms missing from the keyboard layout.
+"""
+
+import collections
+
+
+class SlotAllocator(object):
+    """
+    Hands out (keycode, keyidx) slots to keysyms and evicts the least recently used
+    registration when all slots are taken. Pinned keysyms (keys being held) are never evicted.
+    :param slots: Free slots, in the order they should be handed out
+    """
+
+    def __init__(self, slots=()):
+        self.free = collections.deque(slots)
+        self.used = collections.OrderedDict()      # {keysym: slot}, least recently used first
+        self.pins = {}                             # {keysym: number of times held}
+        self.hits = 0                              # Lookups served by an existing registration
+        self.misses = 0                            # Registrations of a new keysym
+        self.evictions = 0                         # Registrations that replaced another keysym
+
+    def __contains__(self, keysym):
+        return keysym in self.used
+
+    def __len__(self):
+        return len(self.used)
+
+    @property
+    def capacity(self):
+        return len(self.free) + len(self.used)
+
+    def get(self, keysym):
+        """Slot of a registered keysym, marked as most recently used. None if not registered"""
+        slot = self.used.get(keysym)
+        if slot is not None:
+            self.used.move_to_end(keysym)
+            self.hits += 1
+        return slot
+
+    def allocate(self, keysym, protect=()):
+        """
+        Take a slot for keysym, evicting the least recently used unpinned keysym if none is free.
+        :param keysym: Keysym to register
+        :param protect: Keysyms that must not be evicted either
+        :return: (slot, evicted keysym or None)
+        """
+        if keysym in self.used:
+            return self.get(keysym), None
+
+        evicted = None
+        if self.free:
+            slot = self.free.popleft()
+        else:
+            for evicted in self.used:
+                if not self.pins.get(evicted) and evicted not in protect:
+                    break
+            else:
+                raise KeyError("No spare keys")
+            slot = self.used.pop(evicted)
+            self.evictions += 1
+
+        self.misses += 1
+        self.used[keysym] = slot
+        return slot, evicted
+
+    def discard(self, keysym):
+        """Forget the registration of keysym, its slot is not handed out again (another client took it)"""
+        self.used.pop(keysym, None)
+        self.pins.pop(keysym, None)
+
+    def rebuild(self, free, holds):
+        """
+        Start over after another client changed the keyboard mapping.
+        :param free: Slots that are free now, in the order they should be handed out
+        :param holds: Callable (keysym, slot) telling whether a registration is still in place
+        """
+        for keysym, slot in list(self.used.items()):
+            if not holds(keysym, slot):
+                self.discard(keysym)
+        taken = set(self.used.values())
+        self.free = collections.deque(slot for slot in free if slot not in taken)
+
+    def pin(self, keysym):
+        if keysym in self.used:
+            self.pins[keysym] = self.pins.get(keysym, 0) + 1
+
+    def unpin(self, keysym):
+        count = self.pins.get(keysym, 0) - 1
+        if count > 0:
+            self.pins[keysym] = count
+        else:
+            self.pins.pop(keysym, None)
+
+    def clear(self):
+        """Free every slot. :return: The slots that were in use"""
+        slots = list(self.used.values())
+        self.used.clear()
+        self.pins.clear()
+        self.free.extendleft(reversed(sorted(slots)))
+        return slots
+
+    def stats(self):
+        return {
+            "slots": self.capacity,
+            "used": len(self.used),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
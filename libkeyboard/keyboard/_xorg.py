@@ -24,7 +24,32 @@ class KeyCode(_base.KeyCode):
         '_symbol',
     )
 
-    _symbol = None
+    __slots__ = ('_symbol', '_vk')
+
+    @property
+    def vk(self):
+        # Keys made by from_symbol() look their keysym up on first use, not at import
+        if self._vk is None and self._symbol is not None:
+            object.__setattr__(self, '_vk', _resolve(self._symbol))
+        return self._vk
+
+    @vk.setter
+    def vk(self, value):
+        object.__setattr__(self, '_vk', value)
+
+    def _identity(self):
+        if self.char is None and self._symbol is not None:
+            return self._symbol
+        return super(KeyCode, self)._identity()
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, KeyCode) and self._symbol is not None and other._symbol is not None:
+            return self._symbol == other._symbol and self.char == other.char
+        return super(KeyCode, self).__eq__(other)
+
+    __hash__ = _base.KeyCode.__hash__
 
     @classmethod
     def from_symbol(cls, symbol, **kwargs):
@@ -34,20 +59,22 @@ class KeyCode(_base.KeyCode):
 
         :return: a key code
         """
-        # First try simple translation
-        keysym = Xlib.XK.string_to_keysym(symbol)
-        if keysym:
-            return cls.from_vk(keysym, _symbol=symbol, **kwargs)
-
-        if not keysym:
-            symbol = 'XK_' + symbol
-            return cls.from_vk(getattr(Xlib.keysymdef.xkb, symbol, 0), _symbol=symbol, **kwargs)
+        return cls(_symbol=symbol, **kwargs)
 
     @classmethod
     def from_media(cls, name, **kwargs):
         return cls.from_symbol('XF86_Audio' + name, **kwargs)
 
 
+def _resolve(symbol):
+    """Keysym of a symbol name"""
+    # First try simple translation
+    keysym = Xlib.XK.string_to_keysym(symbol)
+    if keysym:
+        return keysym
+    return getattr(Xlib.keysymdef.xkb, 'XK_' + symbol, 0)
+
+
 class Key(enum.Enum):
     alt         = KeyCode.from_symbol('Alt_L')
     alt_l       = KeyCode.from_symbol('Alt_L')
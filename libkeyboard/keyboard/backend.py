@@ -0,0 +1,157 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+Backends deliver resolved key events.
+The KeyBoard front end (see _frontend.KeyBoardBase) turns keys into backend specific event
+tuples and hands them over in batches; a backend only has to send them:
+
+    send(events)    Deliver events now, in order, and report errors before returning
+    batch(window)   Batch queuing events with send(events), submitted by flush() and close()
+    flush()         Submit what was sent so far without waiting
+    sync()          Wait until everything submitted has been processed
+    fileno()        File descriptor to watch for replies, None when there is none (see aio)
+    close()         Release the backend's resources
+
+NullBackend drops every event and RecordingBackend keeps them in memory, so the front end
+can be driven (and measured) without any display.
+"""
+
+
+class Batch(object):
+    """
+    Events queued on a backend and submitted together with one send().
+    :param backend: Backend the events are submitted to
+    :param window: Number of queued events that triggers a submission, None to submit only at the end
+    """
+
+    def __init__(self, backend, window=None):
+        self.backend = backend
+        self.window = window
+        self.events = []            # Events not submitted yet
+        self.count = 0              # Number of events queued
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.flush()
+            return
+        self.close()
+
+    def __len__(self):
+        return len(self.events)
+
+    def send(self, events):
+        self.events.extend(events)
+        self.count += len(events)
+        if self.window and len(self.events) >= self.window:
+            self.flush()
+
+    def flush(self):
+        events, self.events = self.events, []
+        if events:
+            self.backend.send(events)
+
+    def close(self):
+        self.flush()
+        self.backend.sync()
+
+
+class Backend(object):
+    """Base backend: batches submit through send(), the rest does nothing"""
+
+    def send(self, events):
+        raise NotImplementedError
+
+    def batch(self, window=None):
+        return Batch(self, window)
+
+    def flush(self):
+        pass
+
+    def sync(self):
+        pass
+
+    def fileno(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class _NullBatch(object):
+    """Batch of NullBackend, dropping events as they come"""
+
+    count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def __len__(self):
+        return 0
+
+    def send(self, events):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class NullBackend(Backend):
+    """Backend dropping every event, to measure the front end alone"""
+
+    def send(self, events):
+        pass
+
+    def batch(self, window=None):
+        return _NullBatch()
+
+
+# Named keys of the virtual KeyBoard typing a character, see RecordingBackend.text()
+TYPED = {'enter': '\n', 'tab': '\t'}
+
+
+class RecordingBackend(Backend):
+    """
+    Backend keeping every event it is given, in order, for tests and dry runs.
+    Only send() and sync() are counted, a batch adds to events when it is flushed.
+    """
+
+    def __init__(self):
+        self.events = []            # Every event delivered
+        self.sends = 0              # Number of send() calls, i.e. submissions
+        self.syncs = 0              # Number of sync() calls, i.e. round trips a server would need
+        self.closed = False
+
+    def send(self, events):
+        self.events.extend(events)
+        self.sends += 1
+
+    def sync(self):
+        self.syncs += 1
+
+    def close(self):
+        self.closed = True
+
+    def clear(self):
+        """Forget the events and counts recorded so far"""
+        self.events = []
+        self.sends = 0
+        self.syncs = 0
+
+    def text(self):
+        """
+        Characters pressed, in order, for events of the virtual KeyBoard ((key, is_press) pairs).
+        Enter and tab count as the characters they type, other named keys such as "ctrl" are left out.
+        """
+        return ''.join(TYPED.get(key, key) for key, is_press in self.events
+                       if is_press and (len(key) == 1 or key in TYPED))
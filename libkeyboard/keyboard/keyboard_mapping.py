@@ -3,139 +3,225 @@
 """
 @Author: baicaimp3
 @Date: 2024/11/08
+Key name table. Keycodes depend on the display, so the table only holds keysym names
+and is resolved by build() against the keyboard mapping of the KeyBoard that needs it.
 """
 
 import os
 import Xlib.XK
-from Xlib.display import Display
-
-
-_display = Display(os.environ.get('DISPLAY', ':0'))
-keyboardMapping = {
-    'backspace':         _display.keysym_to_keycode(Xlib.XK.string_to_keysym('BackSpace')),
-    '\b':                _display.keysym_to_keycode(Xlib.XK.string_to_keysym('BackSpace')),
-    'tab':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Tab')),
-    'enter':             _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Return')),
-    'return':            _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Return')),
-    'shift':             _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Shift_L')),
-    'ctrl':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Control_L')),
-    'alt':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Alt_L')),
-    'pause':             _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Pause')),
-    'capslock':          _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Caps_Lock')),
-    'esc':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Escape')),
-    'escape':            _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Escape')),
-    'pgup':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Page_Up')),
-    'pgdn':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Page_Down')),
-    'pageup':            _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Page_Up')),
-    'pagedown':          _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Page_Down')),
-    'end':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('End')),
-    'home':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Home')),
-    'left':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Left')),
-    'up':                _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Up')),
-    'right':             _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Right')),
-    'down':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Down')),
-    'select':            _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Select')),
-    'print':             _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Print')),
-    'execute':           _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Execute')),
-    'prtsc':             _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Print')),
-    'prtscr':            _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Print')),
-    'prntscrn':          _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Print')),
-    'printscreen':       _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Print')),
-    'insert':            _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Insert')),
-    'del':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Delete')),
-    'delete':            _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Delete')),
-    'help':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Help')),
-    'winleft':           _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Super_L')),
-    'winright':          _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Super_R')),
-    'apps':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Super_L')),
-    'num0':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('KP_0')),
-    'num1':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('KP_1')),
-    'num2':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('KP_2')),
-    'num3':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('KP_3')),
-    'num4':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('KP_4')),
-    'num5':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('KP_5')),
-    'num6':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('KP_6')),
-    'num7':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('KP_7')),
-    'num8':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('KP_8')),
-    'num9':              _display.keysym_to_keycode(Xlib.XK.string_to_keysym('KP_9')),
-    'multiply':          _display.keysym_to_keycode(Xlib.XK.string_to_keysym('KP_Multiply')),
-    'add':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('KP_Add')),
-    'separator':         _display.keysym_to_keycode(Xlib.XK.string_to_keysym('KP_Separator')),
-    'subtract':          _display.keysym_to_keycode(Xlib.XK.string_to_keysym('KP_Subtract')),
-    'decimal':           _display.keysym_to_keycode(Xlib.XK.string_to_keysym('KP_Decimal')),
-    'divide':            _display.keysym_to_keycode(Xlib.XK.string_to_keysym('KP_Divide')),
-    'f1':                _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F1')),
-    'f2':                _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F2')),
-    'f3':                _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F3')),
-    'f4':                _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F4')),
-    'f5':                _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F5')),
-    'f6':                _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F6')),
-    'f7':                _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F7')),
-    'f8':                _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F8')),
-    'f9':                _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F9')),
-    'f10':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F10')),
-    'f11':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F11')),
-    'f12':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F12')),
-    'f13':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F13')),
-    'f14':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F14')),
-    'f15':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F15')),
-    'f16':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F16')),
-    'f17':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F17')),
-    'f18':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F18')),
-    'f19':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F19')),
-    'f20':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F20')),
-    'f21':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F21')),
-    'f22':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F22')),
-    'f23':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F23')),
-    'f24':               _display.keysym_to_keycode(Xlib.XK.string_to_keysym('F24')),
-    'numlock':           _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Num_Lock')),
-    'scrolllock':        _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Scroll_Lock')),
-    'shiftleft':         _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Shift_L')),
-    'shiftright':        _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Shift_R')),
-    'ctrlleft':          _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Control_L')),
-    'ctrlright':         _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Control_R')),
-    'altleft':           _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Alt_L')),
-    'altright':          _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Alt_R')),
+
+from ._keysym2ucs import KEYSYM_TO_UCS, UCS_TO_KEYSYM
+
+Xlib.XK.load_keysym_group('xkb')      # ISO_Level3_Shift
+
+KEY_NAMES = {
+    'backspace':         'BackSpace',
+    '\b':                'BackSpace',
+    'tab':               'Tab',
+    'enter':             'Return',
+    'return':            'Return',
+    'shift':             'Shift_L',
+    'ctrl':              'Control_L',
+    'alt':               'Alt_L',
+    'pause':             'Pause',
+    'capslock':          'Caps_Lock',
+    'esc':               'Escape',
+    'escape':            'Escape',
+    'pgup':              'Page_Up',
+    'pgdn':              'Page_Down',
+    'pageup':            'Page_Up',
+    'pagedown':          'Page_Down',
+    'end':               'End',
+    'home':              'Home',
+    'left':              'Left',
+    'up':                'Up',
+    'right':             'Right',
+    'down':              'Down',
+    'select':            'Select',
+    'print':             'Print',
+    'execute':           'Execute',
+    'prtsc':             'Print',
+    'prtscr':            'Print',
+    'prntscrn':          'Print',
+    'printscreen':       'Print',
+    'insert':            'Insert',
+    'del':               'Delete',
+    'delete':            'Delete',
+    'help':              'Help',
+    'winleft':           'Super_L',
+    'winright':          'Super_R',
+    'apps':              'Super_L',
+    'num0':              'KP_0',
+    'num1':              'KP_1',
+    'num2':              'KP_2',
+    'num3':              'KP_3',
+    'num4':              'KP_4',
+    'num5':              'KP_5',
+    'num6':              'KP_6',
+    'num7':              'KP_7',
+    'num8':              'KP_8',
+    'num9':              'KP_9',
+    'multiply':          'KP_Multiply',
+    'add':               'KP_Add',
+    'separator':         'KP_Separator',
+    'subtract':          'KP_Subtract',
+    'decimal':           'KP_Decimal',
+    'divide':            'KP_Divide',
+    'f1':                'F1',
+    'f2':                'F2',
+    'f3':                'F3',
+    'f4':                'F4',
+    'f5':                'F5',
+    'f6':                'F6',
+    'f7':                'F7',
+    'f8':                'F8',
+    'f9':                'F9',
+    'f10':               'F10',
+    'f11':               'F11',
+    'f12':               'F12',
+    'f13':               'F13',
+    'f14':               'F14',
+    'f15':               'F15',
+    'f16':               'F16',
+    'f17':               'F17',
+    'f18':               'F18',
+    'f19':               'F19',
+    'f20':               'F20',
+    'f21':               'F21',
+    'f22':               'F22',
+    'f23':               'F23',
+    'f24':               'F24',
+    'numlock':           'Num_Lock',
+    'scrolllock':        'Scroll_Lock',
+    'shiftleft':         'Shift_L',
+    'shiftright':        'Shift_R',
+    'ctrlleft':          'Control_L',
+    'ctrlright':         'Control_R',
+    'altleft':           'Alt_L',
+    'altright':          'Alt_R',
     # These are added because unlike a-zA-Z0-9, the single characters do not have a
-    ' ': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('space')),
-    'space': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('space')),
-    '\t': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Tab')),
-    '\n': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Return')),  # for some reason this needs to be cr, not lf
-    '\r': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('Return')),
-    '!': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('exclam')),
-    '#': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('numbersign')),
-    '%': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('percent')),
-    '$': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('dollar')),
-    '&': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('ampersand')),
-    '"': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('quotedbl')),
-    "'": _display.keysym_to_keycode(Xlib.XK.string_to_keysym('apostrophe')),
-    '(': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('parenleft')),
-    ')': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('parenright')),
-    '*': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('asterisk')),
-    '=': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('equal')),
-    '+': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('plus')),
-    ',': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('comma')),
-    '-': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('minus')),
-    '.': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('period')),
-    '/': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('slash')),
-    ':': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('colon')),
-    ';': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('semicolon')),
-    '<': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('less')),
-    '>': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('greater')),
-    '?': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('question')),
-    '@': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('at')),
-    '[': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('bracketleft')),
-    ']': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('bracketright')),
-    '\\': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('backslash')),
-    '^': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('asciicircum')),
-    '_': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('underscore')),
-    '`': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('grave')),
-    '{': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('braceleft')),
-    '|': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('bar')),
-    '}': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('braceright')),
-    '~': _display.keysym_to_keycode(Xlib.XK.string_to_keysym('asciitilde')),
+    ' ': 'space',
+    'space': 'space',
+    '\t': 'Tab',
+    '\n': 'Return',  # for some reason this needs to be cr, not lf
+    '\r': 'Return',
+    '!': 'exclam',
+    '#': 'numbersign',
+    '%': 'percent',
+    '$': 'dollar',
+    '&': 'ampersand',
+    '"': 'quotedbl',
+    "'": 'apostrophe',
+    '(': 'parenleft',
+    ')': 'parenright',
+    '*': 'asterisk',
+    '=': 'equal',
+    '+': 'plus',
+    ',': 'comma',
+    '-': 'minus',
+    '.': 'period',
+    '/': 'slash',
+    ':': 'colon',
+    ';': 'semicolon',
+    '<': 'less',
+    '>': 'greater',
+    '?': 'question',
+    '@': 'at',
+    '[': 'bracketleft',
+    ']': 'bracketright',
+    '\\': 'backslash',
+    '^': 'asciicircum',
+    '_': 'underscore',
+    '`': 'grave',
+    '{': 'braceleft',
+    '|': 'bar',
+    '}': 'braceright',
+    '~': 'asciitilde',
 }
 
-# Trading memory for time" populate winKB so we don't have to call VkKeyScanA each time.
+# Letters and digits are their own keysym names
 for c in """abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890""":
-    keyboardMapping[c] = _display.keysym_to_keycode(Xlib.XK.string_to_keysym(c))
+    KEY_NAMES[c] = c
+
+# Modifier keysyms held to reach each column of the core keyboard mapping.
+# Columns 2 and 3 are the second group (Mode_switch), XKB puts the AltGr levels in columns 4 and 5
+LEVEL_MODIFIERS = (
+    (),
+    ('Shift_L',),
+    ('Mode_switch',),
+    ('Mode_switch', 'Shift_L'),
+    ('ISO_Level3_Shift',),
+    ('ISO_Level3_Shift', 'Shift_L'),
+)
+
+_keysyms = None     # {name: keysym}, resolved on first use
+
+
+def _keysym_table():
+    global _keysyms
+    if _keysyms is None:
+        _keysyms = {name: Xlib.XK.string_to_keysym(symbol) for name, symbol in KEY_NAMES.items()}
+    return _keysyms
+
+
+def keysym(name):
+    """Keysym of a key name of KEY_NAMES"""
+    return _keysym_table()[name]
+
+
+def build(keysym_to_keycode):
+    """
+    Build the {name: keycode} table of a display.
+    :param keysym_to_keycode: Callable returning the keycode of a keysym on that display, 0 when unbound
+    """
+    return {name: keysym_to_keycode(keysym) for name, keysym in _keysym_table().items()}
+
+
+def keysym_char(keysym):
+    """Character typed by a Latin-1, legacy (see _keysym2ucs) or Unicode keysym, None for any other keysym"""
+    if 0x20 <= keysym <= 0x7e or 0xa0 <= keysym <= 0xff:
+        return chr(keysym)
+    if 0x1000100 <= keysym <= 0x110ffff:
+        return chr(keysym - 0x1000000)
+    ucs = KEYSYM_TO_UCS.get(keysym)
+    return chr(ucs) if ucs is not None else None
+
+
+def legacy_keysym(keysym):
+    """Legacy keysym of the character of a Unicode keysym (e.g. Cyrillic_ef for U+0444), None if it has none"""
+    if keysym >= 0x1000100:
+        return UCS_TO_KEYSYM.get(keysym - 0x1000000)
+    return None
+
+
+def char_table(keymap, min_keycode, keysym_to_keycode):
+    """
+    Every character a keyboard mapping can type, derived from a single GetKeyboardMapping reply.
+    Characters reachable in several ways keep the one with the fewest modifiers.
+    :param keymap: Rows of keysyms, one per keycode from min_keycode
+    :param keysym_to_keycode: Callable returning the keycode of a keysym in keymap, 0 when unbound
+    :return: ({char: (keycode, modifier keycodes to hold)}, list of the same values for the 256 Latin-1 ordinals)
+    """
+    chars = {}
+    width = max(len(row) for row in keymap)
+    for keyidx, symbols in enumerate(LEVEL_MODIFIERS[:width]):
+        modifiers = tuple(keysym_to_keycode(Xlib.XK.string_to_keysym(symbol)) for symbol in symbols)
+        if not all(modifiers):      # The layout has no key for this level
+            continue
+        for offset, row in enumerate(keymap):
+            if keyidx < len(row) and row[keyidx]:
+                char = keysym_char(row[keyidx])
+                if char is not None and char not in chars:
+                    chars[char] = (offset + min_keycode, modifiers)
+    return chars, [chars.get(chr(ordinal)) for ordinal in range(0x100)]
+
+
+def __getattr__(name):
+    # keyboardMapping of $DISPLAY, kept for older code importing it. Connects on first access only
+    if name == 'keyboardMapping':
+        global _display, keyboardMapping
+        from Xlib.display import Display
+        _display = Display(os.environ.get('DISPLAY', ':0'))
+        keyboardMapping = build(_display.keysym_to_keycode)
+        return keyboardMapping
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -5,13 +5,16 @@
 @Description: Windows keyboard mapping table, returns the virtual key code (VK code) for each key
 """
 
+import sys
 import ctypes
 
 # WinAPI
-user32 = ctypes.WinDLL('user32', use_last_error=True)
+user32 = ctypes.WinDLL('user32', use_last_error=True) if sys.platform == 'win32' else None
 
 # Convert character to virtual key code
 def _to_vk(char):
+    if user32 is None:
+        return None
     vk = user32.VkKeyScanW(ord(char))
     return vk & 0xff if vk != -1 else None
 
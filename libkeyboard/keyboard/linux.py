@@ -8,249 +8,515 @@ Core methods for simulated keyboard under Linux
 
 import Xlib
 import Xlib.X
-import Xlib.ext
+import Xlib.error
 import Xlib.XK
 import contextlib
+import time
 from Xlib.display import Display
-from Xlib.ext.xtest import fake_input
 from ..keyboard import Key, NORMAL_MODIFIERS
-from ..util.xorg import display_manager, alt_gr_mask, alt_mask
-from .keyboard_mapping import keyboardMapping as kmp
+from ..util.xorg import display_manager, EventBatch
+from ..util.clipboard import Clipboard
+from . import keyboard_mapping
+from . import _xorg
+from ._slots import SlotAllocator
+from ._frontend import KeyBoardBase
+from .backend import Backend
+from .. import metrics as _metrics
 
 
-class KeyBoard(Display):
-    def __init__(self):
-        super().__init__()
-        self.min_keycode      = self.display.info.min_keycode               # Minimum key code
-        self.max_keycode      = self.display.info.max_keycode               # Maximum key code
+class XBackend(Backend):
+    """
+    Backend sending events on an X connection, as XTest input or as events sent to the input focus
+    (see EventBatch.send). The connection stays owned by whoever opened it.
+    :param connection: Xlib.display.Display
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def send(self, events):
+        """Send events and wait for the server, errors are raised as X11Error([(event index, error), ...])"""
+        with self.batch() as batch:
+            batch.send(events)
+
+    def batch(self, window=None, blocking=True):
+        return EventBatch(self.connection, window, blocking)
+
+    def flush(self):
+        self.connection.flush()
+
+    def sync(self):
+        self.connection.sync()
+
+    def fileno(self):
+        return self.connection.fileno()
+
+
+class KeyBoard(KeyBoardBase):
+    slot_levels = 2         # Keysym levels of a spare keycode used to register keysyms (shift selects level 1)
+    paste_chord = ('ctrl', 'v')     # Chord pasting CLIPBOARD in most applications; ('shift', 'insert') pastes PRIMARY in xterm
+    paste_threshold = 4096          # Length from which should_paste() pastes any text
+
+    def __init__(self, display=None, backend=None):
+        """
+        :param display: Display name such as ":1", None for $DISPLAY
+        :param backend: Backend the events are delivered to, an XBackend on the display by default
+        """
+        self.connection = Display(display)      # Connection the keyboard mapping is read from and changed on
+        super().__init__(backend if backend is not None else XBackend(self.connection))
+        self.min_keycode      = self.connection.display.info.min_keycode    # Minimum key code
+        self.max_keycode      = self.connection.display.info.max_keycode    # Maximum key code
         self.count            = self.max_keycode - self.min_keycode + 1     # Number of keys that can be registered
         self.press_event      = Xlib.display.event.KeyPress                 # Event for pressing a key
         self.release_event    = Xlib.display.event.KeyRelease               # Event for releasing a key
         self.ctrl_press       = Xlib.X.KeyPress
         self.ctrl_release     = Xlib.X.KeyRelease
-        self.register_mapping = {}      # {keysym: {keycode: 1, keyidx: 0}} Registered keyboard mapping table
-        self.event_mapping    = {}      # {keysym: {keycode: 1, keyidx: 0, count: 1}} Number of times pressed
-        self.modifiers        = set()
-        self.closed           = False
+        self.slots            = None    # SlotAllocator of registered keysyms, built on first registration
+        self._keymap          = None    # Local mirror of the keyboard mapping, see _keymap_rows()
+        self._keysym_index    = {}      # {keysym: (keycode, keyidx)} Reverse index of the mirror
+        self._own_notify      = []      # (first keycode, count) of the MappingNotify events still expected for our own changes
+        self._kmp             = None    # Key name table of this display, see kmp
+        self._kmp_generation  = None    # keymap_generation the key name table was built against
+        self._modifier_masks  = None    # {Key member: state mask} From the modifier mapping, see _modifier_table()
+        self._chars           = {}      # {char: (keycode, modifier keycodes)} Characters the layout can type
+        self._latin1          = None    # The same for the 256 Latin-1 ordinals, see char_location()
+        self._clipboard       = None    # Clipboard serving pasted text, opened by the first paste()
+        if self.metrics is not None:
+            self._count_round_trips()
+
+    def __getattr__(self, name):
+        # KeyBoard used to be an Xlib Display, its methods (get_input_focus, screen, fileno...) are still served
+        if name.startswith('_') or name == 'connection':
+            raise AttributeError(name)
+        return getattr(self.connection, name)
+
+    def _count_round_trips(self):
+        """Count the requests waiting for a reply in metrics, by wrapping the connection's send_request"""
+        protocol = self.connection.display
+        send_request = protocol.send_request
+        counters = self.metrics.counters
+
+        def counting(request, wait_for_response):
+            if wait_for_response:
+                counters['round_trips'] += 1
+            return send_request(request, wait_for_response)
+
+        protocol.send_request = counting
+
+    def _display_manager(self):
+        """Error-checked access to the display. Inside a batch, errors are collected by the batch"""
+        if self._batch is not None:
+            return contextlib.nullcontext(self.connection)
+        return display_manager(self.connection)
+
+    @classmethod
+    def _key_code(cls, member):
+        return _xorg.Key[member.name].value.vk or None
+
+    @classmethod
+    def _key_names(cls):
+        return {name: keyboard_mapping.keysym(name) for name in keyboard_mapping.KEY_NAMES}
+
+    def _resolve(self, key, _key, keysym, register):
+        """
+        Events of key: characters of the layout and named keys are sent as XTest input, holding
+        the modifiers their level needs; other keysyms are registered on a slot and sent to the
+        input focus with the state selecting their level.
+        """
+        location = self.char_location(key) if len(key) == 1 else None
+        if location is not None:        # Character of the layout
+            keycode, modifiers = location
+            down = [(self.ctrl_press, modifier, 0) for modifier in modifiers]      # Press shift, AltGr...
+            down.append((self.ctrl_press, keycode, 0))
+            down += [(self.ctrl_release, modifier, 0) for modifier in reversed(modifiers)]     # Release them
+            return down, ((self.ctrl_release, keycode, 0),)
+
+        keycode = self.kmp.get(key)
+        if keycode:
+            return ((self.ctrl_press, keycode, 0),), ((self.ctrl_release, keycode, 0),)
 
-    def __enter__(self):
-        return self
+        keycode, keyidx = self.get_keycode(keysym, register)        # Get key code
+        if keycode is None:
+            raise KeyError(f"No such key '{key}'")
+        if _key:
+            return ((self.ctrl_press, keycode, 0),), ((self.ctrl_release, keycode, 0),)
+        state = self._level_state(keyidx) | self.modifier_state
+        return ((self.press_event, keycode, state),), ((self.release_event, keycode, state),)
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
+    def _send_plan_events(self, events):
+        """
+        Send events of a compiled plan. Sent events carry the state of the modifiers held when
+        the plan is played, on top of the ones pressed inside the plan.
+        """
+        held = self.modifier_state
+        if held:
+            events = [
+                (kind, keycode, state | held) if kind is self.press_event or kind is self.release_event
+                else (kind, keycode, state)
+                for kind, keycode, state in events
+            ]
+        self._emit(events)
+
+    def _pin(self, keysym):
+        if self.slots is not None:
+            self.slots.pin(keysym)      # A held key must keep its slot
+
+    def _unpin(self, keysym):
+        if self.slots is not None:
+            self.slots.unpin(keysym)
+
+    def _shift_statue(self, modifiers):
+        masks = self._modifier_table()
+        state = 0
+        for modifier in modifiers:
+            state |= masks.get(modifier, 0)
+        return state
 
-    def __del__(self):
+    def _modifier_table(self):
+        """
+        {Key member: state mask} of the modifier keys, found by looking their keycodes up in the
+        modifier mapping. It is fetched once and fetched again after a MappingNotify.
+        """
+        if self._modifier_masks is None:
+            self._keymap_rows()
+            rows = self.connection.get_modifier_mapping()
+            masks = {}
+            for member in NORMAL_MODIFIERS:
+                keycode = self._index_keycode(self.key_index[member.name].keysym)
+                for index, keycodes in enumerate(rows):
+                    if keycode and keycode in keycodes:
+                        masks[member] = 1 << index
+                        break
+            for member in (Key.shift, Key.shift_l, Key.shift_r):       # Core masks, whatever the mapping
+                masks[member] = Xlib.X.ShiftMask
+            for member in (Key.ctrl, Key.ctrl_l, Key.ctrl_r):
+                masks[member] = Xlib.X.ControlMask
+            self._modifier_masks = masks
+        return self._modifier_masks
+
+    def _drop_modifier_table(self):
+        """Forget the modifier masks after the mapping changed, the state of the modifiers held is recomputed"""
+        self._modifier_masks = None
+        self.modifier_state = self._shift_statue(self.modifiers) if self.modifiers else 0
+
+    def target_class(self):
+        """WM_CLASS class of the window with the input focus (or of its closest ancestor with one), None if unknown"""
         try:
-            if self.closed is False:
-                self.close()
-        except AttributeError:
+            window = self.connection.get_input_focus().focus
+            root = self.connection.screen().root
+            while window and not isinstance(window, int) and window != root:
+                wm_class = window.get_wm_class()
+                if wm_class:
+                    return wm_class[1]
+                window = window.query_tree().parent
+        except Xlib.error.XError:       # The window went away meanwhile
             pass
+        return None
 
-    def key_to_keysym(self, key):
-        """Convert to text code keysym"""
-        _key = None
-        keysym = None
-        if key.lower() in ('ps', 'printscreen', 'print screen'):
-            key = 'print_screen'
-        if hasattr(Key, key.lower()):
-            keysym = getattr(Key, key.lower()).value.vk
-            _key = getattr(Key, key.lower()).value
-
-        elif key in ("\n", "\r"):
-            _key = Key.enter.value
-            keysym = _key.vk
-
-        elif key == "\t":
-            _key = Key.Tab.value
-            keysym = _key.vk
-
-        elif key.lower() in {'win', 'cmd', 'winleft'}:
-            keysym = Key.cmd.value.vk
-            _key = Key.cmd.value
-
-        elif key in kmp:
-            keysym = kmp.get(key)
-            _key = None
-
-        elif len(key) != 1:
-            self.pro_raise(Exception("Character length must be 1"))
-        else:
-            keysym = self.char_to_keysym(key)
-        return _key, keysym
-
-    def _update_modifiers(self, key, is_press):
-        """Record when key is ctrl, shift, alt"""
-        if NORMAL_MODIFIERS.get(key, None):
-            if is_press:
-                self.modifiers.add(key)
-            else:
-                try:
-                    self.modifiers.remove(key)
-                except KeyError:
-                    pass
+    def get_all_mapping(self):
+        """Get all keyboard mappings"""
+        return self.connection.get_keyboard_mapping(self.min_keycode, self.count)
 
-    def press(self, key, register=False):
+    def _keymap_rows(self):
         """
-        Press a key
-        :param key: Keyboard key
-        :param register: Whether to register the key when it does not exist. For security reasons, true only when writing()
+        Local mirror of the keyboard mapping, one list of keysyms per keycode from min_keycode.
+        It is fetched once and then kept up to date by our own changes and by MappingNotify.
         """
-        _key, keysym = self.key_to_keysym(key)      # Get corresponding text code
-        if _key is not None:
-            self._update_modifiers(_key, True)
-
-        if kmp.get(key) is not None:
-            keycode, keyidx = kmp.get(key), 0
-            needshift = True if key.isupper() or key in '~!@#$%^&*()_+{}|:"<>?' else False
-            if needshift:
-                self._send_event(self.ctrl_press, kmp['shift'])     # Press shift
-
-            self._send_event(self.ctrl_press, kmp.get(key))
-
-            if needshift:
-                self._send_event(self.ctrl_release, kmp['shift'])   # Release shift
-
-        else:
-            keycode, keyidx = self.get_keycode(keysym, register)        # Get key code
-            if keycode is None:
-                self.pro_raise(KeyError(f"No such key '{key}'"))
-            event = self.press_event if not _key else self.ctrl_press
-            self._send_event(event, keycode, keyidx)        # Send keyboard event
-
-        self.sync()
-        # Record event
-        if keysym in self.event_mapping:
-            self.event_mapping[keysym]['count'] += 1
-        else:
-            self.event_mapping[keysym] = {"keycode": keycode, "keyidx": keyidx, "count": 1}
-
-    def release(self, key):
-        """Release a key"""
-        _key, keysym = self.key_to_keysym(key)
-        if _key is not None:
-            self._update_modifiers(_key, False)
-
-        if kmp.get(key) is not None:        # Hot key
-            keycode = kmp.get(key)
-            self._send_event(self.ctrl_release, keycode)
-
-        elif keysym in self.event_mapping:
-            keycode, keyidx = self.event_mapping[keysym]["keycode"], self.event_mapping[keysym]['keyidx']
-            event = self.release_event if not _key else self.ctrl_release
-            self._send_event(event, keycode, keyidx)
-
-        self.sync()
-        # Clear event record
-        if keysym in self.event_mapping:
-            self.event_mapping[keysym]["count"] -= 1
-            if self.event_mapping[keysym]["count"] == 0:
-                del self.event_mapping[keysym]
-
-    def _shift_statue(self, modifiers):
-        return 0 | (alt_mask(self) if Key.alt in modifiers else 0) | (
-            alt_gr_mask if Key.alt_gr in modifiers else 0) | (
-            Xlib.X.ControlMask if Key.ctrl in modifiers else 0) | (
-            Xlib.X.ShiftMask if Key.shift in modifiers else 0)
-
-    def reset_keyboard(self):
-        """Reset keyboard, release all keys"""
-        for keysym, data in self.event_mapping.items():
-            keycode, keyidx, count = data["keycode"], data["keyidx"], data["count"]
-            if count >= 0:
-                for i in range(count):
-                    self._send_event(self.release_event, keycode, keyidx)
-                data['count'] = 0
-        self.event_mapping = {}
-
-    def _send_event(self, event, keycode, keyidx=0):
-        """Send a keyboard event"""
-        with display_manager(self) as dm, self._modifiers as modifiers:
-            if isinstance(event, int):
-                Xlib.ext.xtest.fake_input(dm, event, keycode)
-            else:
-                window = dm.get_input_focus().focus
-                send_event = getattr(window, "send_event", lambda _event: dm.send_event(window, _event))
-                send_event(event(
-                    detail=keycode,
-                    state=keyidx | self._shift_statue(modifiers),
-                    time=0,
-                    root=dm.screen().root,
-                    window=window,
-                    same_screen=0,
-                    child=Xlib.X.NONE,
-                    root_x=0, root_y=0, event_x=0, event_y=0
-                ))
+        self._poll_mapping_notify()
+        if self._keymap is None:
+            self._load_keymap()
+        return self._keymap
 
     @property
-    @contextlib.contextmanager
-    def _modifiers(self):
-        yield set(NORMAL_MODIFIERS.get(modifier, None) for modifier in self.modifiers)
+    def kmp(self):
+        """{name: keycode} table of the key names in keyboard_mapping, resolved against this display"""
+        if self._keymap is None:
+            self._keymap_rows()
+        if self._kmp_generation != self.keymap_generation:
+            self._kmp = keyboard_mapping.build(self._index_keycode)
+            self._kmp_generation = self.keymap_generation
+        return self._kmp
+
+    def _index_keycode(self, keysym):
+        """Keycode of keysym in the local mirror, 0 when unbound (like Display.keysym_to_keycode)"""
+        return self._keysym_index.get(keysym, (0,))[0]
+
+    def _index_location(self, keysym):
+        """(keycode, keyidx) of keysym in the local mirror, or of the legacy keysym of its character, None when unbound"""
+        location = self._keysym_index.get(keysym)
+        if location is None:
+            legacy = keyboard_mapping.legacy_keysym(keysym)
+            if legacy is not None:
+                location = self._keysym_index.get(legacy)
+        return location
+
+    def char_location(self, char):
+        """
+        Where the layout types char, from the table derived when the keyboard mapping was fetched.
+        :param char: Character of length 1
+        :return: (keycode, modifier keycodes to hold), None when only registration can type char
+        """
+        if self._keymap is None:
+            self._keymap_rows()
+        ordinal = ord(char)
+        if ordinal < 0x100:
+            return self._latin1[ordinal]
+        return self._chars.get(char)
+
+    def _load_keymap(self):
+        """Fetch the whole keyboard mapping and rebuild the mirror and the keysym index"""
+        self._keymap = [list(row) for row in self.get_all_mapping()]
+        self._keysym_index = {}
+        for keyidx in range(max(len(row) for row in self._keymap)):        # Lowest index first, like Xlib
+            for offset, row in enumerate(self._keymap):
+                if keyidx < len(row) and row[keyidx]:
+                    self._keysym_index.setdefault(row[keyidx], (offset + self.min_keycode, keyidx))
+        self._chars, self._latin1 = keyboard_mapping.char_table(self._keymap, self.min_keycode, self._index_keycode)
+        if self.slots is not None:      # Reloaded after another client changed the mapping
+            owned = {slot[0] for keysym, slot in self.slots.used.items() if self._holds(keysym, slot)}
+            self.slots.rebuild(self._spare_slots(owned), self._holds)
+        self._new_generation()
+
+    def _poll_mapping_notify(self):
+        """Drop the local mirror, or the modifier masks, when another client has changed the mapping"""
+        while self.connection.pending_events():
+            event = self.connection.next_event()
+            if event.type != Xlib.X.MappingNotify:
+                continue
+            if event.request == Xlib.X.MappingModifier:
+                self._drop_modifier_table()
+                continue
+            if event.request != Xlib.X.MappingKeyboard:
+                continue
+            self.connection.refresh_keyboard_mapping(event)
+            change = (event.first_keycode, event.count)
+            if change in self._own_notify:      # Echo of a change we made and already applied
+                self._own_notify.remove(change)
+            else:
+                self._keymap = None
+                self._new_generation()     # Plans resolved against the old mapping are stale now
+                self._drop_modifier_table()     # Modifier keys may have moved to other keycodes
+
+    def _change_mapping(self, first_keycode, rows):
+        """Change the mapping of keycodes from first_keycode, on the server and in the local mirror"""
+        keymap = self._keymap_rows()
+        with _metrics.timer(self.metrics, 'mapping_change'), self._display_manager() as dm:
+            dm.change_keyboard_mapping(first_keycode, rows)
+        self._own_notify.append((first_keycode, len(rows)))
+        if self.metrics is not None:
+            self.metrics.count('mapping_changes')
+
+        stale = set()
+        for offset, row in enumerate(rows, first_keycode - self.min_keycode):
+            keycode = offset + self.min_keycode
+            for keysym in keymap[offset]:
+                if keysym and self._keysym_index.get(keysym, (None,))[0] == keycode:
+                    del self._keysym_index[keysym]
+                    stale.add(keysym)
+                char = keyboard_mapping.keysym_char(keysym)
+                if char is not None and self._chars.get(char, (None,))[0] == keycode:
+                    del self._chars[char]       # Registered characters are looked up in the slots instead
+                    if ord(char) < 0x100:
+                        self._latin1[ord(char)] = None
+            keymap[offset] = list(row)
+            for keyidx, keysym in enumerate(row):
+                if keysym:
+                    found = self._keysym_index.get(keysym)
+                    if found is None or (keyidx, keycode) < (found[1], found[0]):
+                        self._keysym_index[keysym] = (keycode, keyidx)
+                    stale.discard(keysym)
+
+        for keysym in stale:        # Removed keysyms may still be bound to another keycode
+            for offset, row in enumerate(keymap):
+                if keysym in row:
+                    found = self._keysym_index.get(keysym)
+                    location = (offset + self.min_keycode, row.index(keysym))
+                    if found is None or (location[1], location[0]) < (found[1], found[0]):
+                        self._keysym_index[keysym] = location
+        self._new_generation()
+
+    def _change_keycodes(self, rows):
+        """
+        Change several keycodes with a single mapping request.
+        Keycodes in between that are not in rows are sent again unchanged from the local mirror.
+        :param rows: {keycode: keysyms}
+        """
+        keymap = self._keymap_rows()
+        first, last = min(rows), max(rows)
+        self._change_mapping(first, [
+            rows[keycode] if keycode in rows else keymap[keycode - self.min_keycode]
+            for keycode in range(first, last + 1)
+        ])
+
+    def _slot_allocator(self):
+        """
+        Allocator over the spare keycodes, built on first use.
+        Every level of a spare keycode is a separate slot; levels are selected with the state
+        sent along the key event (see _level_state), so one keycode holds several keysyms.
+        """
+        if self.slots is None:
+            self._keymap_rows()
+            self.slots = SlotAllocator(self._spare_slots())
+        return self.slots
 
-    def get_all_mapping(self):
-        """Get all keyboard mappings"""
-        return self.get_keyboard_mapping(self.min_keycode, self.count)
-
-    def get_void_keycode(self):
-        """Get an unregistered key value"""
-        for _keycode, _keysym in enumerate(self.get_all_mapping()[128:]):
-            if not any(_keysym):
-                keyidx = 0
-                return _keycode + self.min_keycode + 128, keyidx
-
-        # No spare keys, take an unpressed key from the registered ones
-        for keysym, data in self.register_mapping.items():
-            if keysym not in self.event_mapping or self.event_mapping[keysym].get('count', 0) == 0:
-                return data["keycode"], data["keyidx"]
-        self.pro_raise("No spare keys")
-
-    def _update_register_mapping(self, keysym, keycode, keyidx):
-        """Modify registered keyboard mapping table"""
-        _temp = None
-        for _keysym, data in self.register_mapping.items():
-            if data["keycode"] == keycode and data["keyidx"] == keyidx:
-                if keysym == _keysym:
-                    _temp = _keysym
-                    break
-        if _temp:
-            del self.register_mapping[_temp]
-        self.register_mapping[keysym] = {"keycode": keycode, "keyidx": keyidx}
-
-    def _register(self, keysym, keycode, keyidx):
-        """Register key. Usually called when content is Chinese"""
-        mapping = self.get_all_mapping()
-        mapping[keycode - self.min_keycode][0] = keysym
-        with display_manager(self) as dm:
-            mapping[keycode - self.min_keycode][keyidx] = keysym
-            dm.change_keyboard_mapping(keycode, mapping[keycode - self.min_keycode: keycode - self.min_keycode + 1])
-            self._update_register_mapping(keysym, keycode, keyidx)
-
-        return keycode, keyidx
+    def _spare_slots(self, owned=()):
+        """
+        Free slots in the local mirror: every level of the spare keycodes that are empty,
+        and the empty levels of the keycodes in owned (keycodes holding our registrations)
+        """
+        keymap = self._keymap
+        levels = min(self.slot_levels, len(keymap[0]))
+        for keycode in range(self.min_keycode + 128, self.max_keycode + 1):
+            row = keymap[keycode - self.min_keycode]
+            if keycode in owned:
+                for keyidx in range(levels):
+                    if not row[keyidx]:
+                        yield keycode, keyidx
+            elif not any(row):
+                for keyidx in range(levels):
+                    yield keycode, keyidx
+
+    def _holds(self, keysym, slot):
+        """Whether the local mirror has keysym at slot, i.e. no other client replaced our registration"""
+        keycode, keyidx = slot
+        row = self._keymap[keycode - self.min_keycode]
+        return keyidx < len(row) and row[keyidx] == keysym
+
+    def _slot_of(self, keysym):
+        """Slot of a registered keysym that is still in place, None otherwise"""
+        slot = self.slots.get(keysym) if self.slots is not None else None
+        if slot is not None and not self._holds(keysym, slot):
+            self.slots.discard(keysym)      # Replaced by another client
+            return None
+        return slot
+
+    def _level_state(self, keyidx):
+        """Modifier state selecting the keysym at index keyidx of a keycode"""
+        return (Xlib.X.ShiftMask if keyidx & 1 else 0) | (self._modifier_table().get(Key.alt_gr, 0) if keyidx & 2 else 0)
+
+    def _install(self, keysyms, protect=()):
+        """
+        Register keysyms on scratch slots with a single mapping request.
+        :param keysyms: Keysyms to register, none of them already registered
+        :param protect: Registered keysyms that must not be evicted to make room
+        :return: {keysym: (keycode, keyidx)} of the keysyms that could be registered
+        """
+        slots = self._slot_allocator()
+        keymap = self._keymap_rows()
+        rows = {}
+        installed = {}
+        for keysym in keysyms:
+            try:
+                (keycode, keyidx), evicted = slots.allocate(keysym, protect)
+            except KeyError:
+                break
+            row = rows.get(keycode) or list(keymap[keycode - self.min_keycode])
+            row[keyidx] = keysym
+            rows[keycode] = row
+            installed[keysym] = (keycode, keyidx)
+            if self.metrics is not None:
+                self.metrics.count('registrations')
+                if evicted is not None:
+                    self.metrics.count('evictions')
+        if rows:
+            self._change_keycodes(rows)
+        return installed
+
+    def prepare(self, text):
+        """
+        Register ahead of time every character of text the keyboard mapping cannot produce.
+        All of them are installed on scratch slots with one mapping request, so the other X
+        clients see a single MappingNotify instead of one per character.
+        :param text: Text about to be typed
+        :return: Number of keysyms registered
+        """
+        self._keymap_rows()
+        slots = self._slot_allocator()
+        needed = set()
+        missing = []
+        for char in dict.fromkeys(text):
+            if self.char_location(char) is not None or self.kmp.get(char):
+                continue
+            keysym = self.char_to_keysym(char)
+            if self._slot_of(keysym) is not None:
+                needed.add(keysym)
+            elif self._index_location(keysym) is None:
+                needed.add(keysym)
+                missing.append(keysym)
+        return len(self._install(missing, needed))
+
+    def _register(self, keysym):
+        """Register key on a free or least recently used slot. Usually called when content is Chinese"""
+        installed = self._install([keysym])
+        if keysym not in installed:
+            self.pro_raise(KeyError("No spare keys"))
+        return installed[keysym]
 
     def get_keycode(self, keysym, register=False):
         """Convert symbol code keysym to key code keycode"""
-        keycode = self.keysym_to_keycode(keysym)
-        if keycode:
-            try:
-                all_kb = self.get_all_mapping()
-                keyidx = all_kb[keycode - self.min_keycode].index(keysym)
-                return keycode, keyidx
-            except ValueError:
-                return keycode, 0
+        self._keymap_rows()
+        slot = self._slot_of(keysym)
+        if slot is not None:
+            if self.metrics is not None:
+                self.metrics.count('slot_hits')
+            return slot
 
-        if keysym in self.register_mapping:     # Find this key in registered ones
-            return self.register_mapping[keysym]['keycode'], self.register_mapping[keysym]['keyidx']
-
-        for keycode, mapping in enumerate(self.get_all_mapping()):      # Find this key in keyboard mapping
-            if mapping[0] == keysym:
-                return keycode + self.min_keycode, 0
-            elif mapping[1] == keysym:
-                return keycode + self.min_keycode, 1
+        location = self._index_location(keysym)
+        if location is not None:
+            return location
 
         if register:        # Key not found, register it
-            keycode, keyidx = self._register(keysym, *self.get_void_keycode())
-            return keycode, keyidx
+            return self._register(keysym)
         return None, None
 
+    @property
+    def clipboard(self):
+        """Clipboard on this display, with its own connection, opened on first use"""
+        if self._clipboard is None:
+            self._clipboard = Clipboard(self.connection.get_display_name())
+        return self._clipboard
+
+    def should_paste(self, text):
+        """
+        Whether pasting text would beat typing it: text is at least paste_threshold characters long,
+        or it has more characters missing from the layout than there are slots to register them
+        """
+        if len(text) >= self.paste_threshold:
+            return True
+        missing = sum(1 for char in set(text) if self.char_location(char) is None and not self.kmp.get(char))
+        return missing > self._slot_allocator().capacity
+
+    def paste(self, text, selections=('CLIPBOARD',), chord=None, restore=True, timeout=2.0):
+        """
+        Type text with one chord whatever its length: own the selections with text, press the paste
+        chord, and once the focused application fetched the text, give the previous contents back.
+        The previous contents are served as text by this KeyBoard's clipboard until another client
+        takes the selection or the KeyBoard is closed.
+        :param text: Text to paste
+        :param selections: Selections to own, CLIPBOARD and/or PRIMARY
+        :param chord: Keys pressed together to paste, paste_chord by default
+        :param restore: Give the previous contents back, else keep serving text
+        :param timeout: Seconds to wait for the application to fetch the text
+        :return: True when the application fetched the text before timeout
+        """
+        clipboard = self.clipboard
+        previous = {selection: clipboard.read(selection) for selection in selections} if restore else {}
+        generation = clipboard.own(text, selections)
+        self.play(self.compile(tuple(chord or self.paste_chord)))
+        deadline = time.monotonic() + timeout
+        served = any(clipboard.wait(selection, generation, max(deadline - time.monotonic(), 0))
+                     for selection in selections)
+        for selection, contents in previous.items():
+            if contents is not None:
+                clipboard.own(contents, (selection,))
+            else:
+                clipboard.disown((selection,))
+        return served
+
+    def slot_stats(self):
+        """Hit, miss and eviction counts of the scratch slots used to register keysyms"""
+        return self._slot_allocator().stats()
+
     @staticmethod
     def char_to_keysym(char):
         """
@@ -266,46 +532,22 @@ class KeyBoard(Display):
 
     def clear_keycode(self, keycode):
         """Clear a key"""
-        mapping = self.get_all_mapping()
-        max_num = len(mapping[keycode - self.min_keycode])
-        with display_manager(self) as dm:
-            mapping[keycode - self.min_keycode] = [0 for i in range(max_num)]
-            dm.change_keyboard_mapping(keycode, mapping[keycode - self.min_keycode: keycode - self.min_keycode + 1])
+        row = self._keymap_rows()[keycode - self.min_keycode]
+        self._change_mapping(keycode, [[0] * len(row)])
 
     def clear_mapping(self):
         """
         Clear all registered keys
         """
-        if self.register_mapping:
-            mapping = self.get_all_mapping()
-            del_list = []
-            with display_manager(self) as dm:
-                for keysym, data in self.register_mapping.items():
-                    mapping[data['keycode'] - self.min_keycode] = [0 for i in range(7)]
-                    dm.change_keyboard_mapping(data['keycode'], mapping[data['keycode'] - self.min_keycode: data['keycode'] - self.min_keycode + 1])
-                    del_list.append(keysym)
-
-            for k in del_list:
-                del self.register_mapping[k]
-
-    def pro_raise(self, ex):
-        """Raise exception"""
-        self.close()
-        raise ex
+        if self.slots:
+            width = len(self._keymap_rows()[0])
+            self._change_keycodes({keycode: [0] * width for keycode, keyidx in self.slots.clear()})
 
     def close(self):
+        super().close()
+        if self._clipboard is not None:
+            self._clipboard.close()
         try:
-            self.reset_keyboard()       # Release all keys
-        except Exception as e:
-            pass
-
-        try:
-            self.clear_mapping()        # Clear all registered keys
-        except Exception as e:
-            pass
-
-        try:
-            self.display.close()
-            self.closed = True
+            self.connection.close()
         except Xlib.error.ConnectionClosedError:
             pass
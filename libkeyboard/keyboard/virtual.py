@@ -0,0 +1,35 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+KeyBoard without a display.
+Every key resolves to itself: a character to (char, is_press) and a named key to
+(name, is_press), so events can be checked by a test or dropped by NullBackend while the
+front end (state tracking, batching, plans, pacing) runs exactly as it does on a display.
+"""
+
+from ._frontend import KeyBoardBase
+from .backend import RecordingBackend
+
+
+class KeyBoard(KeyBoardBase):
+    """
+    Virtual keyboard delivering (key, is_press) events to a backend.
+    :param display: Unused, keeps the signature of the platform versions
+    :param backend: Backend the events are delivered to, a RecordingBackend by default
+    """
+
+    def __init__(self, display=None, backend=None):
+        super().__init__(backend if backend is not None else RecordingBackend())
+
+    @classmethod
+    def _key_code(cls, member):
+        return member.name
+
+    @staticmethod
+    def char_to_keysym(char):
+        return char
+
+    def _resolve(self, key, _key, keysym, register):
+        return ((keysym, True),), ((keysym, False),)
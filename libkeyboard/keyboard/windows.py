@@ -6,15 +6,16 @@ Simulated keyboard implementation under Windows.
 Keeps function names and calling methods consistent with the original Xlib version.
 """
 
+import sys
 import ctypes
-import contextlib
-import time
 from ctypes import wintypes
-from ..keyboard import Key, NORMAL_MODIFIERS
+from ..keyboard import Key
 from .keyboard_mapping_win import keyboardMapping as kmp
+from ._frontend import KeyBoardBase
+from .backend import Backend
 
 # Win32 Constants
-USER32 = ctypes.windll.user32
+USER32 = ctypes.windll.user32 if sys.platform == 'win32' else None
 
 # INPUT structure and substructure definitions
 PUL = ctypes.POINTER(ctypes.c_ulong)
@@ -56,37 +57,165 @@ VK_CONTROL = 0x11
 VK_MENU = 0x12  # Alt
 VK_LWIN = 0x5B
 VK_RMENU = 0xA5  # AltGr (often VK_RMENU)
-# helper to send input
 
+# Names in kmp of the Key members not named the same
+KMP_NAMES = {
+    'alt_l': 'altleft',
+    'alt_r': 'altright',
+    'alt_gr': 'altright',
+    'caps_lock': 'capslock',
+    'cmd': 'winleft',
+    'cmd_l': 'winleft',
+    'cmd_r': 'winright',
+    'ctrl_l': 'ctrlleft',
+    'ctrl_r': 'ctrlright',
+    'shift_l': 'shiftleft',
+    'shift_r': 'shiftright',
+    'page_down': 'pgdn',
+    'page_up': 'pgup',
+    'menu': 'apps',
+    'num_lock': 'numlock',
+    'print_screen': 'printscreen',
+    'scroll_lock': 'scrolllock',
+}
+
+# VK of the media keys, missing from kmp
+MEDIA_VK = {
+    'media_volume_mute': 0xAD,
+    'media_volume_down': 0xAE,
+    'media_volume_up': 0xAF,
+    'media_next': 0xB0,
+    'media_previous': 0xB1,
+    'media_play_pause': 0xB3,
+}
+
+# Largest number of events handed to a single SendInput call
+MAX_INPUT_EVENTS = 1024
+
+
+class InputBuffer:
+    """
+    Keyboard events collected into one reusable INPUT array and submitted with as few
+    SendInput calls as possible, so a whole string reaches the input queue in one piece.
+    :param user32: Object providing SendInput, USER32 by default (tests pass a stand-in)
+    :param max_events: Largest number of events given to one SendInput call
+    """
 
-def _send_vk(vk, is_keyup):
-    inp = INPUT()
-    inp.type = INPUT_KEYBOARD
-    flags = 0
-    if is_keyup:
-        flags |= KEYEVENTF_KEYUP
-    inp.union.ki = KEYBDINPUT(wVk=vk, wScan=0, dwFlags=flags, time=0, dwExtraInfo=None)
-    ctypes.windll.user32.SendInput(1, ctypes.byref(inp), ctypes.sizeof(inp))
+    def __init__(self, user32=None, max_events=MAX_INPUT_EVENTS):
+        self.user32 = user32 or USER32
+        self.max_events = max_events
+        self.events = []                # [(wVk, wScan, dwFlags)] not submitted yet
+        self.array = (INPUT * max_events)()
+        self._shift_up = None           # Index of a trailing shift release that may still be dropped
 
+    def __enter__(self):
+        return self
 
-def _send_unicode(ch, is_keyup):
-    """Send unicode character (fallback)"""
-    inp = INPUT()
-    inp.type = INPUT_KEYBOARD
-    flags = KEYEVENTF_UNICODE
-    if is_keyup:
-        flags |= KEYEVENTF_KEYUP
-    inp.union.ki = KEYBDINPUT(wVk=0, wScan=ord(ch), dwFlags=flags, time=0, dwExtraInfo=None)
-    ctypes.windll.user32.SendInput(1, ctypes.byref(inp), ctypes.sizeof(inp))
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    def __len__(self):
+        return len(self.events)
 
+    def send(self, events):
+        """Queue resolved events, (is_vk, VK code or character, is_keyup) tuples"""
+        for is_vk, code, is_keyup in events:
+            if is_vk:
+                self.add_vk(code, is_keyup)
+            else:
+                self.add_unicode(code, is_keyup)
 
-class KeyBoard:
+    def close(self):
+        self.flush()
+
+    def add_vk(self, vk, is_keyup):
+        if vk == VK_SHIFT:
+            if not is_keyup and self._shift_up is not None:
+                # Shift was released and only key releases followed: keep it held instead
+                del self.events[self._shift_up]
+                self._shift_up = None
+                return
+            if is_keyup:
+                self._shift_up = len(self.events)
+        elif not is_keyup:
+            self._shift_up = None
+        self._add(vk, 0, KEYEVENTF_KEYUP if is_keyup else 0)
+
+    def add_unicode(self, ch, is_keyup):
+        self._shift_up = None
+        flags = KEYEVENTF_UNICODE | (KEYEVENTF_KEYUP if is_keyup else 0)
+        data = ch.encode('utf-16-le')
+        for i in range(0, len(data), 2):        # Characters outside the BMP are sent as surrogate pairs
+            self._add(0, data[i] | data[i + 1] << 8, flags)
+
+    def _add(self, vk, scan, flags):
+        self.events.append((vk, scan, flags))
+        if len(self.events) >= self.max_events and self._shift_up is None:
+            self.flush()
+
+    def flush(self):
+        """
+        Submit the queued events. When SendInput inserts only part of a chunk (e.g. another
+        thread blocked input), submission resumes at the first event that was not inserted.
+        :return: Number of events inserted
+        """
+        events, self.events = self.events, []
+        self._shift_up = None
+        size = ctypes.sizeof(INPUT)
+        sent = 0
+        while sent < len(events):
+            count = min(len(events) - sent, self.max_events)
+            for i in range(count):
+                vk, scan, flags = events[sent + i]
+                ki = self.array[i].union.ki
+                self.array[i].type = INPUT_KEYBOARD
+                ki.wVk = vk
+                ki.wScan = scan
+                ki.dwFlags = flags
+                ki.time = 0
+            inserted = self.user32.SendInput(count, self.array, size)
+            if inserted <= 0:
+                raise OSError("SendInput inserted %d of %d events, input is blocked" % (sent, len(events)))
+            sent += inserted
+        return sent
+
+
+class WindowsBackend(Backend):
+    """
+    Backend submitting events with SendInput, a whole send() or batch per call where possible
+    :param user32: Object providing SendInput, USER32 by default (tests pass a stand-in)
+    :param max_events: Largest number of events given to one SendInput call
+    """
+
+    def __init__(self, user32=None, max_events=MAX_INPUT_EVENTS):
+        self.user32 = user32 or USER32
+        self.max_events = max_events
+
+    def send(self, events):
+        buffer = InputBuffer(self.user32, self.max_events)
+        buffer.send(events)
+        buffer.flush()
+
+    def batch(self, window=None):
+        return InputBuffer(self.user32, window or self.max_events)
+
+
+class KeyBoard(KeyBoardBase):
     """
     KeyBoard class implemented for Windows.
     Method names and behaviors are consistent with the Xlib version for easy replacement.
     """
 
-    def __init__(self):
+    max_events = MAX_INPUT_EVENTS       # Largest number of events given to one SendInput call
+
+    def __init__(self, display=None, user32=None, backend=None):
+        """
+        :param display: Unused, keeps the signature of the Xlib version
+        :param user32: Object providing SendInput, USER32 by default (tests pass a stand-in)
+        :param backend: Backend the events are delivered to, a WindowsBackend on user32 by default
+        """
+        self.user32 = user32 or USER32
+        super().__init__(backend if backend is not None else WindowsBackend(self.user32, self.max_events))
         # Windows does not need a Display object, but retains the same attributes
         self.min_keycode = 0
         self.max_keycode = 0xFF
@@ -96,189 +225,41 @@ class KeyBoard:
         self.release_event = 'keyup'
         self.ctrl_press = 'keydown'
         self.ctrl_release = 'keyup'
-        self.register_mapping = {}      # {keysym: {keycode: 1, keyidx: 0}} Registered keyboard mapping table (logical record)
-        self.event_mapping = {}         # {keysym: {keycode: 1, keyidx: 0, count: 1}} Number of times pressed
-        self.modifiers = set()
-        self.closed = False
-
-    def __enter__(self):
-        return self
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
 
-    def __del__(self):
-        try:
-            if not self.closed:
-                self.close()
-        except Exception:
-            pass
+    @classmethod
+    def _key_code(cls, member):
+        """VK of a Key member. On Windows, a keysym is a VK (up to 0xFF) or a unicode ordinal"""
+        if member.name in MEDIA_VK:
+            return MEDIA_VK[member.name]
+        return kmp.get(KMP_NAMES.get(member.name, member.name))
 
-    def key_to_keysym(self, key):
-        """Keep original method signature: return (_key, keysym).
-        On Windows, we agree that keysym is a virtual key code (VK) or unicode ordinal (>0xFFFF used as unicode)."""
-        _key = None
-        keysym = None
-        if key.lower() in ('ps', 'printscreen', 'print screen'):
-            key = 'print_screen'
-        if hasattr(Key, key.lower()):
-            _key = getattr(Key, key.lower()).value
-            # Assume value has vk field or is VK
-            try:
-                keysym = _key.vk
-            except Exception:
-                # Compatibility: if value itself is int
-                keysym = int(_key)
-        elif key in ("\n", "\r"):
-            _key = Key.enter.value
-            try:
-                keysym = _key.vk
-            except Exception:
-                keysym = int(_key)
-        elif key == "\t":
-            _key = Key.Tab.value
-            try:
-                keysym = _key.vk
-            except Exception:
-                keysym = int(_key)
-        elif key.lower() in {'win', 'cmd', 'winleft'}:
-            try:
-                keysym = Key.cmd.value.vk
-                _key = Key.cmd.value
-            except Exception:
-                keysym = VK_LWIN
-                _key = None
-        elif key in kmp:
-            # kmp should store Windows VK or scan code, return directly
-            keysym = kmp.get(key)
-            _key = None
-        elif len(key) != 1:
-            self.pro_raise(Exception("Character length must be 1"))
-        else:
-            # Return unicode ordinal for using KEYEVENTF_UNICODE path
-            keysym = ord(key)
-            _key = None
-        return _key, keysym
-
-    def _update_modifiers(self, key, is_press):
-        """Record when key is ctrl, shift, alt. key here is Key.x.value (or similar)."""
-        # Use NORMAL_MODIFIERS mapping to maintain consistency
-        if NORMAL_MODIFIERS.get(key, None):
-            if is_press:
-                self.modifiers.add(key)
-            else:
-                try:
-                    self.modifiers.remove(key)
-                except KeyError:
-                    pass
+    @classmethod
+    def _key_names(cls):
+        return kmp
 
-    def press(self, key, register=False):
+    @staticmethod
+    def _code_events(code, is_keyup):
+        """Event of a VK code (up to 0xFF), of a character, or of a unicode ordinal"""
+        if isinstance(code, int) and code <= 0xFF:
+            return True, code, is_keyup
+        if isinstance(code, int):
+            return False, chr(code), is_keyup
+        return False, str(code)[0], is_keyup
+
+    def _resolve(self, key, _key, keysym, register):
         """
-        Press a key
-        :param key: Keyboard key
-        :param register: Keep consistent with Xlib version interface, but Windows does not need dynamic registration. Only true when writing Chinese.
+        Events of key: hotkeys of kmp by VK (holding shift for shifted characters),
+        other keys by VK when keysym is one, else as unicode input.
+        Windows does not need dynamic registration, register is ignored.
         """
-        _key, keysym = self.key_to_keysym(key)
-        if _key is not None:
-            self._update_modifiers(_key, True)
-
-        # kmp hotkeys first
-        if kmp.get(key) is not None:
-            vk = kmp.get(key)
-            # Determine if shift is needed (consistent with original logic)
-            needshift = True if (len(key) == 1 and key.isupper()) or key in '~!@#$%^&*()_+{}|:"<>?' else False
-            if needshift:
-                _send_vk(VK_SHIFT, False)
-            # Send press
-            if isinstance(vk, int):
-                _send_vk(int(vk), False)
-            else:
-                # If mapping returns string or unicode
-                if isinstance(vk, str) and len(vk) == 1:
-                    _send_unicode(vk, False)
-                else:
-                    try:
-                        _send_vk(int(vk), False)
-                    except Exception:
-                        _send_unicode(str(vk), False)
-            if needshift:
-                _send_vk(VK_SHIFT, True)
-            keycode = vk
-            keyidx = 0
-        else:
-            # If keysym <= 0xFFFF and not printable VK, treat as VK, else use unicode
-            if isinstance(keysym, int) and keysym <= 0xFF:
-                # treat as VK
-                keycode = keysym
-                keyidx = 0
-                _send_vk(keycode, False)
-            elif isinstance(keysym, int) and keysym <= 0xFFFF:
-                # May be ASCII/unicode ordinal, send using unicode
-                keycode = keysym
-                keyidx = 0
-                _send_unicode(chr(keysym), False)
-            else:
-                # Fallback: try converting to int vk, otherwise treat as unicode char
-                try:
-                    vk = int(keysym)
-                    keycode = vk
-                    keyidx = 0
-                    _send_vk(vk, False)
-                except Exception:
-                    # unicode fallback
-                    ch = chr(keysym) if isinstance(keysym, int) else str(keysym)
-                    keycode = ord(ch[0])
-                    keyidx = 0
-                    _send_unicode(ch[0], False)
-
-        self.sync()
-        # Record event
-        if keysym in self.event_mapping:
-            self.event_mapping[keysym]['count'] += 1
-        else:
-            self.event_mapping[keysym] = {"keycode": keycode, "keyidx": keyidx, "count": 1}
-
-    def release(self, key):
-        """Release a key"""
-        _key, keysym = self.key_to_keysym(key)
-        if _key is not None:
-            self._update_modifiers(_key, False)
-
-        if kmp.get(key) is not None:
-            vk = kmp.get(key)
-            if isinstance(vk, int):
-                _send_vk(int(vk), True)
-            else:
-                # unicode or string, keyup using unicode
-                if isinstance(vk, str) and len(vk) == 1:
-                    _send_unicode(vk, True)
-                else:
-                    try:
-                        _send_vk(int(vk), True)
-                    except Exception:
-                        _send_unicode(str(vk), True)
-        elif keysym in self.event_mapping:
-            keycode = self.event_mapping[keysym]["keycode"]
-            # Distinguish unicode from VK. We used raw form of keycode when recording
-            if isinstance(keycode, int) and keycode <= 0xFF:
-                _send_vk(int(keycode), True)
-            else:
-                # unicode
-                try:
-                    _send_unicode(chr(keycode), True)
-                except Exception:
-                    # Try releasing as VK
-                    try:
-                        _send_vk(int(keycode), True)
-                    except Exception:
-                        pass
-
-        self.sync()
-        # Clear event record
-        if keysym in self.event_mapping:
-            self.event_mapping[keysym]["count"] -= 1
-            if self.event_mapping[keysym]["count"] == 0:
-                del self.event_mapping[keysym]
+        vk = kmp.get(key)
+        if vk is None:
+            return (self._code_events(keysym, False),), (self._code_events(keysym, True),)
+        down = [self._code_events(vk, False)]
+        # Determine if shift is needed (consistent with original logic)
+        if (len(key) == 1 and key.isupper()) or key in '~!@#$%^&*()_+{}|:"<>?':
+            down = [(True, VK_SHIFT, False)] + down + [(True, VK_SHIFT, True)]
+        return down, (self._code_events(vk, True),)
 
     def _shift_statue(self, modifiers):
         """Keep interface. Return key mask. Windows does not use this value, but keeps compatibility."""
@@ -297,99 +278,14 @@ class KeyBoard:
             pass
         return mask
 
-    def reset_keyboard(self):
-        """Reset keyboard, release all keys"""
-        # Iterate event_mapping and release all pressed keys
-        for keysym, data in list(self.event_mapping.items()):
-            keycode, keyidx, count = data["keycode"], data["keyidx"], data["count"]
-            if count > 0:
-                for _ in range(count):
-                    if isinstance(keycode, int) and keycode <= 0xFF:
-                        _send_vk(int(keycode), True)
-                    else:
-                        try:
-                            _send_unicode(chr(keycode), True)
-                        except Exception:
-                            try:
-                                _send_vk(int(keycode), True)
-                            except Exception:
-                                pass
-                data['count'] = 0
-        self.event_mapping = {}
-
-    def _send_event(self, event, keycode, keyidx=0):
-        """Compatible with original interface, but calls SendInput directly in Windows"""
-        # event parameter is not used in Windows implementation, keep signature
-        # keycode: VK or unicode ordinal
-        if isinstance(keycode, int) and keycode <= 0xFF:
-            # key down
-            _send_vk(int(keycode), False) if event in (self.press_event, self.ctrl_press, 'keydown') else _send_vk(int(keycode), True)
-        else:
-            # unicode
-            try:
-                ch = chr(keycode) if isinstance(keycode, int) else str(keycode)
-                _send_unicode(ch[0], False) if event in (self.press_event, self.ctrl_press, 'keydown') else _send_unicode(ch[0], True)
-            except Exception:
-                pass
-
-    @property
-    @contextlib.contextmanager
-    def _modifiers(self):
-        # Convert active modifiers in NORMAL_MODIFIERS to VK list
-        vals = set()
-        for mod in self.modifiers:
-            v = NORMAL_MODIFIERS.get(mod, None)
-            if v is not None:
-                vals.add(v)
-        yield vals
-
     def get_all_mapping(self):
         """No equivalent keyboard mapping under Windows. Return empty list for compatibility."""
         return []
 
-    def get_void_keycode(self):
-        """Windows does not support dynamic registration of keyboard mapping. Raise exception or return a default value."""
-        # Simply return 0xFF as placeholder
-        return 0xFF, 0
-
-    def _update_register_mapping(self, keysym, keycode, keyidx):
-        """Modify registered keyboard mapping table (logical record only)"""
-        _temp = None
-        for _keysym, data in list(self.register_mapping.items()):
-            if data["keycode"] == keycode and data["keyidx"] == keyidx:
-                if keysym == _keysym:
-                    _temp = _keysym
-                    break
-        if _temp:
-            del self.register_mapping[_temp]
-        self.register_mapping[keysym] = {"keycode": keycode, "keyidx": keyidx}
-
-    def _register(self, keysym, keycode, keyidx):
-        """Windows does not need to register key values at the system level. Just record locally and return."""
-        self._update_register_mapping(keysym, keycode, keyidx)
-        return keycode, keyidx
-
     def get_keycode(self, keysym, register=False):
-        """Symbol code keysym to key code keycode. Windows returns keysym directly (if it is VK or unicode), otherwise tries to read from register_mapping."""
-        # If keysym is already int and exists in register_mapping, return
-        try:
-            if isinstance(keysym, int):
-                # Prefer returning registered info
-                if keysym in self.register_mapping:
-                    entry = self.register_mapping[keysym]
-                    return entry['keycode'], entry['keyidx']
-                # Treat keysym directly as keycode
-                return keysym, 0
-        except Exception:
-            pass
-
-        # Search register_mapping
-        if keysym in self.register_mapping:
-            return self.register_mapping[keysym]['keycode'], self.register_mapping[keysym]['keyidx']
-
-        if register:
-            kc, ki = self._register(keysym, *self.get_void_keycode())
-            return kc, ki
+        """Symbol code keysym to key code keycode. Windows sends keysym directly (VK or unicode ordinal)."""
+        if isinstance(keysym, int):
+            return keysym, 0
         return None, None
 
     @staticmethod
@@ -403,19 +299,12 @@ class KeyBoard:
     def clear_keycode(self, keycode):
         pass
 
-    def clear_mapping(self):
-        pass
-
-    def pro_raise(self, ex):
-        self.close()
-        raise ex
-
-    def close(self):
-        try:
-            self.reset_keyboard()
-        except Exception:
-            pass
-        self.closed = True
-
-    def sync(self):
-        pass
+    def target_class(self):
+        """Class name of the foreground window, None if unknown"""
+        if self.user32 is None:
+            return None
+        hwnd = self.user32.GetForegroundWindow()
+        name = ctypes.create_unicode_buffer(256)
+        if hwnd and self.user32.GetClassNameW(hwnd, name, 256):
+            return name.value
+        return None
@@ -0,0 +1,197 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+Counters and latency histograms kept by every KeyBoard.
+KeyBoard.stats() returns those of one KeyBoard; snapshot(), to_json() and to_prometheus()
+export the aggregate of the whole process (open KeyBoards plus the ones already closed).
+Set LIBKEYBOARD_METRICS=0, or call disable(), to create KeyBoards without metrics: their
+`metrics` attribute is then None and every instrumentation point is skipped by a single test.
+"""
+
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+import weakref
+
+COUNTERS = (
+    'events',               # Key events handed to the backend
+    'sends',                # Deliveries outside a batch, a round trip each on X
+    'batches',              # Batches ended, see KeyBoard.batch()
+    'syncs',                # Explicit KeyBoard.sync() calls
+    'round_trips',          # Requests waiting for a reply from the X server
+    'mapping_changes',      # change_keyboard_mapping requests
+    'registrations',        # Keysyms registered on a scratch slot
+    'evictions',            # Registrations that replaced another keysym
+    'slot_hits',            # Lookups served by a registered keysym
+    'plan_hits',            # compile() served by the plan cache
+    'plan_misses',          # compile() resolving a new plan
+    'jobs',                 # Jobs sent by a Sender
+    'coalesced_batches',    # Sender batches made of several waiting jobs
+)
+
+# Upper bounds in seconds of the histogram buckets, the last one catches everything else
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+enabled = os.environ.get('LIBKEYBOARD_METRICS', '1') != '0'
+
+
+class Histogram(object):
+    """Latencies counted in BUCKETS, Prometheus style"""
+
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+        self.count += other.count
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "buckets": dict(zip([str(bound) for bound in BUCKETS] + ['+Inf'], self.counts)),
+        }
+
+
+class Metrics(object):
+    """Counters (see COUNTERS) and per operation latency histograms of one KeyBoard"""
+
+    def __init__(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.histograms = {}        # {operation: Histogram}
+        self.retired = False
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, operation, seconds):
+        histogram = self.histograms.get(operation)
+        if histogram is None:
+            histogram = self.histograms[operation] = Histogram()
+        histogram.observe(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, operation):
+        """Observe the duration of the block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(operation, time.perf_counter() - start)
+
+    def merge(self, other):
+        for name, value in other.counters.items():
+            self.count(name, value)
+        for operation, histogram in other.histograms.items():
+            self.histograms.setdefault(operation, Histogram()).merge(histogram)
+
+    def snapshot(self):
+        return {
+            "counters": dict(self.counters),
+            "histograms": {operation: histogram.snapshot() for operation, histogram in self.histograms.items()},
+        }
+
+    def retire(self):
+        """Fold these metrics into the process aggregate, once, when their KeyBoard is closed"""
+        with _lock:
+            if self.retired:
+                return
+            self.retired = True
+            _live.discard(self)
+            _closed.merge(self)
+
+
+_lock = threading.Lock()
+_live = weakref.WeakSet()       # Metrics of the open KeyBoards
+_closed = Metrics()             # Sum of the metrics of the closed KeyBoards
+
+
+def new():
+    """Metrics for a new KeyBoard, None when metrics are disabled"""
+    if not enabled:
+        return None
+    metrics = Metrics()
+    with _lock:
+        _live.add(metrics)
+    return metrics
+
+
+def enable():
+    """Keep metrics in the KeyBoards created from now on"""
+    global enabled
+    enabled = True
+
+
+def disable():
+    """Create KeyBoards without metrics from now on"""
+    global enabled
+    enabled = False
+
+
+def timer(metrics, operation):
+    """metrics.timer(operation), or a context doing nothing when metrics is None"""
+    if metrics is None:
+        return _untimed
+    return metrics.timer(operation)
+
+
+_untimed = contextlib.nullcontext()
+
+
+def aggregate():
+    """:return: Metrics summing every KeyBoard of the process"""
+    total = Metrics()
+    with _lock:
+        total.merge(_closed)
+        for metrics in list(_live):
+            total.merge(metrics)
+    return total
+
+
+def snapshot(metrics=None):
+    """
+    :param metrics: Metrics to export, the process aggregate by default
+    :return: {"counters": {name: value}, "histograms": {operation: {"count", "sum", "buckets"}}}
+    """
+    return (metrics if metrics is not None else aggregate()).snapshot()
+
+
+def to_json(metrics=None):
+    """snapshot() as a JSON document"""
+    return json.dumps(snapshot(metrics), sort_keys=True)
+
+
+def to_prometheus(metrics=None, prefix='libkeyboard'):
+    """snapshot() in the Prometheus text exposition format"""
+    data = snapshot(metrics)
+    lines = []
+    for name, value in sorted(data["counters"].items()):
+        lines.append("# TYPE %s_%s_total counter" % (prefix, name))
+        lines.append("%s_%s_total %d" % (prefix, name, value))
+    if data["histograms"]:
+        name = prefix + "_operation_seconds"
+        lines.append("# TYPE %s histogram" % name)
+        for operation, histogram in sorted(data["histograms"].items()):
+            cumulative = 0
+            for bound, count in histogram["buckets"].items():
+                cumulative += count
+                lines.append('%s_bucket{operation="%s",le="%s"} %d' % (name, operation, bound, cumulative))
+            lines.append('%s_sum{operation="%s"} %r' % (name, operation, histogram["sum"]))
+            lines.append('%s_count{operation="%s"} %d' % (name, operation, histogram["count"]))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,219 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+Pacing of typed text.
+A Pacer schedules every character or chord on an absolute timeline (start + i * interval, or
+explicit deadlines), so the time spent sending events does not add up into drift. Waits sleep
+until shortly before the deadline and spin for the rest, which reaches sub-millisecond rates.
+"""
+
+import time
+
+
+class MonotonicClock(object):
+    """Wall clock used by default: perf_counter, time.sleep and a busy wait"""
+
+    def now(self):
+        return time.perf_counter()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def spin(self, deadline):
+        """Busy wait until deadline"""
+        while time.perf_counter() < deadline:
+            pass
+
+
+class VirtualClock(object):
+    """
+    Clock that only moves when told to, for deterministic pacing tests.
+    Sleeping and spinning advance it instantly.
+    :param start: Initial time in seconds
+    """
+
+    def __init__(self, start=0.0):
+        self.time = start
+
+    def now(self):
+        return self.time
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def spin(self, deadline):
+        self.time = max(self.time, deadline)
+
+    def advance(self, seconds):
+        """Let seconds pass, e.g. to simulate time spent sending events"""
+        self.time += max(seconds, 0.0)
+
+
+class Pacer(object):
+    """
+    Absolute schedule of the characters or chords of one typing job.
+    Mark i is due at start + i * interval, or at start + deadlines[i]; the first mark is
+    due at start, so nothing waits before the first character. A late mark does not shift
+    the following ones.
+    :param interval: Seconds between two marks
+    :param rate: Marks (characters or chords) per second, instead of interval
+    :param deadlines: Offsets in seconds from the start of each mark, instead of a fixed interval.
+                      Marks past the end follow the last deadline every interval seconds
+    :param clock: Clock to read and wait on, MonotonicClock() by default
+    :param spin: Seconds before a deadline when sleeping stops and busy waiting begins
+    """
+
+    def __init__(self, interval=0.0, rate=None, deadlines=None, clock=None, spin=0.002):
+        self.interval = 1.0 / rate if rate else interval
+        self.deadlines = list(deadlines) if deadlines is not None else None
+        self.clock = clock if clock is not None else MonotonicClock()
+        self.spin = spin
+        self.origin = None              # Clock time of mark 0, set by start()
+        self.index = 0                  # Number of marks scheduled
+        self.deadline = None            # Clock time of the latest scheduled mark
+        self.marks = 0                  # Number of marks reached
+        self.total_error = 0.0          # Sum of mark lateness, in seconds
+        self.max_error = 0.0
+
+    def start(self):
+        """Start the schedule now. Called by the first next() when not called before"""
+        self.origin = self.clock.now()
+        self.index = 0
+
+    def offset(self, index):
+        """Offset of mark index from the start, in seconds"""
+        if self.deadlines is None:
+            return index * self.interval
+        if index < len(self.deadlines):
+            return self.deadlines[index]
+        last = self.deadlines[-1] if self.deadlines else 0.0
+        return last + (index - len(self.deadlines) + 1) * self.interval
+
+    def next(self):
+        """Schedule the next mark. :return: Its deadline, in clock time"""
+        if self.origin is None:
+            self.start()
+        self.deadline = self.origin + self.offset(self.index)
+        self.index += 1
+        return self.deadline
+
+    def mark(self):
+        """Record that the latest scheduled mark has been reached now"""
+        error = max(self.clock.now() - self.deadline, 0.0)
+        self.marks += 1
+        self.total_error += error
+        self.max_error = max(self.max_error, error)
+
+    def wait(self):
+        """Wait for the deadline of the next mark: sleep, then spin for the last `spin` seconds"""
+        deadline = self.next()
+        remaining = deadline - self.clock.now()
+        if remaining > self.spin:
+            self.clock.sleep(remaining - self.spin)
+        self.clock.spin(deadline)
+        self.mark()
+
+    def set_interval(self, interval):
+        """Change the interval from the latest mark on, keeping the schedule absolute from there"""
+        if self.deadline is not None:
+            self.origin = self.deadline
+            self.index = 1
+            self.deadlines = None
+        self.interval = interval
+
+    def due(self):
+        """Whether a delivery round trip should be measured now, see AdaptivePacer"""
+        return False
+
+    def stats(self):
+        """Pacing error of the job: how late marks were reached, in seconds"""
+        elapsed = self.clock.now() - self.origin if self.origin is not None else 0.0
+        return {
+            "marks": self.marks,
+            "mean_error": self.total_error / self.marks if self.marks else 0.0,
+            "max_error": self.max_error,
+            "elapsed": elapsed,
+            "rate": (self.marks - 1) / elapsed if self.marks > 1 and elapsed > 0 else 0.0,
+        }
+
+
+learned_rates = {}      # {target window class: rate in marks per second} learned by AdaptivePacer
+
+
+class AdaptivePacer(Pacer):
+    """
+    Pacer finding the highest rate the target keeps up with.
+    Every probe_every marks a round trip to the server is timed: while its latency stays close
+    to the lowest seen, the rate doubles (then, after the first back off, grows by `increase`);
+    when it rises, the rate is cut by `decrease`. The rate reached is remembered per target
+    window class in learned_rates and used as the starting rate next time.
+    :param probe: Callable doing a round trip (e.g. KeyBoard.sync), None to feed observe() yourself
+    :param target: Window class the rate is remembered for, None to not remember it
+    :param rate: Starting rate in marks per second, when nothing was learned for target
+    :param min_rate: Lowest rate
+    :param max_rate: Highest rate
+    :param probe_every: Number of marks between two round trips
+    :param tolerance: Latency above tolerance times the lowest latency, plus slack, means congestion
+    :param slack: Latency increase in seconds always tolerated
+    :param increase: Marks per second added after a round trip without congestion
+    :param decrease: Factor applied to the rate after a round trip with congestion
+    :param memory: Where learned rates are kept, learned_rates by default
+    """
+
+    def __init__(self, probe=None, target=None, rate=100.0, min_rate=5.0, max_rate=5000.0,
+                 probe_every=8, tolerance=2.0, slack=0.002, increase=20.0, decrease=0.5,
+                 memory=None, clock=None, spin=0.002):
+        self.memory = learned_rates if memory is None else memory
+        self.target = target
+        self.rate = min(max(self.memory.get(target, rate), min_rate), max_rate)
+        super(AdaptivePacer, self).__init__(rate=self.rate, clock=clock, spin=spin)
+        self.probe = probe
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.probe_every = probe_every
+        self.tolerance = tolerance
+        self.slack = slack
+        self.increase = increase
+        self.decrease = decrease
+        self.baseline = None            # Lowest round trip latency seen
+        self.slow_start = target not in self.memory
+        self.backoffs = 0
+
+    @classmethod
+    def for_keyboard(cls, keyboard, **kwargs):
+        """AdaptivePacer probing keyboard's connection, remembering the rate of the focused window's class"""
+        return cls(keyboard.sync, keyboard.target_class(), **kwargs)
+
+    def due(self):
+        return self.marks > 0 and self.marks % self.probe_every == 0
+
+    def wait(self):
+        super(AdaptivePacer, self).wait()
+        if self.probe is not None and self.due():
+            start = self.clock.now()
+            self.probe()
+            self.observe(self.clock.now() - start)
+
+    def observe(self, latency):
+        """Adjust the rate to the latency of a round trip, in seconds"""
+        if self.baseline is None or latency < self.baseline:
+            self.baseline = latency
+        if latency > self.baseline * self.tolerance + self.slack:
+            rate = self.rate * self.decrease
+            self.slow_start = False
+            self.backoffs += 1
+        elif self.slow_start:
+            rate = self.rate * 2
+        else:
+            rate = self.rate + self.increase
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        self.set_interval(1.0 / self.rate)
+        if self.target is not None:
+            self.memory[self.target] = self.rate
+
+    def stats(self):
+        stats = super(AdaptivePacer, self).stats()
+        stats.update(target=self.target, learned_rate=self.rate, backoffs=self.backoffs, baseline=self.baseline)
+        return stats
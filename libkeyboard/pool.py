@@ -0,0 +1,195 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+Pooled keyboard sessions.
+A KeyBoard is expensive to open (a new X connection) and to close (releasing keys and
+clearing registered keysyms), so the high-level functions borrow sessions from a pool
+that keeps one KeyBoard per display and per thread alive between calls.
+"""
+
+import atexit
+import contextlib
+import sys
+import threading
+import time
+
+if sys.platform == 'win32':
+    from .keyboard.windows import KeyBoard
+else:
+    from .keyboard.linux import KeyBoard
+
+
+class Session(object):
+    """
+    A logical keyboard session.
+    Sessions opened on the same pooled KeyBoard share its connection and registered keys,
+    but each keeps its own pressed keys and modifiers.
+    """
+
+    def __init__(self, keyboard, pool=None, key=None):
+        self.keyboard = keyboard
+        self.pool = pool
+        self.key = key                                  # Pool key (display, thread id)
+        self.state = keyboard._session_state()          # Pressed-key state of this session
+        self.closed = False
+        self._binding = False                           # Whether the state is installed on the KeyBoard
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.pool is not None:
+            self.pool.release(self)
+        else:
+            self.reset_keyboard()
+
+    def __getattr__(self, name):
+        # Everything that does not touch pressed-key state is served by the shared KeyBoard
+        return getattr(self.keyboard, name)
+
+    @contextlib.contextmanager
+    def _bound(self):
+        """Install this session's state on the shared KeyBoard for the duration of a call, calls nested in it keep it"""
+        if self._binding:
+            yield self.keyboard
+            return
+        self._binding = True
+        try:
+            with self.keyboard._swap_state(self.state) as kb:
+                yield kb
+        finally:
+            self._binding = False
+
+    @contextlib.contextmanager
+    def batch(self, window=None):
+        """Batch of the shared KeyBoard, see KeyBoard.batch(); the keys of the block are this session's"""
+        with self._bound() as kb, kb.batch(window) as batch:
+            yield batch
+
+    def compile(self, source, cache=True):
+        with self._bound() as kb:
+            return kb.compile(source, cache)
+
+    def play(self, plan, delay=0.0, pacer=None):
+        with self._bound() as kb:
+            return kb.play(plan, delay, pacer)
+
+    def paste(self, text, *args, **kwargs):
+        with self._bound() as kb:
+            return kb.paste(text, *args, **kwargs)
+
+    def press(self, key, register=False):
+        with self._bound() as kb:
+            kb.press(key, register)
+
+    def release(self, key):
+        with self._bound() as kb:
+            kb.release(key)
+
+    def reset_keyboard(self):
+        """Release all keys pressed in this session"""
+        if self.keyboard.closed:
+            return
+        with self._bound() as kb:
+            kb.reset_keyboard()
+
+
+class _PoolEntry(object):
+    def __init__(self, keyboard):
+        self.keyboard = keyboard
+        self.sessions = 0                   # Number of sessions currently borrowed
+        self.last_used = time.monotonic()
+
+
+class SessionPool(object):
+    """
+    Pool of KeyBoard connections keyed by (display, thread).
+    :param idle_timeout: Seconds an unused KeyBoard is kept open before it is closed
+    :param factory: Callable taking a display name and returning a new KeyBoard
+    """
+
+    def __init__(self, idle_timeout=60.0, factory=None):
+        self.idle_timeout = idle_timeout
+        self.factory = factory or KeyBoard
+        self._entries = {}          # {(display, thread_id): _PoolEntry}
+        self._lock = threading.Lock()
+
+    def acquire(self, display=None):
+        """
+        Borrow a session on the calling thread's connection to display.
+        :param display: Display name, None for the default display
+        :return: Session, to be given back with release() or used as a context manager
+        """
+        key = (display, threading.get_ident())
+        with self._lock:
+            self._evict(time.monotonic())
+            entry = self._entries.get(key)
+            if entry is None or entry.keyboard.closed:
+                entry = self._entries[key] = _PoolEntry(self.factory(display))
+            entry.sessions += 1
+            return Session(entry.keyboard, self, key)
+
+    def release(self, session):
+        """Give a session back to the pool, releasing every key it still holds"""
+        if session.closed:
+            return
+        try:
+            session.reset_keyboard()
+        finally:
+            session.closed = True
+            with self._lock:
+                entry = self._entries.get(session.key)
+                if entry is not None and entry.keyboard is session.keyboard:
+                    entry.sessions -= 1
+                    entry.last_used = time.monotonic()
+
+    def evict_idle(self):
+        """Close every KeyBoard that has been unused for longer than idle_timeout"""
+        with self._lock:
+            self._evict(time.monotonic())
+
+    def _evict(self, now):
+        for key, entry in list(self._entries.items()):
+            if entry.keyboard.closed:
+                del self._entries[key]
+            elif entry.sessions == 0 and now - entry.last_used >= self.idle_timeout:
+                del self._entries[key]
+                entry.keyboard.close()
+
+    def close_thread(self):
+        """Close the pooled KeyBoards of the calling thread, from the thread that uses them"""
+        thread_id = threading.get_ident()
+        with self._lock:
+            keys = [key for key in self._entries if key[1] == thread_id]
+            entries = [self._entries.pop(key) for key in keys]
+        for entry in entries:
+            try:
+                entry.keyboard.close()
+            except Exception:
+                pass
+
+    def close(self):
+        """Close every pooled KeyBoard"""
+        with self._lock:
+            entries, self._entries = self._entries, {}
+        for entry in entries.values():
+            try:
+                entry.keyboard.close()
+            except Exception:
+                pass
+
+
+default_pool = SessionPool()
+atexit.register(default_pool.close)
+
+
+def acquire(display=None):
+    """Borrow a session from the default pool"""
+    return default_pool.acquire(display)
+
+
+def release(session):
+    """Give a session back to the default pool"""
+    default_pool.release(session)
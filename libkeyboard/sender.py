@@ -0,0 +1,206 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+Thread-safe typing through a dedicated sender thread.
+A KeyBoard is not thread-safe: pressed keys, modifiers and registrations are plain attributes.
+A Sender gives many producer threads one queue instead; a single thread owns the KeyBoard and
+its connection and sends the jobs one after the other, so two strings never interleave.
+Unpaced jobs found waiting together are sent in one batch.
+"""
+
+import concurrent.futures
+import queue
+import sys
+import threading
+import time
+
+from . import metrics as _metrics
+
+if sys.platform == 'win32':
+    from .keyboard.windows import KeyBoard
+else:
+    from .keyboard.linux import KeyBoard
+
+_STOP = object()        # Queued by close() after the last job
+
+
+class _Job(object):
+    """One submitted string, chord or mix of both"""
+
+    __slots__ = ('source', 'delay', 'pacer', 'future', 'submitted')
+
+    def __init__(self, source, delay, pacer):
+        self.source = source
+        self.delay = delay
+        self.pacer = pacer
+        self.future = concurrent.futures.Future()
+        self.submitted = time.perf_counter()
+
+    @property
+    def paced(self):
+        return self.pacer is not None or self.delay > 0
+
+
+class Sender(object):
+    """
+    Queue of typing jobs sent by a single thread owning the KeyBoard.
+    Besides the KeyBoard's own metrics, the sender counts jobs and coalesced batches and keeps
+    a queue_wait histogram of the time jobs spent waiting in the queue.
+    :param display: Display name such as ":1", None for $DISPLAY
+    :param factory: Callable taking a display name and returning a new KeyBoard. It is called on
+                    the sender thread, again when a failed job closed the KeyBoard
+    :param max_queue: Number of waiting jobs before submit() blocks, 0 for no limit
+    :param coalesce: Largest number of waiting unpaced jobs sent together in one batch
+    """
+
+    def __init__(self, display=None, factory=None, max_queue=0, coalesce=64):
+        self.display = display
+        self.factory = factory or KeyBoard
+        self.coalesce = coalesce
+        self.queue = queue.Queue(max_queue)
+        self.metrics = _metrics.new()
+        self.max_depth = 0              # Largest queue depth seen
+        self.closed = False
+        self._keyboard = None           # Owned by the sender thread
+        self._carry = None              # Job taken off the queue that could not join the last batch
+        self._thread = threading.Thread(target=self._run, name='libkeyboard-sender', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def submit(self, source, delay=0.0, pacer=None, timeout=None):
+        """
+        Queue a typing job. Blocks while max_queue jobs are waiting.
+        :param source: Text, chord or list of both, see KeyBoard.compile()
+        :param delay: Interval between two characters or chords, in seconds
+        :param pacer: Pacer scheduling each character or chord, instead of delay
+        :param timeout: Seconds to wait for room in the queue, None to wait as long as needed
+        :return: concurrent.futures.Future of what KeyBoard.play() returns
+        :raise queue.Full: When the queue is still full after timeout
+        """
+        if self.closed:
+            raise RuntimeError("Sender is closed")
+        job = _Job(source, delay, pacer)
+        self.queue.put(job, timeout=timeout)
+        depth = self.queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return job.future
+
+    def write(self, text, delay=0.0, pacer=None, timeout=None):
+        """Queue typing text, see submit()"""
+        return self.submit(text, delay, pacer, timeout)
+
+    def group(self, *keys, timeout=None):
+        """Queue a key combination (e.g. ctrl+c), see submit()"""
+        return self.submit(tuple(keys), timeout=timeout)
+
+    def join(self):
+        """Wait until every job submitted so far has been sent"""
+        self.queue.join()
+
+    def depth(self):
+        """Number of jobs waiting in the queue"""
+        return self.queue.qsize()
+
+    def stats(self):
+        """Queue depth, the sender's metrics and the metrics of its KeyBoard (None when disabled)"""
+        keyboard = self._keyboard
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_depth,
+            "sender": self.metrics.snapshot() if self.metrics is not None else None,
+            "keyboard": keyboard.stats() if keyboard is not None else None,
+        }
+
+    def close(self, wait=True):
+        """
+        Stop accepting jobs, send the ones already queued, then close the KeyBoard.
+        :param wait: Wait for the sender thread to finish
+        """
+        if not self.closed:
+            self.closed = True
+            self.queue.put(_STOP)
+        if wait:
+            self._thread.join()
+
+    def _open(self):
+        if self._keyboard is None or self._keyboard.closed:
+            self._keyboard = self.factory(self.display)
+        return self._keyboard
+
+    def _next(self):
+        if self._carry is not None:
+            job, self._carry = self._carry, None
+            return job
+        return self.queue.get()
+
+    def _run(self):
+        try:
+            while True:
+                job = self._next()
+                if job is _STOP:
+                    self.queue.task_done()
+                    break
+                jobs = [job]
+                while not job.paced and len(jobs) < self.coalesce:
+                    try:
+                        waiting = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if waiting is _STOP or waiting.paced:
+                        self._carry = waiting
+                        break
+                    jobs.append(waiting)
+                try:
+                    self._send(jobs)
+                finally:
+                    for _ in jobs:
+                        self.queue.task_done()
+        finally:
+            if self._keyboard is not None:
+                self._keyboard.close()
+            if self.metrics is not None:
+                self.metrics.retire()
+
+    def _send(self, jobs):
+        """Send jobs in one batch. Jobs sent together share the errors of the batch"""
+        start = time.perf_counter()
+        jobs = [job for job in jobs if job.future.set_running_or_notify_cancel()]
+        if self.metrics is not None:
+            for job in jobs:
+                self.metrics.observe('queue_wait', start - job.submitted)
+            self.metrics.count('jobs', len(jobs))
+            if len(jobs) > 1:
+                self.metrics.count('coalesced_batches')
+
+        plans = []
+        for job in jobs:
+            try:
+                keyboard = self._open()
+                plans.append((job, keyboard, keyboard.compile(job.source)))
+            except Exception as ex:     # A key that cannot be typed closes the KeyBoard, see pro_raise
+                job.future.set_exception(ex)
+        if not plans:
+            return
+
+        results = []
+        try:
+            keyboard = self._open()
+            with keyboard.batch():
+                for job, compiled_on, plan in plans:
+                    if compiled_on is not keyboard:     # A later job closed that KeyBoard, its slots are gone
+                        plan = keyboard.compile(job.source)
+                    results.append((job, keyboard.play(plan, job.delay, job.pacer)))
+        except Exception as ex:
+            for job, compiled_on, plan in plans:
+                job.future.set_exception(ex)
+        else:
+            for job, result in results:
+                job.future.set_result(result)
@@ -0,0 +1,127 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+Typing text as it is produced: iterables of strings, text files, binary files and pipes, mmaps.
+The input is read and decoded by a thread into a bounded queue of chunks, while the caller's
+thread resolves each chunk and sends it without waiting for the server; the next chunk is
+resolved while the server is still processing the previous one. Memory stays bounded by
+chunk_size and depth whatever the length of the input.
+"""
+
+import codecs
+import io
+import queue
+import threading
+
+from .pacing import Pacer
+
+_END = object()     # Queued by the reader after the last chunk
+
+
+def read_chunks(source, encoding='utf-8', errors='strict', chunk_size=4096):
+    """
+    Decode source incrementally into strings of at most chunk_size characters.
+    :param source: Iterable of str or bytes, or an object with a read() method returning str or bytes:
+                   text file, binary file or pipe, mmap.mmap, io.BytesIO...
+    :param encoding: Encoding of bytes
+    :param errors: Decoding error handler, see codecs
+    :param chunk_size: Largest number of characters per chunk
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    if isinstance(source, (str, bytes, bytearray, memoryview)):
+        pieces = (source,)
+    elif hasattr(source, 'read1'):        # Buffered binary stream: whatever is available, so pipes are typed as they fill
+        pieces = iter(lambda: source.read1(chunk_size), b'')
+    elif isinstance(source, io.TextIOBase):     # One line at a time, so logs are typed as they are written
+        pieces = iter(lambda: source.readline(chunk_size), '')
+    elif hasattr(source, 'read'):
+        pieces = _read(source, chunk_size)
+    else:
+        pieces = source
+
+    for piece in pieces:
+        if not isinstance(piece, str):
+            piece = decoder.decode(piece)
+        for start in range(0, len(piece), chunk_size):
+            yield piece[start:start + chunk_size]
+    rest = decoder.decode(b'', True)
+    if rest:
+        yield rest
+
+
+def _read(source, size):
+    while True:
+        piece = source.read(size)
+        if not piece:
+            return
+        yield piece
+
+
+class _Reader(object):
+    """Thread reading chunks into a bounded queue, errors included"""
+
+    def __init__(self, chunks, depth):
+        self.queue = queue.Queue(depth)
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, args=(chunks,), name='libkeyboard-stream', daemon=True)
+        self.thread.start()
+
+    def __iter__(self):
+        while True:
+            chunk = self.queue.get()
+            if chunk is _END:
+                return
+            if isinstance(chunk, BaseException):
+                raise chunk
+            yield chunk
+
+    def _put(self, item):
+        while not self.stopped:
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self, chunks):
+        try:
+            for chunk in chunks:
+                if not self._put(chunk):
+                    return
+        except Exception as ex:
+            self._put(ex)
+            return
+        self._put(_END)
+
+    def stop(self):
+        self.stopped = True
+
+
+def type_stream(keyboard, source, delay=0.0, pacer=None, encoding='utf-8', errors='strict',
+                chunk_size=4096, depth=4):
+    """
+    Type what source produces, as it is produced.
+    :param keyboard: KeyBoard typing the text
+    :param source: See read_chunks()
+    :param delay: Interval between two characters, in seconds
+    :param pacer: Pacer scheduling each character, instead of delay; one schedule for the whole stream
+    :param encoding: Encoding of bytes
+    :param errors: Decoding error handler, see codecs
+    :param chunk_size: Characters resolved and sent at a time
+    :param depth: Chunks read ahead of the one being typed
+    :return: The pacer when typing was paced, see Pacer.stats()
+    """
+    if pacer is None and delay > 0:
+        pacer = Pacer(delay)
+    reader = _Reader(read_chunks(source, encoding, errors, chunk_size), depth)
+    try:
+        with keyboard.batch():
+            for chunk in reader:
+                keyboard.play(keyboard.compile(chunk, cache=False), pacer=pacer)
+                keyboard.flush()        # Let the server work on this chunk while the next one is resolved
+    finally:
+        reader.stop()
+    return pacer
@@ -0,0 +1,326 @@
+# coding=utf8
+
+"""
+@Author: baicaimp3
+@Date: 2026/10/16
+X selections (CLIPBOARD, PRIMARY) owned and read through the ICCCM selection protocol.
+A Clipboard has its own connection and window, and a thread answering the SelectionRequest
+events of other clients. Texts larger than chunk_size are transferred incrementally (INCR),
+one property change after another, so any length fits.
+"""
+
+import threading
+import time
+
+import Xlib.X
+import Xlib.Xatom
+import Xlib.display
+import Xlib.error
+import Xlib.protocol.request
+from Xlib.protocol import event as xevent
+
+from .xorg import X11Error
+
+# Text targets served, the first one is the preferred target when reading
+TEXT_TARGETS = ('UTF8_STRING', 'text/plain;charset=utf-8', 'STRING', 'TEXT', 'text/plain')
+
+
+def encode(text, target):
+    """Bytes of text for a text target: Latin-1 for STRING (ICCCM), UTF-8 for the others"""
+    if target in ('STRING', 'text/plain'):
+        return text.encode('latin-1', 'replace')
+    return text.encode('utf-8')
+
+
+def decode(data, target):
+    """Text of data received for a text target, see encode()"""
+    if target in ('STRING', 'text/plain'):
+        return data.decode('latin-1')
+    return data.decode('utf-8', 'replace')
+
+
+def chunks(data, size):
+    """Property values of an incremental transfer of data: chunks of at most size bytes, then an empty one"""
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+    yield b''
+
+
+class _Transfer(object):
+    """Incremental transfer of a text to one requestor property"""
+
+    def __init__(self, requestor, property, property_type, data, size, selection, generation):
+        self.requestor = requestor
+        self.property = property
+        self.property_type = property_type
+        self.chunks = chunks(data, size)
+        self.selection = selection
+        self.generation = generation
+
+
+class Clipboard(object):
+    """
+    Owner and reader of X selections, with a thread serving the selections owned.
+    :param display: Display name such as ":1", None for $DISPLAY
+    :param chunk_size: Bytes per property change of an incremental transfer, None for the most
+                       one request can carry. Larger texts are sent with INCR
+    """
+
+    def __init__(self, display=None, chunk_size=None):
+        self.connection = Xlib.display.Display(display)
+        screen = self.connection.screen()
+        self.window = screen.root.create_window(
+            0, 0, 1, 1, 0, screen.root_depth,
+            event_mask=Xlib.X.PropertyChangeMask | Xlib.X.StructureNotifyMask)
+        largest = self.connection.display.info.max_request_length * 4 - 64     # Bytes a ChangeProperty can carry
+        self.chunk_size = min(chunk_size or largest, largest)
+        self.atoms = {name: self.connection.intern_atom(name) for name in TEXT_TARGETS + (
+            'TARGETS', 'TIMESTAMP', 'INCR', 'ATOM', 'INTEGER', 'CLIPBOARD', 'PRIMARY',
+            'LIBKEYBOARD_SELECTION', 'LIBKEYBOARD_TIME')}
+        self.names = {atom: name for name, atom in self.atoms.items()}
+        self.closed = False
+        self.contents = {}          # {selection atom: text} Selections owned
+        self.owned_at = {}          # {selection atom: server time ownership was taken}
+        self.generation = 0         # Bumped by every own()
+        self.served = {}            # {selection atom: generation of the last text fully transferred}
+        self._transfers = {}        # {(requestor window id, property): _Transfer} Outgoing INCR transfers
+        self._reading = None        # State of the read() in progress, filled by the event thread
+        self._time = None           # Server time answered to _server_time()
+        self._cond = threading.Condition()
+        # Requestors may go away in the middle of a transfer; their errors concern nobody else
+        self.connection.set_error_handler(lambda *args: None)
+        self._thread = threading.Thread(target=self._run, name='libkeyboard-clipboard', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def atom(self, name):
+        if name not in self.atoms:
+            self.atoms[name] = self.connection.intern_atom(name)
+            self.names[self.atoms[name]] = name
+        return self.atoms[name]
+
+    def owns(self, selection='CLIPBOARD'):
+        selection = self.atom(selection)
+        with self._cond:
+            return selection in self.contents
+
+    def read(self, selection='CLIPBOARD', timeout=1.0):
+        """
+        Text of a selection, from whichever client owns it.
+        :param selection: Selection name, CLIPBOARD or PRIMARY
+        :param timeout: Seconds to wait for the owner, per target tried
+        :return: str, None when the selection has no owner or no text
+        """
+        selection = self.atom(selection)
+        with self._cond:
+            if selection in self.contents:
+                return self.contents[selection]
+        if self.connection.get_selection_owner(selection) == Xlib.X.NONE:
+            return None
+        for target in ('UTF8_STRING', 'STRING'):
+            with self._cond:
+                self._reading = {"incr": False, "data": None, "done": False}
+                self.window.convert_selection(selection, self.atoms[target], self.atoms['LIBKEYBOARD_SELECTION'],
+                                              Xlib.X.CurrentTime)
+                self.connection.flush()
+                deadline = time.monotonic() + timeout
+                while not self._reading["done"]:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        break
+                    self._cond.wait(left)
+                data, self._reading = self._reading["data"], None
+            if data is not None:
+                return decode(bytes(data), target)
+        return None
+
+    def own(self, text, selections=('CLIPBOARD',)):
+        """
+        Take ownership of selections and serve text on them until disown(), close() or another client takes them.
+        :param text: Text served
+        :param selections: Selection names, CLIPBOARD and/or PRIMARY
+        :return: Generation of the text, see wait()
+        :raise X11Error: When the server did not give the ownership
+        """
+        selections = [self.atom(name) for name in selections]
+        timestamp = self._server_time()
+        with self._cond:
+            self.generation += 1
+            generation = self.generation
+            for selection in selections:
+                self.contents[selection] = text
+                self.owned_at[selection] = timestamp
+        for selection in selections:
+            self.window.set_selection_owner(selection, timestamp)
+        for selection in selections:
+            if self.connection.get_selection_owner(selection) != self.window:
+                with self._cond:
+                    self.contents.pop(selection, None)
+                raise X11Error([(None, "Ownership of %s refused" % self.names[selection])])
+        return generation
+
+    def disown(self, selections=('CLIPBOARD',)):
+        """Give up selections owned, which are then empty"""
+        for name in selections:
+            selection = self.atom(name)
+            with self._cond:
+                if self.contents.pop(selection, None) is None:
+                    continue
+            Xlib.protocol.request.SetSelectionOwner(
+                display=self.connection.display, window=Xlib.X.NONE, selection=selection, time=self._server_time())
+        self.connection.flush()
+
+    def wait(self, selection, generation, timeout):
+        """
+        Wait until a client fetched the text of generation from selection.
+        :return: True when it was fully transferred before timeout
+        """
+        selection = self.atom(selection)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.served.get(selection, 0) < generation:
+                left = deadline - time.monotonic()
+                if left <= 0 or selection not in self.contents:
+                    return False
+                self._cond.wait(left)
+        return True
+
+    def close(self):
+        """Stop serving: the selections owned become empty"""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.window.destroy()       # Wakes the event thread up with a DestroyNotify
+            self.connection.flush()
+        except Xlib.error.ConnectionClosedError:
+            pass
+        self._thread.join()
+        self.connection.close()
+
+    def _server_time(self):
+        """Current server time, read from the PropertyNotify of an empty append (ICCCM 2.1)"""
+        with self._cond:
+            self._time = None
+            self.window.change_property(self.atoms['LIBKEYBOARD_TIME'], Xlib.Xatom.STRING, 8, b'',
+                                        Xlib.X.PropModeAppend)
+            self.connection.flush()
+            while self._time is None and not self.closed:
+                self._cond.wait(1.0)
+            return self._time or Xlib.X.CurrentTime
+
+    def _run(self):
+        try:
+            while True:
+                event = self.connection.next_event()
+                with self._cond:
+                    if event.type == Xlib.X.DestroyNotify and event.window == self.window:
+                        break
+                    self._handle(event)
+                    self._cond.notify_all()
+        except Xlib.error.ConnectionClosedError:
+            pass
+        finally:
+            with self._cond:
+                self.contents.clear()
+                self._cond.notify_all()
+
+    def _handle(self, event):
+        if event.type == Xlib.X.SelectionRequest:
+            self._answer(event)
+        elif event.type == Xlib.X.SelectionClear:
+            self.contents.pop(event.atom, None)         # Another client owns it now
+        elif event.type == Xlib.X.SelectionNotify:
+            self._receive(event)
+        elif event.type == Xlib.X.PropertyNotify:
+            if event.window != self.window:
+                if event.state == Xlib.X.PropertyDelete:
+                    self._continue(event.window.id, event.atom)
+            elif event.atom == self.atoms['LIBKEYBOARD_TIME']:
+                self._time = event.time
+            elif event.atom == self.atoms['LIBKEYBOARD_SELECTION'] and event.state == Xlib.X.PropertyNewValue:
+                self._receive_chunk()
+
+    def _answer(self, event):
+        """Answer a SelectionRequest by setting the requestor's property, then sending SelectionNotify"""
+        prop = event.property or event.target          # Obsolete clients leave property None
+        text = self.contents.get(event.selection)
+        target = self.names.get(event.target)
+        requestor = event.requestor
+        owned_at = self.owned_at.get(event.selection, 0)
+        if text is None or (event.time != Xlib.X.CurrentTime and event.time < owned_at):
+            prop = Xlib.X.NONE
+        elif target == 'TARGETS':
+            requestor.change_property(prop, self.atoms['ATOM'], 32, [
+                self.atoms[name] for name in ('TARGETS', 'TIMESTAMP') + TEXT_TARGETS])
+        elif target == 'TIMESTAMP':
+            requestor.change_property(prop, self.atoms['INTEGER'], 32, [owned_at])
+        elif target in TEXT_TARGETS:
+            data = encode(text, target)
+            property_type = self.atoms['UTF8_STRING' if target == 'TEXT' else target]
+            if len(data) > self.chunk_size:
+                requestor.change_attributes(event_mask=Xlib.X.PropertyChangeMask)
+                requestor.change_property(prop, self.atoms['INCR'], 32, [len(data)])
+                self._transfers[requestor.id, prop] = _Transfer(
+                    requestor, prop, property_type, data, self.chunk_size, event.selection, self.generation)
+            else:
+                requestor.change_property(prop, property_type, 8, data)
+                self.served[event.selection] = self.generation
+        else:       # MULTIPLE, images...
+            prop = Xlib.X.NONE
+        requestor.send_event(xevent.SelectionNotify(
+            time=event.time, requestor=requestor, selection=event.selection,
+            target=event.target, property=prop), event_mask=0)
+        self.connection.flush()
+
+    def _continue(self, window, prop):
+        """Send the next chunk of an incremental transfer, once the requestor deleted the previous one"""
+        transfer = self._transfers.get((window, prop))
+        if transfer is None:
+            return
+        chunk = next(transfer.chunks)
+        transfer.requestor.change_property(prop, transfer.property_type, 8, chunk)
+        if not chunk:
+            del self._transfers[window, prop]
+            self.served[transfer.selection] = transfer.generation
+        self.connection.flush()
+
+    def _take(self):
+        """Value of our selection property, deleted so the owner can send the next chunk"""
+        reply = self.window.get_full_property(self.atoms['LIBKEYBOARD_SELECTION'], Xlib.X.AnyPropertyType)
+        self.window.delete_property(self.atoms['LIBKEYBOARD_SELECTION'])
+        self.connection.flush()
+        return reply
+
+    def _receive(self, event):
+        """SelectionNotify answering read(): the whole text, or the start of an incremental transfer"""
+        reading = self._reading
+        if reading is None or event.requestor != self.window:
+            return
+        if event.property == Xlib.X.NONE:       # Refused
+            reading["done"] = True
+            return
+        reply = self._take()
+        if reply is None:
+            reading["done"] = True
+        elif reply.property_type == self.atoms['INCR']:
+            reading["incr"] = True
+            reading["data"] = bytearray()
+        else:
+            reading["data"] = reply.value
+            reading["done"] = True
+
+    def _receive_chunk(self):
+        reading = self._reading
+        if reading is None or not reading["incr"] or reading["done"]:
+            return
+        reply = self._take()
+        if reply is None or not reply.value:        # An empty chunk ends the transfer
+            reading["done"] = True
+        else:
+            reading["data"] += reply.value
@@ -7,7 +7,9 @@
 
 import contextlib
 import Xlib.display
+import Xlib.ext.xtest
 import Xlib.keysymdef
+import Xlib.X
 import Xlib.threaded
 import Xlib.XK
 
@@ -33,6 +35,103 @@ def display_manager(display):
         raise X11Error(errors)
 
 
+class EventBatch(object):
+    """
+    Queue of requests sent without waiting for the server, synced once when the batch ends.
+    Errors caused by the queued requests are collected and raised together as X11Error,
+    as a list of (event index, error) pairs.
+    :param display: Display the requests are sent on
+    :param window: Number of events between two syncs, None to sync only at the end
+    :param blocking: When False, record() never syncs: the owner must sync (and clear serials)
+                     at least every window events, e.g. without blocking as AsyncKeyBoard does
+    """
+
+    # Request serials are 16 bits; sync before they wrap so errors map to a single event
+    MAX_WINDOW = 0x8000
+
+    def __init__(self, display, window=None, blocking=True):
+        self.display = display
+        self.window = min(window or self.MAX_WINDOW, self.MAX_WINDOW)
+        self.blocking = blocking
+        self.count = 0              # Number of events queued
+        self.serials = {}           # {request serial: event index} since the last sync
+        self.errors = []            # [(event index, error)]
+        self.focus = None           # Input focus, fetched once per batch
+        self._old_handler = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.display.set_error_handler(self._old_handler)
+            return
+        self.close()
+
+    def _handler(self, error, request):
+        self.errors.append((self.serials.get(error.sequence_number), error))
+
+    def open(self):
+        self._old_handler = self.display.set_error_handler(self._handler)
+
+    def record(self):
+        """Attribute the next request to the next event index. Call right before sending it"""
+        self.serials[self.display.display.request_serial] = self.count
+        self.count += 1
+        if self.blocking and self.count % self.window == 0:
+            self.display.sync()
+            self.serials.clear()
+
+    def send(self, events):
+        """
+        Send resolved key events, one request each.
+        :param events: (event, keycode, state) tuples. An int event is an XTest event type and ignores
+                       state; otherwise it is an event class sent to the input focus with that state
+        """
+        display = self.display
+        for event, keycode, state in events:
+            if isinstance(event, int):
+                self.record()
+                Xlib.ext.xtest.fake_input(display, event, keycode)
+                continue
+            if self.focus is None:
+                self.focus = display.get_input_focus().focus
+            window = self.focus
+            send_event = getattr(window, "send_event", lambda _event: display.send_event(window, _event))
+            _event = event(
+                detail=keycode,
+                state=state,
+                time=0,
+                root=display.screen().root,
+                window=window,
+                same_screen=0,
+                child=Xlib.X.NONE,
+                root_x=0, root_y=0, event_x=0, event_y=0
+            )
+            self.record()
+            send_event(_event)
+
+    def flush(self):
+        """Send the queued requests without waiting for the server"""
+        self.display.flush()
+
+    def close(self, sync=True):
+        """
+        End the batch.
+        :param sync: Wait for the server to process the queued requests, or only flush them
+        """
+        try:
+            if sync:
+                self.display.sync()
+            else:
+                self.display.flush()
+        finally:
+            self.display.set_error_handler(self._old_handler)
+        if self.errors:
+            raise X11Error(self.errors)
+
+
 def _find_mask(display, symbol):
     modifier_keycode = display.keysym_to_keycode(
         Xlib.XK.string_to_keysym(symbol))
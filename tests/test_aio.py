@@ -0,0 +1,133 @@
+import sys
+import os
+import asyncio
+import socket
+import time
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libkeyboard import VirtualKeyBoard, RecordingBackend
+from libkeyboard.aio import AsyncKeyBoard
+from libkeyboard.keyboard import windows
+from tests.test_windows_batch import FakeUser32
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestAsyncKeyBoard(unittest.TestCase):
+    def test_write(self):
+        user32 = FakeUser32()
+
+        async def main():
+            async with AsyncKeyBoard(keyboard=windows.KeyBoard(user32=user32)) as kb:
+                await kb.write('中文')
+                await kb.group('enter')
+
+        run(main())
+        self.assertEqual(user32.calls, [(4, 4), (2, 2)])
+
+    def test_concurrent_paced_jobs(self):
+        """Paced jobs share the loop's thread instead of sleeping one after the other"""
+        user32 = FakeUser32()
+
+        async def main():
+            kb = AsyncKeyBoard(keyboard=windows.KeyBoard(user32=user32))
+            await asyncio.gather(*(kb.write('ab', delay=0.05) for _ in range(20)))
+            kb.close()
+
+        start = time.monotonic()
+        run(main())
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(len(user32.events), 20 * 4)
+        self.assertEqual(len(user32.calls), 20 * 2)      # One SendInput per paced character
+
+
+class SocketConnection(object):
+    """
+    Xlib Display stand-in on a socket pair: flushing a request makes the socket readable, as the
+    server's reply would, and pending_events() reads the replies off the socket like Xlib does.
+    """
+
+    def __init__(self):
+        self.server, self.client = socket.socketpair()
+        self.client.setblocking(False)
+        self.display = self         # Protocol display the requests are sent on
+        self.request_serial = 1
+        self.unanswered = []
+
+    def send_request(self, request, wait_for_response):
+        request._serial = self.request_serial
+        self.request_serial += 1
+        self.unanswered.append(request)
+
+    def flush(self):
+        if self.unanswered:
+            self.server.send(b'reply')
+
+    def pending_events(self):
+        try:
+            self.client.recv(4096)
+        except BlockingIOError:
+            return 0
+        for request in self.unanswered:
+            request._data = {'revert_to': 0, 'focus': 1}
+        self.unanswered = []
+        return 0
+
+    def set_error_handler(self, handler):
+        pass
+
+    def fileno(self):
+        return self.client.fileno()
+
+    def close(self):
+        self.server.close()
+        self.client.close()
+
+
+class SocketBackend(RecordingBackend):
+    def __init__(self):
+        super().__init__()
+        self.connection = SocketConnection()
+
+    def flush(self):
+        self.connection.flush()
+
+    def fileno(self):
+        return self.connection.fileno()
+
+    def close(self):
+        super().close()
+        self.connection.close()
+
+
+class PollingKeyBoard(VirtualKeyBoard):
+    """Virtual KeyBoard polling its connection when it compiles, as the X KeyBoard polls MappingNotify"""
+
+    def _poll_mapping_notify(self):
+        self.backend.connection.pending_events()
+
+
+@unittest.skipIf(sys.platform == 'win32', "the fd path is the X one")
+class TestSocketWait(unittest.TestCase):
+    def test_reply_read_by_a_blocking_call(self):
+        async def main():
+            async with AsyncKeyBoard(keyboard=PollingKeyBoard(backend=SocketBackend())) as kb:
+                waiting = asyncio.ensure_future(kb.sync())
+                await asyncio.sleep(0)      # The request is flushed, its reply waits on the socket
+                kb.compile('a')             # Reads the reply before the loop sees the socket readable
+                return (await asyncio.wait_for(waiting, 1)).focus
+
+        self.assertEqual(run(main()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
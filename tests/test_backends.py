@@ -0,0 +1,182 @@
+import sys
+import os
+import asyncio
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libkeyboard import VirtualKeyBoard, NullBackend, RecordingBackend, SessionPool, Pacer, VirtualClock
+from libkeyboard.aio import AsyncKeyBoard
+from libkeyboard.keyboard import Key, windows
+
+
+class Recycling(VirtualKeyBoard):
+    """Virtual keyboard changing its mapping for every key, like text with more characters than slots"""
+    compiles = 0
+
+    def _resolve(self, key, _key, keysym, register):
+        self._new_generation()
+        return super()._resolve(key, _key, keysym, register)
+
+    def _compile(self, source, units, cache=True):
+        self.compiles += 1
+        return super()._compile(source, units, cache)
+
+
+class TestVirtualKeyBoard(unittest.TestCase):
+    def test_press_release(self):
+        recording = RecordingBackend()
+        with VirtualKeyBoard(backend=recording) as kb:
+            kb.press('a')
+            kb.release('a')
+            kb.press('Return')
+            kb.release('Return')
+        self.assertEqual(recording.events, [('a', True), ('a', False), ('enter', True), ('enter', False)])
+        self.assertEqual(recording.sends, 4)
+        self.assertTrue(recording.closed)
+
+    def test_close_releases_held_keys(self):
+        recording = RecordingBackend()
+        kb = VirtualKeyBoard(backend=recording)
+        kb.press('x')
+        kb.press('x')
+        kb.press('shift')
+        kb.close()
+        self.assertEqual(recording.events[3:], [('shift', False), ('x', False), ('x', False)])
+        self.assertEqual(recording.sends, 4)        # Every held key released in one submission
+        self.assertEqual(kb.event_mapping, {})
+        self.assertEqual(kb.modifiers, set())
+
+    def test_release_without_press(self):
+        recording = RecordingBackend()
+        with VirtualKeyBoard(backend=recording) as kb:
+            kb.release('q')
+        self.assertEqual(recording.events, [('q', False)])
+
+    def test_unknown_key(self):
+        kb = VirtualKeyBoard()
+        self.assertRaises(KeyError, kb.press, 'nosuchkey')
+        self.assertTrue(kb.closed)
+
+    def test_batch_is_one_send(self):
+        recording = RecordingBackend()
+        with VirtualKeyBoard(backend=recording) as kb, kb.batch():
+            for char in 'hello':
+                kb.press(char)
+                kb.release(char)
+        self.assertEqual(recording.sends, 1)
+        self.assertEqual(recording.syncs, 1)
+        self.assertEqual(recording.text(), 'hello')
+
+    def test_batch_window(self):
+        recording = RecordingBackend()
+        with VirtualKeyBoard(backend=recording) as kb, kb.batch(window=4):
+            for char in 'abcd':
+                kb.press(char)
+                kb.release(char)
+        self.assertEqual(recording.sends, 2)
+
+    def test_plan(self):
+        recording = RecordingBackend()
+        with VirtualKeyBoard(backend=recording) as kb:
+            plan = kb.compile(['hi', ('ctrl', 'c')])
+            self.assertIs(kb.compile(['hi', ('ctrl', 'c')]), plan)
+            self.assertEqual(recording.events, [])      # Compiling sends nothing
+            kb.play(plan)
+            kb.play(plan)
+        self.assertEqual(recording.sends, 2)
+        self.assertEqual(recording.events[:8], [
+            ('h', True), ('h', False), ('i', True), ('i', False),
+            ('ctrl', True), ('c', True), ('c', False), ('ctrl', False),
+        ])
+        self.assertEqual(recording.events[:8], recording.events[8:])
+
+    def test_live_plan_is_not_recompiled(self):
+        recording = RecordingBackend()
+        with Recycling(backend=recording) as kb:
+            plan = kb.compile('abc')
+            self.assertIsNone(plan.generation)
+            kb.play(plan)
+            kb.play(plan)
+            self.assertEqual(kb.compiles, 1)
+        self.assertEqual(recording.text(), 'abcabc')
+
+    def test_paced_play_flushes_each_mark(self):
+        recording = RecordingBackend()
+        clock = VirtualClock()
+        with VirtualKeyBoard(backend=recording) as kb:
+            kb.play(kb.compile('abc'), pacer=Pacer(0.01, clock=clock))
+        self.assertEqual(recording.sends, 3)
+        self.assertAlmostEqual(clock.now(), 0.02)
+
+    def test_null_backend(self):
+        with VirtualKeyBoard(backend=NullBackend()) as kb:
+            kb.play(kb.compile('nothing'))
+            with kb.batch():
+                kb.press('a')
+            self.assertIn('a', kb.event_mapping)
+
+    def test_pooled_sessions(self):
+        recording = RecordingBackend()
+        pool = SessionPool(factory=lambda display: VirtualKeyBoard(display, recording))
+        with pool.acquire() as a, pool.acquire() as b:
+            a.press('shift')
+            b.press('x')
+            self.assertEqual(set(a.state['event_mapping']), {'shift'})
+        self.assertEqual(recording.events[2:], [('x', False), ('shift', False)])     # b is given back first
+        pool.close()
+
+    def test_sessions_keep_their_modifiers(self):
+        recording = RecordingBackend()
+        played = []
+
+        class Watching(VirtualKeyBoard):
+            def _send_plan_events(self, events):
+                played.append(set(self.modifiers))
+                super()._send_plan_events(events)
+
+        pool = SessionPool(factory=lambda display: Watching(display, recording))
+        with pool.acquire() as a, pool.acquire() as b:
+            plan = a.compile('x')
+            a.press('shift')
+            b.press('ctrl')
+            a.play(plan)
+            b.play(plan)
+            with a.batch():
+                a.release('shift')
+                a.play(plan)
+            self.assertEqual(played, [{Key.shift}, {Key.ctrl}, set()])
+            self.assertEqual(a.state['modifiers'], set())
+            self.assertEqual(b.state['modifiers'], {Key.ctrl})
+            self.assertEqual(a.keyboard.modifiers, set())        # The KeyBoard's own state is left alone
+        pool.close()
+
+
+class TestWindowsBackend(unittest.TestCase):
+    def test_resolved_events(self):
+        recording = RecordingBackend()
+        with windows.KeyBoard(backend=recording) as kb:
+            kb.press('enter')
+            kb.press('中')
+            kb.release('中')
+        self.assertEqual(recording.events, [
+            (True, 0x0D, False), (False, '中', False), (False, '中', True), (True, 0x0D, True),
+        ])
+
+
+class TestAsyncVirtual(unittest.TestCase):
+    def test_write(self):
+        recording = RecordingBackend()
+
+        async def main():
+            async with AsyncKeyBoard(keyboard=VirtualKeyBoard(backend=recording)) as kb:
+                await asyncio.gather(kb.write('abc'), kb.write('xyz'))
+
+        asyncio.run(main())
+        self.assertEqual(sorted(recording.text()), sorted('abcxyz'))
+        self.assertEqual(recording.sends, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.run import check
+
+
+class TestThresholds(unittest.TestCase):
+    def test_check(self):
+        thresholds = {"keyboard_write": {"round_trips_per_char": 0.05}}
+        results = [
+            {"name": "keyboard_write", "corpus": "cjk", "round_trips_per_char": 0.01},
+            {"name": "keyboard_write", "corpus": "emoji", "round_trips_per_char": 1.0},
+            {"name": "keyboard_group", "corpus": "chords", "error": "KeyError('x')"},
+            {"name": "import", "seconds": 0.1},
+        ]
+        failures = check(results, thresholds)
+        self.assertEqual(len(failures), 2)
+        self.assertIn("keyboard_write[emoji]", failures[0])
+        self.assertIn("keyboard_group[chords] failed", failures[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import sys
+import os
+import io
+import json
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libkeyboard import VirtualKeyBoard, RecordingBackend
+from libkeyboard.__main__ import _parser, _Runner, _serve
+
+
+class TestCommandLine(unittest.TestCase):
+    def test_serve(self):
+        recording = RecordingBackend()
+        runner = _Runner(None, factory=lambda display: VirtualKeyBoard(display, recording))
+        args = _parser().parse_args(['--serve'])
+        stdin = io.StringIO('hello\n\n{"keys": "ctrl+a", "text": "x"}\n{"keys": "nosuchkey"}\n{not json\n')
+        stdout = io.StringIO()
+        try:
+            _serve(runner, args, stdin, stdout)
+        finally:
+            runner.close()
+        replies = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([(reply['job'], reply['ok']) for reply in replies],
+                         [(1, True), (3, True), (4, False), (5, True)])
+        self.assertEqual(recording.text(), 'helloax{not json')
+        stats = runner.stats()
+        self.assertEqual((stats['jobs'], stats['errors'], stats['chars']), (4, 1, 15))
+
+    def test_type_file(self):
+        recording = RecordingBackend()
+        runner = _Runner(None, factory=lambda display: VirtualKeyBoard(display, recording))
+        try:
+            runner.type(io.BytesIO('中文 text'.encode('gbk')), encoding='gbk')
+        finally:
+            runner.close()
+        self.assertEqual(recording.text(), '中文 text')
+
+
+if __name__ == '__main__':
+    unittest.main()
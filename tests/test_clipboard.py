@@ -0,0 +1,50 @@
+import sys
+import os
+import time
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+if sys.platform != 'win32':
+    from libkeyboard.util import clipboard
+
+
+@unittest.skipIf(sys.platform == 'win32', "X11 selections")
+class TestTransfer(unittest.TestCase):
+    def test_chunks(self):
+        self.assertEqual(list(clipboard.chunks(b'abcde', 2)), [b'ab', b'cd', b'e', b''])
+        self.assertEqual(list(clipboard.chunks(b'', 2)), [b''])
+
+    def test_encoding(self):
+        self.assertEqual(clipboard.encode('é中', 'UTF8_STRING'), 'é中'.encode('utf-8'))
+        self.assertEqual(clipboard.encode('é中', 'STRING'), b'\xe9?')
+        self.assertEqual(clipboard.decode(b'\xe9', 'STRING'), 'é')
+
+
+@unittest.skipIf(sys.platform == 'win32' or not os.environ.get('DISPLAY'), "needs an X server, e.g. xvfb-run")
+class TestSelections(unittest.TestCase):
+    def test_read_owned_text(self):
+        with clipboard.Clipboard(chunk_size=1000) as owner, clipboard.Clipboard() as reader:
+            text = 'héllo 中文 ' * 500          # Larger than chunk_size: sent with INCR
+            generation = owner.own(text, ('CLIPBOARD', 'PRIMARY'))
+            self.assertEqual(reader.read('CLIPBOARD'), text)
+            self.assertTrue(owner.wait('CLIPBOARD', generation, 1.0))
+            self.assertEqual(reader.read('PRIMARY'), text)
+
+            owner.own('small')
+            self.assertEqual(reader.read(), 'small')
+
+            reader.own('taken')
+            deadline = time.monotonic() + 1.0
+            while owner.owns('CLIPBOARD') and time.monotonic() < deadline:      # SelectionClear is asynchronous
+                time.sleep(0.01)
+            self.assertFalse(owner.owns('CLIPBOARD'))
+            self.assertEqual(owner.read(), 'taken')
+
+            reader.disown()
+            self.assertIsNone(owner.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import sys
+import os
+import queue
+import threading
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libkeyboard import Dispatcher, VirtualKeyBoard, RecordingBackend, Backend
+
+
+class GatedBackend(Backend):
+    """Backend whose deliveries wait until the gate opens"""
+
+    def __init__(self, gate):
+        self.gate = gate
+
+    def send(self, events):
+        self.gate.wait()
+
+
+class TestThreadDispatcher(unittest.TestCase):
+    def test_jobs_per_display(self):
+        recordings = {}
+
+        def factory(display):
+            recordings[display] = RecordingBackend()
+            return VirtualKeyBoard(display, recordings[display])
+
+        with Dispatcher([':1', ':2'], factory=factory) as dispatcher:
+            futures = [dispatcher.write(text, display) for text, display in
+                       (('one', ':1'), ('two', ':2'), ('three', ':1'))]
+            futures.append(dispatcher.group('ctrl', 'c', display=':2'))
+            dispatcher.join()
+            for future in futures:
+                self.assertIsNone(future.result())
+        self.assertEqual(recordings[':1'].text(), 'onethree')
+        self.assertEqual(recordings[':2'].text(), 'twoc')
+
+    def test_back_pressure(self):
+        gate = threading.Event()
+        dispatcher = Dispatcher([':1'], max_pending=1, factory=lambda display: VirtualKeyBoard(display, GatedBackend(gate)))
+        try:
+            first = dispatcher.write('a')
+            self.assertRaises(queue.Full, dispatcher.write, 'b', timeout=0.05)
+            self.assertEqual(dispatcher.pending(':1'), 1)
+            gate.set()
+            first.result(5)
+            dispatcher.write('c').result(5)
+        finally:
+            gate.set()
+            dispatcher.close()
+
+    def test_least_loaded_display(self):
+        gate = threading.Event()
+        dispatcher = Dispatcher([':1', ':2'], factory=lambda display: VirtualKeyBoard(display, GatedBackend(gate)))
+        try:
+            dispatcher.write('a', ':1')
+            dispatcher.write('b')
+            self.assertEqual((dispatcher.pending(':1'), dispatcher.pending(':2')), (1, 1))
+        finally:
+            gate.set()
+            dispatcher.close()
+        self.assertRaises(RuntimeError, dispatcher.write, 'c')
+
+    def test_errors_reach_the_future(self):
+        with Dispatcher([':1'], factory=VirtualKeyBoard) as dispatcher:
+            future = dispatcher.group('nosuchkey', 'a')
+            self.assertRaises(KeyError, future.result, 5)
+
+    def test_close_without_waiting(self):
+        gate = threading.Event()
+        started = threading.Event()
+        closed = threading.Event()
+        threads = []
+
+        class Watched(VirtualKeyBoard):
+            def press(self, key, register=False):
+                threads.append(threading.get_ident())
+                super().press(key, register)
+                started.set()
+
+            def close(self):
+                threads.append(threading.get_ident())
+                super().close()
+                closed.set()
+
+        dispatcher = Dispatcher([':1'], factory=lambda display: Watched(display, GatedBackend(gate)))
+        try:
+            running = dispatcher.write('a')
+            started.wait(5)
+            queued = dispatcher.write('b')
+            dispatcher.close(wait=False)
+            self.assertTrue(queued.cancelled())
+            self.assertFalse(closed.is_set())       # The running job still uses the KeyBoard
+        finally:
+            gate.set()
+        self.assertIsNone(running.result(5))
+        self.assertTrue(closed.wait(5))
+        self.assertEqual(len(set(threads)), 1)      # Closed by the worker that typed with it
+        self.assertNotIn(threading.get_ident(), threads)
+
+
+class TestProcessDispatcher(unittest.TestCase):
+    def test_process_workers(self):
+        with Dispatcher([':1', ':2'], processes=True, factory=VirtualKeyBoard) as dispatcher:
+            futures = [dispatcher.write('abc', display, delay=0.001) for display in (':1', ':2')]
+            for future in futures:
+                self.assertEqual(future.result(30).stats()['marks'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import sys
+import os
+import subprocess
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Seconds allowed for `import libkeyboard` in a fresh interpreter, third party imports included
+IMPORT_BUDGET = 1.0
+
+IMPORT_SCRIPT = """
+import sys, time
+try:
+    import Xlib.display
+except ImportError:
+    pass
+else:
+    def connect(*args, **kwargs):
+        raise AssertionError("X connection opened at import")
+    Xlib.display.Display.__init__ = connect
+start = time.perf_counter()
+import libkeyboard
+import libkeyboard.keyboard._xorg
+sys.stdout.write(repr(time.perf_counter() - start))
+"""
+
+
+class TestImport(unittest.TestCase):
+    def test_import_without_display(self):
+        """Importing the package must not connect to X nor build keyboard tables"""
+        env = dict(os.environ, DISPLAY=':9999')
+        result = subprocess.run(
+            [sys.executable, '-c', IMPORT_SCRIPT],
+            cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertLess(float(result.stdout), IMPORT_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import sys
+import os
+import pickle
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libkeyboard import VirtualKeyBoard
+from libkeyboard.keyboard import Key, KeyCode
+from libkeyboard.keyboard import _names
+from libkeyboard.keyboard.windows import KeyBoard as WindowsKeyBoard
+
+
+class TestKeyNames(unittest.TestCase):
+    def test_aliases_and_case(self):
+        kb = VirtualKeyBoard()
+        for name in ('win', 'Win', 'WIN', 'super'):
+            self.assertEqual(kb.key_to_keysym(name), (Key.cmd, 'cmd'))
+        for name in ('pgdn', 'PgDn', 'pgDN', 'pagedown', 'page_down'):
+            self.assertEqual(kb.key_to_keysym(name), (Key.page_down, 'page_down'))
+        for name in ('ps', 'printscreen', 'Print Screen', 'prtsc'):
+            self.assertEqual(kb.key_to_keysym(name).key, Key.print_screen)
+        self.assertEqual(kb.key_to_keysym('\n'), (Key.enter, 'enter'))
+        self.assertEqual(kb.key_to_keysym('A'), (None, 'A'))
+        self.assertEqual(kb.key_to_keysym('中'), (None, '中'))
+        with self.assertRaises(KeyError):
+            kb.key_to_keysym('nosuchkey')
+
+    def test_index_built_once_per_class(self):
+        index = VirtualKeyBoard().key_index
+        self.assertIs(VirtualKeyBoard().key_index, index)
+        self.assertIs(index['é'], index['é'])
+
+    def test_modifiers_tracked(self):
+        kb = VirtualKeyBoard()
+        kb.press('Ctrl')
+        kb.press('shiftleft')
+        self.assertEqual(kb.modifiers, {Key.ctrl, Key.shift_l})
+        kb.release('shiftleft')
+        kb.release('ctrl')
+        self.assertEqual(kb.modifiers, set())
+
+    def test_windows_keys_are_distinct(self):
+        index = _names.build(WindowsKeyBoard._key_code, WindowsKeyBoard._key_names(), WindowsKeyBoard.char_to_keysym)
+        self.assertEqual(index['\t'], (Key.tab, 0x09))
+        self.assertEqual(index['win'], (Key.cmd, 0x5B))
+        self.assertEqual(index['PGDN'], (Key.page_down, 0x22))
+        self.assertEqual(index['num5'], (None, 0x65))
+        keysyms = [index[member.name].keysym for member in (Key.enter, Key.esc, Key.f1, Key.media_next)]
+        self.assertEqual(len(set(keysyms)), 4)
+
+
+class TestKeyCode(unittest.TestCase):
+    def test_interned(self):
+        key = KeyCode.from_vk(0x41)
+        self.assertIs(KeyCode(vk=0x41), key)
+        self.assertIs(KeyCode.from_id(key.key_id), key)
+        self.assertIs(pickle.loads(pickle.dumps(key)), key)
+        self.assertIsNot(KeyCode(vk=0x41, char='a'), key)
+        self.assertEqual(KeyCode(vk=0x41, char='a'), KeyCode(char='a'))
+        self.assertEqual(hash(KeyCode(vk=0x41, char='a')), hash(KeyCode(char='a')))
+
+    def test_immutable(self):
+        key = KeyCode(char='^', is_dead=True)
+        self.assertEqual(key.combining, '\u0302')
+        with self.assertRaises(AttributeError):
+            key.vk = 1
+        self.assertFalse(hasattr(key, '__dict__'))
+
+
+@unittest.skipIf(sys.platform == 'win32' or not os.environ.get('DISPLAY'), "needs an X server, e.g. xvfb-run")
+class TestModifierState(unittest.TestCase):
+    def test_state_follows_modifiers(self):
+        import Xlib.X
+        from libkeyboard import KeyBoard
+        with KeyBoard() as kb:
+            kb.press('ctrl')
+            kb.press('shift_r')
+            self.assertEqual(kb.modifier_state, Xlib.X.ControlMask | Xlib.X.ShiftMask)
+            kb.release('shift_r')
+            self.assertEqual(kb.modifier_state, Xlib.X.ControlMask)
+            kb.reset_keyboard()
+            self.assertEqual(kb.modifier_state, 0)
+
+    def test_held_modifier_applies_to_cached_plan(self):
+        import Xlib.X
+        from libkeyboard import KeyBoard, RecordingBackend
+        recording = RecordingBackend()
+        with KeyBoard(backend=recording) as kb:
+            plan = kb.compile('中')
+            kb.press('ctrl')
+            kb.play(plan)
+            kb.release('ctrl')
+            kb.play(plan)
+        states = [event[2] for event in recording.events if not isinstance(event[0], int)]
+        self.assertEqual(len(states), 4)
+        self.assertTrue(all(state & Xlib.X.ControlMask for state in states[:2]))
+        self.assertFalse(any(state & Xlib.X.ControlMask for state in states[2:]))
+
+
+if __name__ == '__main__':
+    unittest.main()
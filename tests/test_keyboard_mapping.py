@@ -0,0 +1,131 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libkeyboard.keyboard import keyboard_mapping
+import Xlib.XK
+
+SHIFT, LEVEL3 = Xlib.XK.string_to_keysym('Shift_L'), Xlib.XK.string_to_keysym('ISO_Level3_Shift')
+EURO = 0x20ac       # Legacy EuroSign keysym, not a Unicode keysym
+EF, EF_UPPER, SHORTI = 0x6c6, 0x6e6, 0x6ca     # Cyrillic_ef, Cyrillic_EF, Cyrillic_shorti
+
+
+class TestCharTable(unittest.TestCase):
+    def keymap(self, rows, level3=True):
+        keymap = [
+            [SHIFT, 0, 0, 0, 0, 0],
+            [LEVEL3 if level3 else 0, 0, 0, 0, 0, 0],
+        ] + rows
+        index = {}
+        for offset, row in enumerate(keymap):
+            for keysym in row:
+                if keysym:
+                    index.setdefault(keysym, offset + 8)
+        return keyboard_mapping.char_table(keymap, 8, lambda keysym: index.get(keysym, 0))
+
+    def test_levels(self):
+        chars, latin1 = self.keymap([
+            [ord('e'), ord('E'), ord('e'), ord('E'), EURO, 0x10020ac],
+            [ord('2'), ord('"'), ord('2'), ord('"'), ord('\xb2'), 0],
+        ])
+        self.assertEqual(chars['e'], (10, ()))
+        self.assertEqual(chars['E'], (10, (8,)))
+        self.assertEqual(chars['"'], (11, (8,)))
+        self.assertEqual(chars['\xb2'], (11, (9,)))
+        self.assertEqual(chars['€'], (10, (9,)))
+        self.assertIs(latin1[ord('E')], chars['E'])
+        self.assertIsNone(latin1[ord('x')])
+
+    def test_unreachable_level(self):
+        chars, latin1 = self.keymap([[ord('e'), ord('E'), 0, 0, ord('\xe9'), 0]], level3=False)
+        self.assertIn('E', chars)
+        self.assertNotIn('\xe9', chars)
+
+    def test_cyrillic_layout(self):
+        chars, latin1 = self.keymap([
+            [EF, EF_UPPER, ord('a'), ord('A'), EURO, 0],
+            [SHORTI, 0x6ea, ord('q'), ord('Q'), 0, 0],
+        ])
+        self.assertEqual(chars['ф'], (10, ()))
+        self.assertEqual(chars['Ф'], (10, (8,)))
+        self.assertEqual(chars['й'], (11, ()))
+        self.assertEqual(chars['€'], (10, (9,)))
+        self.assertEqual(keyboard_mapping.keysym_char(EF), 'ф')
+        self.assertEqual(keyboard_mapping.legacy_keysym(0x1000444), EF)
+        self.assertIsNone(keyboard_mapping.legacy_keysym(0x1004e2d))      # 中 has no legacy keysym
+
+    def test_build(self):
+        table = keyboard_mapping.build(lambda keysym: 36 if keysym == Xlib.XK.string_to_keysym('Return') else 0)
+        self.assertEqual(table['enter'], 36)
+        self.assertEqual(table['\n'], 36)
+        self.assertEqual(table['f24'], 0)
+
+
+@unittest.skipIf(sys.platform == 'win32' or not os.environ.get('DISPLAY'), "needs an X server, e.g. xvfb-run")
+class TestExternalRemap(unittest.TestCase):
+    """Another client changes the mapping after the KeyBoard has indexed it, e.g. moves 'a' to a spare keycode"""
+
+    def setUp(self):
+        import Xlib.display
+        from libkeyboard import RecordingBackend
+        from libkeyboard.keyboard.linux import KeyBoard
+        self.recording = RecordingBackend()
+        self.kb = KeyBoard(backend=self.recording)
+        self.other = Xlib.display.Display()
+        self.first = self.other.display.info.min_keycode
+        self.saved = self.other.get_keyboard_mapping(self.first, self.other.display.info.max_keycode - self.first + 1)
+        self.old = self.kb.char_location('a')[0]
+        self.new = next(keycode for keycode in range(self.first + 128, self.first + len(self.saved))
+                        if not any(self.saved[keycode - self.first]))
+
+    def tearDown(self):
+        self.kb.close()
+        self.other.change_keyboard_mapping(self.first, [list(row) for row in self.saved])
+        self.other.close()
+
+    def remap(self):
+        width = len(self.saved[0])
+        self.other.change_keyboard_mapping(self.old, [[0] * width])
+        self.other.change_keyboard_mapping(self.new, [[ord('a'), ord('A')] + [0] * (width - 2)])
+        self.other.sync()
+        self.kb.connection.sync()       # Receive the MappingNotify events
+
+    def sent_keycodes(self):
+        return [event[1] for event in self.recording.events]
+
+    def test_cached_plan(self):
+        plan = self.kb.compile('a')
+        self.kb.play(plan)
+        self.remap()
+        self.kb.play(self.kb.compile('a'))
+        self.kb.play(plan)
+        self.assertEqual(self.sent_keycodes(), [self.old, self.old] + [self.new] * 4)
+
+    def test_press_and_batch(self):
+        self.kb.press('a')
+        self.kb.release('a')
+        self.remap()
+        self.kb.press('a')
+        self.kb.release('a')
+        self.remap()
+        with self.kb.batch():
+            self.kb.press('a')
+            self.kb.release('a')
+        self.assertEqual(self.sent_keycodes(), [self.old] * 2 + [self.new] * 4)
+
+    def test_cyrillic_keysyms_are_typed_as_they_are(self):
+        width = len(self.saved[0])
+        self.other.change_keyboard_mapping(self.new, [[EF, EF_UPPER] + [0] * (width - 2)])
+        self.other.sync()
+        self.kb.connection.sync()
+        self.assertEqual(self.kb.prepare('фФ'), 0)      # Nothing to register
+        self.kb.play(self.kb.compile('фФ'))
+        self.assertTrue(all(isinstance(event[0], int) for event in self.recording.events))     # XTest, no SendEvent
+        self.assertEqual(self.sent_keycodes().count(self.new), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import sys
+import os
+import json
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libkeyboard import VirtualKeyBoard, NullBackend, metrics, Pacer, VirtualClock
+
+
+class TestMetrics(unittest.TestCase):
+    def test_keyboard_counters(self):
+        with VirtualKeyBoard(backend=NullBackend()) as kb:
+            kb.press('a')
+            kb.release('a')
+            plan = kb.compile('hello')
+            kb.compile('hello')
+            kb.play(plan, pacer=Pacer(0.01, clock=VirtualClock()))
+            kb.sync()
+            stats = kb.stats()
+        counters = stats['counters']
+        self.assertEqual(counters['events'], 12)
+        self.assertEqual(counters['sends'], 2)
+        self.assertEqual(counters['batches'], 1)
+        self.assertEqual(counters['syncs'], 1)
+        self.assertEqual((counters['plan_hits'], counters['plan_misses']), (1, 1))
+        histograms = stats['histograms']
+        self.assertEqual(histograms['pace_wait']['count'], 5)
+        self.assertEqual(histograms['send']['count'], 2)
+        self.assertEqual(set(histograms), {'send', 'compile', 'play', 'pace_wait', 'sync'})
+
+    def test_aggregate_keeps_closed_keyboards(self):
+        before = metrics.snapshot()['counters']['events']
+        with VirtualKeyBoard(backend=NullBackend()) as kb:
+            kb.play(kb.compile('abc'))
+            self.assertEqual(metrics.snapshot()['counters']['events'] - before, 6)
+        kb.close()
+        self.assertEqual(metrics.snapshot()['counters']['events'] - before, 6)
+
+    def test_disabled(self):
+        metrics.disable()
+        try:
+            kb = VirtualKeyBoard(backend=NullBackend())
+        finally:
+            metrics.enable()
+        self.assertIsNone(kb.metrics)
+        self.assertIsNone(kb.stats())
+        kb.play(kb.compile('abc'))
+        kb.close()
+
+    def test_histogram_buckets(self):
+        histogram = metrics.Histogram()
+        for seconds in (0.0001, 0.0003, 20.0):
+            histogram.observe(seconds)
+        buckets = histogram.snapshot()['buckets']
+        self.assertEqual((buckets['0.0001'], buckets['0.0005'], buckets['+Inf']), (1, 1, 1))
+
+    def test_exports(self):
+        data = metrics.Metrics()
+        data.count('events', 3)
+        data.observe('sync', 0.002)
+        data.observe('sync', 0.2)
+        self.assertEqual(json.loads(metrics.to_json(data))['counters']['events'], 3)
+        text = metrics.to_prometheus(data)
+        self.assertIn('libkeyboard_events_total 3\n', text)
+        self.assertIn('libkeyboard_operation_seconds_bucket{operation="sync",le="0.0025"} 1\n', text)
+        self.assertIn('libkeyboard_operation_seconds_bucket{operation="sync",le="+Inf"} 2\n', text)
+        self.assertIn('libkeyboard_operation_seconds_count{operation="sync"} 2\n', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libkeyboard.pacing import Pacer, AdaptivePacer, VirtualClock
+from libkeyboard.keyboard import windows
+from tests.test_windows_batch import FakeUser32
+
+
+class TestPacer(unittest.TestCase):
+    def test_no_drift(self):
+        """Time spent between marks is absorbed by the schedule instead of adding up"""
+        clock = VirtualClock()
+        pacer = Pacer(rate=100, clock=clock)
+        for _ in range(100):
+            pacer.wait()
+            clock.advance(0.003)        # Sending the character
+        self.assertAlmostEqual(pacer.deadline, 0.99)
+        self.assertAlmostEqual(clock.now(), 0.993)
+        stats = pacer.stats()
+        self.assertEqual(stats["marks"], 100)
+        self.assertEqual(stats["max_error"], 0.0)
+
+    def test_late_marks_do_not_shift_schedule(self):
+        clock = VirtualClock()
+        pacer = Pacer(0.01, clock=clock)
+        pacer.wait()
+        clock.advance(0.025)            # One slow character
+        pacer.wait()
+        pacer.wait()
+        self.assertAlmostEqual(clock.now(), 0.025)
+        pacer.wait()
+        self.assertAlmostEqual(clock.now(), 0.03)
+        self.assertAlmostEqual(pacer.stats()["max_error"], 0.015)
+
+    def test_deadlines(self):
+        clock = VirtualClock()
+        pacer = Pacer(0.5, deadlines=[0.0, 0.1, 0.15], clock=clock)
+        times = []
+        for _ in range(5):
+            pacer.wait()
+            times.append(clock.now())
+        for actual, expected in zip(times, [0.0, 0.1, 0.15, 0.65, 1.15]):
+            self.assertAlmostEqual(actual, expected)
+
+    def test_real_clock_precision(self):
+        pacer = Pacer(rate=1000)
+        for _ in range(50):
+            pacer.wait()
+        self.assertLess(pacer.stats()["mean_error"], 0.001)
+
+    def test_play_with_pacer(self):
+        user32 = FakeUser32()
+        clock = VirtualClock()
+        with windows.KeyBoard(user32=user32) as kb:
+            pacer = kb.play(kb.compile('abc'), pacer=Pacer(rate=10, clock=clock))
+        self.assertAlmostEqual(clock.now(), 0.2)
+        self.assertEqual(pacer.stats()["marks"], 3)
+        self.assertEqual(len(user32.calls), 3)
+
+
+class TestAdaptivePacer(unittest.TestCase):
+    def run_pacer(self, pacer, clock, marks=400):
+        for _ in range(marks):
+            pacer.wait()
+            clock.advance(0.0001)
+
+    def test_finds_and_remembers_rate(self):
+        clock = VirtualClock()
+        memory = {}
+
+        def probe():
+            # The target keeps up with 400 marks per second, round trips slow down beyond
+            clock.advance(0.001 if pacer.rate <= 400 else 0.02)
+
+        pacer = AdaptivePacer(probe, 'xterm', rate=50, memory=memory, clock=clock)
+        self.run_pacer(pacer, clock)
+        self.assertGreater(pacer.backoffs, 0)
+        self.assertTrue(200 <= pacer.rate <= 420, pacer.rate)
+        self.assertEqual(memory['xterm'], pacer.rate)
+
+        again = AdaptivePacer(probe, 'xterm', rate=50, memory=memory, clock=clock)
+        self.assertEqual(again.rate, memory['xterm'])
+        self.assertFalse(again.slow_start)
+
+    def test_rate_bounds(self):
+        clock = VirtualClock()
+        pacer = AdaptivePacer(lambda: None, rate=100, max_rate=300, clock=clock, memory={})
+        self.run_pacer(pacer, clock, 100)
+        self.assertEqual(pacer.rate, 300)
+        self.assertAlmostEqual(pacer.interval, 1 / 300.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
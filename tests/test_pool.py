@@ -0,0 +1,109 @@
+import sys
+import os
+import threading
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libkeyboard.pool import SessionPool
+
+
+class SwapState(object):
+    def __init__(self, keyboard, state):
+        self.keyboard = keyboard
+        self.state = state
+
+    def __enter__(self):
+        self.saved = {name: getattr(self.keyboard, name) for name in self.state}
+        self.keyboard.__dict__.update(self.state)
+        return self.keyboard
+
+    def __exit__(self, *exc):
+        for name in self.state:
+            self.state[name] = getattr(self.keyboard, name)
+        self.keyboard.__dict__.update(self.saved)
+
+
+class FakeKeyBoard(object):
+    """Stand-in KeyBoard that only tracks the state the pool cares about"""
+
+    def __init__(self, display=None):
+        self.display_name = display
+        self.event_mapping = {}
+        self.modifiers = set()
+        self.closed = False
+
+    def _session_state(self):
+        return {"event_mapping": {}, "modifiers": set()}
+
+    def _swap_state(self, state):
+        return SwapState(self, state)
+
+    def press(self, key, register=False):
+        self.event_mapping[key] = self.event_mapping.get(key, 0) + 1
+
+    def release(self, key):
+        self.event_mapping.pop(key, None)
+
+    def reset_keyboard(self):
+        self.event_mapping = {}
+
+    def close(self):
+        self.closed = True
+
+
+class TestSessionPool(unittest.TestCase):
+    def test_reuses_connection(self):
+        pool = SessionPool(factory=FakeKeyBoard)
+        with pool.acquire() as first:
+            kb = first.keyboard
+        with pool.acquire() as second:
+            self.assertIs(second.keyboard, kb)
+        self.assertFalse(kb.closed)
+
+    def test_sessions_keep_own_state(self):
+        pool = SessionPool(factory=FakeKeyBoard)
+        a = pool.acquire()
+        b = pool.acquire()
+        self.assertIs(a.keyboard, b.keyboard)
+        a.press('shift')
+        self.assertEqual(a.state['event_mapping'], {'shift': 1})
+        self.assertEqual(b.state['event_mapping'], {})
+        self.assertEqual(a.keyboard.event_mapping, {})
+        pool.release(a)
+        pool.release(b)
+        self.assertEqual(a.state['event_mapping'], {})
+
+    def test_keyed_per_display_and_thread(self):
+        pool = SessionPool(factory=FakeKeyBoard)
+        with pool.acquire(':1') as one, pool.acquire(':2') as two:
+            self.assertIsNot(one.keyboard, two.keyboard)
+            self.assertEqual(two.keyboard.display_name, ':2')
+
+        keyboards = []
+        thread = threading.Thread(target=lambda: keyboards.append(pool.acquire(':1').keyboard))
+        thread.start()
+        thread.join()
+        self.assertIsNot(keyboards[0], one.keyboard)
+
+    def test_idle_eviction(self):
+        pool = SessionPool(idle_timeout=0, factory=FakeKeyBoard)
+        session = pool.acquire()
+        pool.evict_idle()
+        self.assertFalse(session.keyboard.closed)       # Borrowed sessions are never evicted
+        pool.release(session)
+        pool.evict_idle()
+        self.assertTrue(session.keyboard.closed)
+        with pool.acquire() as fresh:
+            self.assertIsNot(fresh.keyboard, session.keyboard)
+
+    def test_close(self):
+        pool = SessionPool(factory=FakeKeyBoard)
+        session = pool.acquire()
+        pool.close()
+        self.assertTrue(session.keyboard.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libkeyboard import VirtualKeyBoard, RecordingBackend, parse_script
+from libkeyboard.keyboard import _plan
+
+
+class TestParse(unittest.TestCase):
+    def test_syntax(self):
+        self.assertEqual(parse_script('{ctrl+a}{del}Hi{enter}{tab*2}').units, (
+            ('chord', ('ctrl', 'a')), ('chord', ('del',)), ('text', 'Hi'),
+            ('chord', ('enter',)), ('chord', ('tab',)), ('chord', ('tab',))))
+        self.assertEqual(parse_script('{{a}} {}}{ctrl++}{**2}').units, (
+            ('text', '{a} '), ('chord', ('}',)), ('chord', ('ctrl', '+')), ('chord', ('*',)), ('chord', ('*',))))
+
+    def test_holds_are_released(self):
+        self.assertEqual(parse_script('{ctrl+shift down}x{shift up}').units, (
+            ('down', 'ctrl'), ('down', 'shift'), ('text', 'x'), ('up', 'shift'), ('up', 'ctrl')))
+
+    def test_errors(self):
+        for script in ('{', 'a}', '{}', '{tab*x}', '{*3}', '{ *3}', '{  * 2}'):
+            self.assertRaises(ValueError, parse_script, script)
+
+    def test_chord(self):
+        self.assertEqual(_plan.chord('ctrl+shift+esc'), ('ctrl', 'shift', 'esc'))
+        self.assertEqual(_plan.chord('ctrl++'), ('ctrl', '+'))
+        self.assertEqual(_plan.chord('+'), ('+',))
+
+
+class TestCompile(unittest.TestCase):
+    def test_one_batch(self):
+        recording = RecordingBackend()
+        with VirtualKeyBoard(backend=recording) as kb:
+            plan = kb.compile(parse_script('{shift down}ab{shift up}{tab*2}'))
+            self.assertIs(kb.compile(parse_script('{shift down}ab{shift up}{tab*2}')), plan)
+            self.assertEqual(len(plan.marks), 6)
+            kb.play(plan)
+        self.assertEqual(recording.sends, 1)
+        self.assertEqual(recording.events, [
+            ('shift', True), ('a', True), ('a', False), ('b', True), ('b', False), ('shift', False),
+            ('tab', True), ('tab', False), ('tab', True), ('tab', False)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import sys
+import os
+import queue
+import threading
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libkeyboard import Sender, VirtualKeyBoard, RecordingBackend
+
+
+class GatedRecording(RecordingBackend):
+    """Recording backend whose deliveries wait until the gate opens"""
+
+    def __init__(self, gate):
+        super(GatedRecording, self).__init__()
+        self.gate = gate
+        self.waiting = threading.Event()
+
+    def send(self, events):
+        self.waiting.set()
+        self.gate.wait()
+        super(GatedRecording, self).send(events)
+
+
+class TestSender(unittest.TestCase):
+    def test_jobs_never_interleave(self):
+        recording = RecordingBackend()
+        with Sender(factory=lambda display: VirtualKeyBoard(display, recording)) as sender:
+            def produce(char):
+                for _ in range(20):
+                    sender.write(char * 10)
+
+            threads = [threading.Thread(target=produce, args=(char,)) for char in 'abcd']
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            sender.join()
+        text = recording.text()
+        self.assertEqual(len(text), 800)
+        for i in range(0, len(text), 10):
+            self.assertEqual(len(set(text[i:i + 10])), 1)
+
+    def test_waiting_jobs_are_coalesced(self):
+        gate = threading.Event()
+        recording = GatedRecording(gate)
+        sender = Sender(factory=lambda display: VirtualKeyBoard(display, recording))
+        try:
+            futures = [sender.write('a')]
+            recording.waiting.wait(5)
+            futures += [sender.write(text) for text in ('b', 'c', 'd')]
+            futures.append(sender.group('ctrl', 'e'))
+            gate.set()
+            for future in futures:
+                self.assertIsNone(future.result(5))
+        finally:
+            gate.set()
+            sender.close()
+        self.assertEqual(recording.text(), 'abcde')
+        self.assertEqual(recording.sends, 2)
+        stats = sender.stats()
+        self.assertEqual(stats['sender']['counters']['jobs'], 5)
+        self.assertEqual(stats['sender']['counters']['coalesced_batches'], 1)
+        self.assertEqual(stats['sender']['histograms']['queue_wait']['count'], 5)
+        self.assertEqual(stats['max_queue_depth'], 4)
+
+    def test_back_pressure(self):
+        gate = threading.Event()
+        recording = GatedRecording(gate)
+        sender = Sender(max_queue=1, factory=lambda display: VirtualKeyBoard(display, recording))
+        try:
+            sender.write('a')
+            recording.waiting.wait(5)
+            sender.write('b')
+            self.assertRaises(queue.Full, sender.write, 'c', timeout=0.05)
+        finally:
+            gate.set()
+            sender.close()
+        self.assertRaises(RuntimeError, sender.write, 'd')
+
+    def test_failed_job_does_not_stop_the_sender(self):
+        recording = RecordingBackend()
+        with Sender(factory=lambda display: VirtualKeyBoard(display, recording)) as sender:
+            failed = sender.group('nosuchkey', 'a')
+            typed = sender.write('ok')
+            self.assertRaises(KeyError, failed.result, 5)
+            self.assertIsNone(typed.result(5))
+        self.assertEqual(recording.text(), 'ok')
+
+    def test_plans_follow_a_reopened_keyboard(self):
+        gate = threading.Event()
+        recording = GatedRecording(gate)
+        keyboards = []
+
+        class Tagged(VirtualKeyBoard):
+            """Virtual keyboard whose events name the KeyBoard that resolved them"""
+
+            def _resolve(self, key, _key, keysym, register):
+                return ((len(keyboards), keysym, True),), ((len(keyboards), keysym, False),)
+
+        def factory(display):
+            keyboards.append(Tagged(display, recording))
+            return keyboards[-1]
+
+        sender = Sender(factory=factory)
+        try:
+            first = sender.write('x')
+            recording.waiting.wait(5)
+            futures = [sender.write('中'), sender.group('ctrl', 'nosuchkey'), sender.write('文')]
+            gate.set()
+            self.assertIsNone(first.result(5))
+            self.assertIsNone(futures[0].result(5))
+            self.assertRaises(KeyError, futures[1].result, 5)
+            self.assertIsNone(futures[2].result(5))
+        finally:
+            gate.set()
+            sender.close()
+        self.assertEqual(len(keyboards), 2)
+        self.assertEqual(recording.events, [
+            (1, 'x', True), (1, 'x', False),
+            (2, '中', True), (2, '中', False), (2, '文', True), (2, '文', False),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
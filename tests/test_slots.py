@@ -0,0 +1,77 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libkeyboard.keyboard._slots import SlotAllocator
+
+
+class TestSlotAllocator(unittest.TestCase):
+    def test_allocates_free_slots_in_order(self):
+        slots = SlotAllocator([(200, 0), (200, 1), (201, 0)])
+        self.assertEqual(slots.allocate(0x1004e2d), ((200, 0), None))
+        self.assertEqual(slots.allocate(0x1006587), ((200, 1), None))
+        self.assertEqual(slots.get(0x1004e2d), (200, 0))
+        self.assertEqual(slots.stats(), {"slots": 3, "used": 2, "hits": 1, "misses": 2, "evictions": 0})
+
+    def test_evicts_least_recently_used(self):
+        slots = SlotAllocator([(200, 0), (200, 1)])
+        slots.allocate('a')
+        slots.allocate('b')
+        slots.get('a')                              # 'b' is now the least recently used
+        self.assertEqual(slots.allocate('c'), ((200, 1), 'b'))
+        self.assertNotIn('b', slots)
+        self.assertEqual(slots.evictions, 1)
+
+    def test_never_evicts_pinned_or_protected(self):
+        slots = SlotAllocator([(200, 0), (200, 1)])
+        slots.allocate('a')
+        slots.allocate('b')
+        slots.pin('a')
+        self.assertEqual(slots.allocate('c', protect={'x'}), ((200, 1), 'b'))
+        self.assertRaises(KeyError, slots.allocate, 'd', {'c'})
+        slots.unpin('a')
+        self.assertEqual(slots.allocate('d', {'c'}), ((200, 0), 'a'))
+
+    def test_clear(self):
+        slots = SlotAllocator([(200, 0), (201, 0)])
+        slots.allocate('a')
+        slots.allocate('b')
+        self.assertEqual(sorted(slots.clear()), [(200, 0), (201, 0)])
+        self.assertEqual(len(slots), 0)
+        self.assertEqual(slots.allocate('c'), ((200, 0), None))
+
+    def test_rebuild(self):
+        slots = SlotAllocator([(200, 0), (200, 1), (201, 0)])
+        slots.allocate('a')
+        slots.allocate('b')
+        slots.pin('a')
+        slots.rebuild([(200, 0), (201, 0)], lambda keysym, slot: keysym == 'b')     # 'a' was replaced
+        self.assertNotIn('a', slots)
+        self.assertEqual(slots.get('b'), (200, 1))
+        self.assertEqual(slots.capacity, 3)
+        self.assertEqual(slots.allocate('c'), ((200, 0), None))
+
+
+@unittest.skipIf(sys.platform == 'win32' or not os.environ.get('DISPLAY'), "needs an X server, e.g. xvfb-run")
+class TestSharedDisplay(unittest.TestCase):
+    def test_keyboards_do_not_share_slots(self):
+        from libkeyboard import RecordingBackend
+        from libkeyboard.keyboard.linux import KeyBoard
+        recording = RecordingBackend()
+        with KeyBoard(backend=recording) as a, KeyBoard(backend=RecordingBackend()) as b:
+            a.slot_stats()          # Both allocators are built from the same spare keycodes
+            b.slot_stats()
+            a.compile('中')
+            b.compile('文')
+            a.connection.sync()     # Receive the MappingNotify of b's registration
+            a.play(a.compile('中中'))
+            keycode, state = recording.events[-1][1:]
+            row = a.connection.get_keyboard_mapping(keycode, 1)[0]
+            self.assertEqual(row[state & 1], a.char_to_keysym('中'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -37,5 +37,15 @@ class TestSmoke(unittest.TestCase):
         except Exception as e:
             self.fail(f"keyboard_write failed: {e}")
 
+    def test_batch(self):
+        """Test that batched events are flushed without errors"""
+        try:
+            with KeyBoard() as kb, kb.batch(window=2):
+                for char in "batch":
+                    kb.press(char)
+                    kb.release(char)
+        except Exception as e:
+            self.fail(f"batch failed: {e}")
+
 if __name__ == '__main__':
     unittest.main()
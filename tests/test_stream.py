@@ -0,0 +1,63 @@
+import sys
+import os
+import io
+import mmap
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libkeyboard import VirtualKeyBoard, RecordingBackend, type_stream
+from libkeyboard.stream import read_chunks
+
+
+class TestReadChunks(unittest.TestCase):
+    def test_sources(self):
+        text = 'héllo 中文\nworld\n'
+        data = text.encode('utf-8')
+        sources = [
+            [text[:3], text[3:]],
+            [data[:2], data[2:8], data[8:]],        # Characters split between pieces
+            io.BytesIO(data),
+            io.StringIO(text),
+            io.TextIOWrapper(io.BytesIO(data), encoding='utf-8'),
+            data,
+        ]
+        for source in sources:
+            chunks = list(read_chunks(source, chunk_size=4))
+            self.assertEqual(''.join(chunks), text)
+            self.assertLessEqual(max(len(chunk) for chunk in chunks), 4)
+
+    def test_mmap(self):
+        with tempfile.TemporaryFile() as f:
+            f.write('abc中'.encode('gbk'))
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                self.assertEqual(''.join(read_chunks(mapped, 'gbk', chunk_size=1)), 'abc中')
+
+
+class TestTypeStream(unittest.TestCase):
+    def test_bounded_read_ahead(self):
+        recording = RecordingBackend()
+        lead = []
+
+        def produce():
+            for i in range(200):
+                lead.append(i * 10 - len(recording.text()))
+                yield 'abcdefghij'
+
+        with VirtualKeyBoard(backend=recording) as kb:
+            type_stream(kb, produce(), chunk_size=10, depth=2)
+            self.assertEqual(len(kb._plans), 0)
+        self.assertEqual(recording.text(), 'abcdefghij' * 200)
+        self.assertEqual(recording.sends, 200)
+        self.assertLessEqual(max(lead), 50)
+
+    def test_reader_errors(self):
+        with VirtualKeyBoard(backend=RecordingBackend()) as kb:
+            self.assertRaises(UnicodeDecodeError, type_stream, kb, [b'ok', b'\xff'])
+
+
+if __name__ == '__main__':
+    unittest.main()
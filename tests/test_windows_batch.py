@@ -0,0 +1,118 @@
+import sys
+import os
+import ctypes
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from libkeyboard.keyboard.windows import (
+    KeyBoard, InputBuffer, INPUT, VK_SHIFT, KEYEVENTF_KEYUP, KEYEVENTF_UNICODE,
+)
+
+
+class FakeUser32(object):
+    """Stand-in for user32 recording SendInput calls, optionally inserting fewer events than asked"""
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.calls = []
+        self.events = []
+
+    def SendInput(self, count, inputs, size):
+        assert size == ctypes.sizeof(INPUT)
+        inserted = count if self.limit is None else min(count, self.limit)
+        array = ctypes.cast(inputs, ctypes.POINTER(INPUT))
+        for i in range(inserted):
+            ki = array[i].union.ki
+            self.events.append((ki.wVk, ki.wScan, ki.dwFlags))
+        self.calls.append((count, inserted))
+        return inserted
+
+
+class TestInputBuffer(unittest.TestCase):
+    def test_single_call(self):
+        user32 = FakeUser32()
+        buffer = InputBuffer(user32)
+        buffer.add_vk(0x41, False)
+        buffer.add_vk(0x41, True)
+        buffer.add_unicode('中', False)
+        buffer.add_unicode('中', True)
+        self.assertEqual(buffer.flush(), 4)
+        self.assertEqual(user32.calls, [(4, 4)])
+        self.assertEqual(user32.events, [
+            (0x41, 0, 0), (0x41, 0, KEYEVENTF_KEYUP),
+            (0, 0x4e2d, KEYEVENTF_UNICODE), (0, 0x4e2d, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP),
+        ])
+
+    def test_surrogate_pairs(self):
+        user32 = FakeUser32()
+        buffer = InputBuffer(user32)
+        buffer.add_unicode('\U0001F600', False)
+        buffer.flush()
+        self.assertEqual([scan for vk, scan, flags in user32.events], [0xD83D, 0xDE00])
+
+    def test_chunks_and_resumes_partial_insertion(self):
+        user32 = FakeUser32(limit=3)
+        buffer = InputBuffer(user32, max_events=4)
+        for vk in range(0x41, 0x4b):
+            buffer.events.append((vk, 0, 0))
+        self.assertEqual(buffer.flush(), 10)
+        self.assertEqual([vk for vk, scan, flags in user32.events], list(range(0x41, 0x4b)))
+        self.assertEqual(user32.calls[0], (4, 3))
+
+    def test_blocked_input_raises(self):
+        buffer = InputBuffer(FakeUser32(limit=0))
+        buffer.add_vk(0x41, False)
+        self.assertRaises(OSError, buffer.flush)
+
+    def test_shift_kept_held_between_uppercase_chars(self):
+        user32 = FakeUser32()
+        buffer = InputBuffer(user32)
+        for vk in (0x41, 0x42):                 # "AB"
+            buffer.add_vk(VK_SHIFT, False)
+            buffer.add_vk(vk, False)
+            buffer.add_vk(VK_SHIFT, True)
+            buffer.add_vk(vk, True)
+        buffer.flush()
+        self.assertEqual(user32.events, [
+            (VK_SHIFT, 0, 0), (0x41, 0, 0), (0x41, 0, KEYEVENTF_KEYUP),
+            (0x42, 0, 0), (VK_SHIFT, 0, KEYEVENTF_KEYUP), (0x42, 0, KEYEVENTF_KEYUP),
+        ])
+
+
+class TestKeyBoardBatch(unittest.TestCase):
+    def test_string_in_one_call(self):
+        user32 = FakeUser32()
+        with KeyBoard(user32=user32) as kb:
+            with kb.batch():
+                for char in '中文':
+                    kb.press(char)
+                    kb.release(char)
+                kb.press('enter')
+                kb.release('enter')
+        self.assertEqual(user32.calls, [(6, 6)])
+        self.assertEqual(user32.events[-2:], [(0x0D, 0, 0), (0x0D, 0, KEYEVENTF_KEYUP)])
+
+    def test_compiled_plan(self):
+        user32 = FakeUser32()
+        with KeyBoard(user32=user32) as kb:
+            plan = kb.compile(['中文', ('enter',)])
+            self.assertIs(kb.compile(['中文', ('enter',)]), plan)
+            self.assertEqual(plan.event_count, 6)
+            self.assertEqual(len(plan.marks), 3)
+            kb.play(plan)
+            kb.play(plan)
+        self.assertEqual(user32.calls, [(6, 6), (6, 6)])
+        self.assertEqual(user32.events[:6], user32.events[6:])
+
+    def test_unbatched_calls_per_event(self):
+        user32 = FakeUser32()
+        with KeyBoard(user32=user32) as kb:
+            kb.press('enter')
+            kb.release('enter')
+        self.assertEqual(user32.calls, [(1, 1), (1, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()